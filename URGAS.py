@@ -1,27 +1,253 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+import json
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlencode
 
 # Backend API URL
 API_URL = "http://127.0.0.1:5000"
 
+# Seconds a read result is reused before it is revalidated with the backend
+READ_CACHE_TTL = 30
+
+# Seconds between keep-alives on a live balance stream; the page reacts to clicks only between lines
+LIVE_HEARTBEAT_SECONDS = 1
+
+# Rows per page offered by the data grids; the first is the default
+GRID_PAGE_SIZES = (25, 50, 100, 250)
+
+class BackendError(Exception):
+    """Raised when the backend answers with an error status."""
+
 # Helper Functions
+@st.cache_resource
+def get_session():
+    """Create one keep-alive HTTP session shared by every rerun."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def get_read_cache():
+    """Create the read cache shared by every rerun."""
+    return {"lock": threading.Lock(), "entries": {}}
+
+def clear_read_cache():
+    """Forget all cached read results, e.g. after a mutation."""
+    cache = get_read_cache()
+    with cache["lock"]:
+        cache["entries"].clear()
+
+def get_json(endpoint):
+    """GET an endpoint through the shared session and read cache.
+
+    Fresh entries are returned without a request; stale ones are
+    revalidated with their ETag so unchanged data costs a 304 only.
+    Safe to call from worker threads (no Streamlit calls).
+    """
+    cache = get_read_cache()
+    with cache["lock"]:
+        entry = cache["entries"].get(endpoint)
+    if entry and entry["expires"] > time.monotonic():
+        return entry["data"]
+
+    headers = {"If-None-Match": entry["etag"]} if entry and entry["etag"] else {}
+    response = get_session().get(f"{API_URL}/{endpoint}", headers=headers)
+    if response.status_code == 304 and entry:
+        data = entry["data"]
+    elif response.status_code == 200:
+        data = response.json()
+    else:
+        raise BackendError(response.text)
+
+    with cache["lock"]:
+        cache["entries"][endpoint] = {
+            "data": data,
+            "etag": response.headers.get("ETag") or (entry["etag"] if entry else None),
+            "expires": time.monotonic() + READ_CACHE_TTL
+        }
+    return data
+
+def grid_request(endpoint, key, columns, filters=None, default_sort=None, params=None):
+    """Draw a grid's sort, page size and filter controls and return the path of its visible page.
+
+    ``columns`` are the columns the backend can sort by, ``filters`` maps
+    filter parameters to their labels and ``params`` holds filters set
+    elsewhere on the page. The query and the cursors of the pages before
+    the visible one are kept in ``st.session_state`` under ``key``, so the
+    page survives reruns and starts over when the query changes.
+    """
+    default_sort = default_sort or columns[0]
+    sort_by, order, page_size = st.columns(3)
+    sort_column = sort_by.selectbox("Sort by", columns, index=columns.index(default_sort.lstrip("-")),
+                                    key=f"{key}_sort")
+    descending = order.selectbox("Order", ["Ascending", "Descending"], index=int(default_sort.startswith("-")),
+                                 key=f"{key}_order") == "Descending"
+    limit = page_size.selectbox("Rows per page", GRID_PAGE_SIZES, key=f"{key}_limit")
+    query = dict(params or {}, shape="columns", limit=limit, sort=("-" if descending else "") + sort_column)
+    if filters:
+        with st.expander("Filter"):
+            for name, label in filters.items():
+                value = st.text_input(label, key=f"{key}_{name}").strip()
+                if value:
+                    query[name] = value
+
+    state = st.session_state.setdefault(f"{key}_grid", {"query": None, "cursors": []})
+    if state["query"] != query:
+        state["query"] = query
+        state["cursors"] = []
+    if state["cursors"]:
+        query = dict(query, cursor=state["cursors"][-1])
+    return f"{endpoint}?{urlencode(query)}"
+
+def show_grid(placeholder, names, rows, empty_message):
+    """Draw a page of ``rows`` (arrays in ``names`` order) in ``placeholder``."""
+    if rows:
+        placeholder.dataframe({name: [row[i] for row in rows] for i, name in enumerate(names)}, hide_index=True)
+    else:
+        placeholder.write(empty_message)
+
+def grid_page(key, page, empty_message="No data found."):
+    """Draw the page returned for ``grid_request`` with Previous and Next buttons.
+
+    Returns the placeholder it is drawn in, and its column names and rows.
+    """
+    names, rows = (page["columns"], page["rows"]) if page else ([], [])
+    placeholder = st.empty()
+    show_grid(placeholder, names, rows, empty_message)
+
+    cursors = st.session_state[f"{key}_grid"]["cursors"]
+    previous, position, following = st.columns([1, 2, 1])
+    if previous.button("Previous", key=f"{key}_previous", disabled=not cursors):
+        cursors.pop()
+        st.rerun()
+    position.caption(f"Page {len(cursors) + 1}")
+    if following.button("Next", key=f"{key}_next", disabled=not (page and page.get("next_cursor"))):
+        cursors.append(page["next_cursor"])
+        st.rerun()
+    return placeholder, names, rows
+
+def data_grid(endpoint, key, columns, filters=None, default_sort=None, params=None, empty_message="No data found."):
+    """Show one page of a list endpoint in a sortable, filterable grid; see grid_request."""
+    page = fetch_data(grid_request(endpoint, key, columns, filters, default_sort, params))
+    return grid_page(key, page, empty_message)
+
+def watch_balances(table, key_column, grid, empty_message):
+    """Redraw the rows of ``table`` on a grid's page as the backend pushes balance changes.
+
+    ``grid`` is what grid_page returned. The changes come from
+    /live/balances; rows on the page are updated or removed, and new rows
+    appear when the page is next loaded. Runs until the page reruns: the
+    status line is redrawn on every event and keep-alive, which is where
+    Streamlit stops the script when a widget is used.
+    """
+    placeholder, names, rows = grid
+    if key_column not in names:
+        return
+    position = names.index(key_column)
+    rows_by_key = {row[position]: row for row in rows}
+    status = st.empty()
+    try:
+        with get_session().get(f"{API_URL}/live/balances", params={"heartbeat": LIVE_HEARTBEAT_SECONDS},
+                               stream=True) as response:
+            if response.status_code == 503:
+                status.caption("Live updates are busy; reload the page to see new balances.")
+                return
+            if response.status_code != 200:
+                raise BackendError(response.text)
+            for line in response.iter_lines(decode_unicode=True):
+                status.caption(f"Live; last checked at {time.strftime('%H:%M:%S')}.")
+                if not line.startswith("data:"):
+                    continue
+                for change in json.loads(line[len("data:"):])["changes"]:
+                    row_key = change["key"].get(key_column)
+                    if change["table"] != table or row_key not in rows_by_key:
+                        continue
+                    if change["action"] == "delete":
+                        del rows_by_key[row_key]
+                    else:
+                        rows_by_key[row_key] = [change["row"][name] for name in names]
+                show_grid(placeholder, names, list(rows_by_key.values()), empty_message)
+    except BackendError as e:
+        st.error(f"Error: {e}")
+    except Exception as e:
+        st.error(f"Error connecting to backend: {e}")
+
 def fetch_data(endpoint):
     """Fetch data from a specified endpoint."""
     try:
-        response = requests.get(f"{API_URL}/{endpoint}")
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Error: {response.text}")
-            return []
+        return get_json(endpoint)
+    except BackendError as e:
+        st.error(f"Error: {e}")
+        return []
     except Exception as e:
         st.error(f"Error connecting to backend: {e}")
         return []
 
+def fetch_many(endpoints):
+    """Fetch several read endpoints in one /batch round trip.
+
+    Fresh read cache entries are used as they are; the rest are requested
+    together, stale ones with their ETag so unchanged data comes back as a
+    bodiless 304. Returns a dict keyed by endpoint.
+    """
+    cache = get_read_cache()
+    results = {}
+    stale = {}
+    with cache["lock"]:
+        for endpoint in endpoints:
+            entry = cache["entries"].get(endpoint)
+            if entry and entry["expires"] > time.monotonic():
+                results[endpoint] = entry["data"]
+            else:
+                stale[endpoint] = entry
+    if not stale:
+        return results
+
+    operations = [{"id": endpoint, "path": endpoint, "etag": entry["etag"] if entry else None}
+                  for endpoint, entry in stale.items()]
+    try:
+        response = get_session().post(f"{API_URL}/batch", json={"requests": operations})
+        if response.status_code != 200:
+            raise BackendError(response.text)
+        batch_results = response.json()["results"]
+    except BackendError as e:
+        st.error(f"Error: {e}")
+        return dict(results, **{endpoint: [] for endpoint in stale})
+    except Exception as e:
+        st.error(f"Error connecting to backend: {e}")
+        return dict(results, **{endpoint: [] for endpoint in stale})
+
+    for result in batch_results:
+        endpoint = result["id"]
+        entry = stale[endpoint]
+        if result["status"] == 304 and entry:
+            data = entry["data"]
+        elif result["status"] == 200:
+            data = result["body"]
+        else:
+            st.error(f"Error: {result.get('body')}")
+            results[endpoint] = []
+            continue
+        with cache["lock"]:
+            cache["entries"][endpoint] = {
+                "data": data,
+                "etag": result["etag"] or (entry["etag"] if entry else None),
+                "expires": time.monotonic() + READ_CACHE_TTL
+            }
+        results[endpoint] = data
+    return results
+
 def post_data(endpoint, payload):
     """Post data to a specified endpoint."""
     try:
-        response = requests.post(f"{API_URL}/{endpoint}", json=payload)
+        response = get_session().post(f"{API_URL}/{endpoint}", json=payload)
+        clear_read_cache()
         if response.status_code == 200:
             st.success("Operation successful!")
             return response.json()
@@ -33,7 +259,8 @@ def post_data(endpoint, payload):
 def put_data(endpoint, payload):
     """Put (update) data to a specified endpoint."""
     try:
-        response = requests.put(f"{API_URL}/{endpoint}", json=payload)
+        response = get_session().put(f"{API_URL}/{endpoint}", json=payload)
+        clear_read_cache()
         if response.status_code == 200:
             return response.json()
         else:
@@ -44,7 +271,8 @@ def put_data(endpoint, payload):
 def delete_data(endpoint):
     """Delete data from a specified endpoint."""
     try:
-        response = requests.delete(f"{API_URL}/{endpoint}")
+        response = get_session().delete(f"{API_URL}/{endpoint}")
+        clear_read_cache()
         if response.status_code == 200:
             st.success("Deleted successfully!")
         else:
@@ -52,6 +280,22 @@ def delete_data(endpoint):
     except Exception as e:
         st.error(f"Error connecting to backend: {e}")
 
+def search_picker(label, entity_type, key):
+    """Type-ahead picker: search ``entity_type`` records by name, title or ID and return the chosen ID."""
+    query = st.text_input(f"{label} (type a name, title or ID)", key=f"{key}_query").strip()
+    if not query:
+        return None
+    try:
+        results = get_json(f"search?{urlencode({'q': query, 'type': entity_type})}")["results"]
+    except Exception as e:
+        st.error(f"Error searching: {e}")
+        return None
+    if not results:
+        st.caption("No matches.")
+        return None
+    options = {f"{r['label']} (#{r['id']})" + (f" - {r['detail']}" if r['detail'] else ""): r['id'] for r in results}
+    return options[st.selectbox(label, list(options), key=f"{key}_choice")]
+
 # Main App Layout
 st.title("University Research Grant Allocation System (URGAS)")
 
@@ -61,13 +305,11 @@ menu = st.sidebar.selectbox("Navigation", ["Professors", "Projects", "Grants", "
 if menu == "Professors":
     st.header("Manage Professors")
 
-    # Fetch and display professors
-    professors = fetch_data("professors")
+    # Display one page of professors
     st.subheader("Existing Professors")
-    if professors:
-        st.table(professors)
-    else:
-        st.write("No professors found.")
+    data_grid("professors", "professors", ["ProfessorID", "Name", "Department", "Email"],
+              filters={"name": "Name starts with", "department": "Department", "email": "Email"},
+              empty_message="No professors found.")
 
     # Add a new professor
     with st.form("Add Professor"):
@@ -105,27 +347,27 @@ if menu == "Professors":
 
     # Delete a professor
     st.subheader("Delete a Professor")
-    professor_id_to_delete = st.number_input("Professor ID to Delete", min_value=1, step=1)
+    professor_id_to_delete = search_picker("Professor to Delete", "professor", "delete_professor")
     if st.button("Delete Professor"):
         if professor_id_to_delete:
             delete_data(f"professors/{professor_id_to_delete}")
         else:
-            st.error("Please provide a valid Professor ID to delete.")
+            st.error("Please choose a professor to delete.")
 
      # Associate a professor with a project
     st.subheader("Associate Professor with Project")
-    professor_id = st.number_input("Professor ID", min_value=1, step=1)
-    project_id = st.number_input("Project ID", min_value=1, step=1)
+    professor_id = search_picker("Professor", "professor", "assign_professor")
+    project_id = search_picker("Project", "project", "assign_project")
     if st.button("Assign Professor to Project"):
         if professor_id and project_id:
             post_data("assign_professor_to_project", {"professor_id": professor_id, "project_id": project_id})
         else:
-            st.error("Both Professor ID and Project ID are required.")
+            st.error("Both a professor and a project are required.")
 
     # View Publications by a Professor
     st.subheader("View Publications by a Professor")
-    professor_id_for_publications = st.number_input("Enter Professor ID for Publications", min_value=1, step=1)
-    if st.button("Get Publications"):
+    professor_id_for_publications = search_picker("Professor for Publications", "professor", "publications_professor")
+    if st.button("Get Publications") and professor_id_for_publications:
         professor_publications = fetch_data(f"professor_publications/{professor_id_for_publications}")
         if professor_publications:
             st.table(professor_publications)
@@ -135,13 +377,13 @@ if menu == "Professors":
 elif menu == "Projects":
     st.header("Manage Projects")
 
-    # Fetch and display projects
-    projects = fetch_data("projects")
+    # Display one page of projects
     st.subheader("Existing Projects")
-    if projects:
-        st.table(projects)
-    else:
-        st.write("No projects found.")
+    data_grid("projects", "projects", ["ProjectID", "Title", "StartDate", "EndDate"],
+              filters={"title": "Title starts with", "start_from": "Starts on or after (YYYY-MM-DD)",
+                       "start_to": "Starts on or before (YYYY-MM-DD)", "end_from": "Ends on or after (YYYY-MM-DD)",
+                       "end_to": "Ends on or before (YYYY-MM-DD)"},
+              empty_message="No projects found.")
 
     # Add a new project
     with st.form("Add Project"):
@@ -171,21 +413,20 @@ elif menu == "Projects":
 
     # Convert a project to a publication
     st.subheader("Convert Project to Publication")
-    project_id = st.number_input("Project ID to Convert", min_value=1, step=1)
+    project_id = search_picker("Project to Convert", "project", "convert_project")
     publication_title = st.text_input("Publication Title")
-    if st.button("Convert to Publication"):
+    if st.button("Convert to Publication") and project_id:
         post_data("convert_project_to_publication", {"project_id": project_id, "publication_title": publication_title})
 
 elif menu == "Grants":
     st.header("Manage Grants")
 
-    # Fetch and display grants
-    grants = fetch_data("grants")
+    # Display one page of grants
     st.subheader("Existing Grants")
-    if grants:
-        st.table(grants)
-    else:
-        st.write("No grants found.")
+    grants_grid = data_grid("grants", "grants", ["GrantID", "Amount", "FundingAgencyID"],
+                            filters={"agency_id": "Funding agency ID", "min_amount": "Minimum amount",
+                                     "max_amount": "Maximum amount"},
+                            empty_message="No grants found.")
 
     # Add a new grant
     with st.form("Add Grant"):
@@ -198,11 +439,34 @@ elif menu == "Grants":
 
     # Associate a grant with a project
     st.subheader("Associate Grant with Project")
-    project_id = st.number_input("Project ID for Association", min_value=1, step=1)
+    project_id = search_picker("Project for Association", "project", "grant_project")
     grant_id = st.number_input("Grant ID for Association", min_value=1, step=1)
-    if st.button("Associate Grant"):
+    if st.button("Associate Grant") and project_id:
         post_data("assign_grant_to_project", {"project_id": project_id, "grant_id": grant_id})
 
+    # Propose links for unassigned grants, then commit the accepted plan
+    st.subheader("Plan Grant Allocations")
+    max_grants = st.number_input("Max Grants per Project", min_value=1, value=3, step=1)
+    window_start = st.date_input("Projects Active From", value=date.today(), key="allocation_start")
+    window_end = st.date_input("Projects Active Until", value=date.today(), key="allocation_end")
+    if st.button("Plan Allocations"):
+        st.session_state["allocation_plan"] = post_data("allocations/plan", {
+            "max_grants_per_project": max_grants,
+            "window_start": window_start.isoformat(),
+            "window_end": window_end.isoformat()
+        })
+    plan = st.session_state.get("allocation_plan")
+    if plan:
+        st.write(plan["summary"])
+        if plan["assignments"]:
+            st.table(plan["assignments"])
+            if st.button("Commit Plan"):
+                if post_data("allocations/commit", {"assignments": plan["assignments"]}):
+                    st.session_state.pop("allocation_plan")
+        if plan["unassigned"]:
+            st.write("Unassigned grants")
+            st.table(plan["unassigned"])
+
     # Deduct used grant amount
     st.subheader("Deduct Grant Usage")
     grant_id = st.number_input("Grant ID to Deduct Usage", min_value=1, step=1)
@@ -215,17 +479,20 @@ elif menu == "Grants":
         else:
             st.error("Valid Grant ID and usage amount are required.")
 
+    # Keep the balances above current as grants are used
+    if st.checkbox("Watch balances live", key="live_grants"):
+        watch_balances("Grants", "GrantID", grants_grid, "No grants found.")
+
 
 elif menu == "Funding Agencies":
     st.header("Manage Funding Agencies")
 
-    # Fetch and display funding agencies
-    funding_agencies = fetch_data("fundingagencies")
+    # Display one page of funding agencies
     st.subheader("Existing Funding Agencies")
-    if funding_agencies:
-        st.table(funding_agencies)
-    else:
-        st.write("No funding agencies found.")
+    agencies_grid = data_grid("fundingagencies", "agencies", ["AgencyID", "Name", "Budget"],
+                              filters={"name": "Name starts with", "min_budget": "Minimum budget",
+                                       "max_budget": "Maximum budget"},
+                              empty_message="No funding agencies found.")
 
     # Add a new funding agency
     with st.form("Add Funding Agency"):
@@ -243,48 +510,49 @@ elif menu == "Funding Agencies":
         if funding_agency_id:
             delete_data(f"fundingagencies/{funding_agency_id}")
 
+    # Keep the budgets above current as grants are issued
+    if st.checkbox("Watch budgets live", key="live_agencies"):
+        watch_balances("FundingAgencies", "AgencyID", agencies_grid, "No funding agencies found.")
+
 elif menu == "Views":
     st.header("Views and Reports")
 
-    # Professor Projects View
-    st.subheader("Professor Projects")
-    professor_projects = fetch_data("professor_projects")
-    if professor_projects:
-        st.table(professor_projects)
-    else:
-        st.write("No data found.")
-
-    # Project Grants Funding View
-    st.subheader("Project Grants and Funding Agencies")
-    project_grants_funding = fetch_data("project_grants_funding")
-    if project_grants_funding:
-        st.table(project_grants_funding)
-    else:
-        st.write("No data found.")
-
-    # Professors Without Projects View
-    st.subheader("Professors Without Projects")
-    professors_without_projects = fetch_data("professors_without_projects")
-    if professors_without_projects:
-        st.table(professors_without_projects)
-    else:
-        st.write("No data found.")
-
-    # All Publications
-    st.subheader("All Publications")
-    publications = fetch_data("publications")
-    if publications:
-        st.table(publications)
-    else:
-        st.write("No publications found.")
+    # Draw each report's controls, then load the four visible pages in one batch
+    reports = [
+        ("Professor Projects", "professor_projects", ["ProfessorID", "ProfessorName", "ProjectID", "ProjectTitle"],
+         {"professor_id": "Professor ID", "project_id": "Project ID"}),
+        ("Project Grants and Funding Agencies", "project_grants_funding",
+         ["ProjectID", "ProjectTitle", "GrantID", "GrantAmount", "AgencyID", "FundingAgencyName"],
+         {"project_id": "Project ID", "grant_id": "Grant ID", "agency_id": "Funding agency ID",
+          "min_amount": "Minimum amount", "max_amount": "Maximum amount"}),
+        ("Professors Without Projects", "professors_without_projects", ["ProfessorID", "ProfessorName"],
+         {"name": "Name starts with"}),
+        ("All Publications", "publications", ["PublicationID", "Title", "ProjectID"],
+         {"title": "Title starts with", "project_id": "Project ID"})
+    ]
+    requests_by_report = {}
+    for title, endpoint, columns, filters in reports:
+        container = st.container()
+        with container:
+            st.subheader(title)
+            requests_by_report[endpoint] = (container, grid_request(endpoint, endpoint, columns, filters))
+    pages = fetch_many([path for _, path in requests_by_report.values()])
+    for endpoint, (container, path) in requests_by_report.items():
+        with container:
+            grid_page(endpoint, pages[path])
 
 elif menu == "Project Audit Log":
     st.header("Project Audit Log")
 
-    # Fetch and display the audit log
-    audit_log = fetch_data("project_audit_log")
-    if audit_log:
-        st.subheader("Audit Log")
-        st.table(audit_log)
-    else:
-        st.write("No entries found in the project audit log.")
+    # Filter by project and time window; the backend only reads the matching partitions
+    audit_project_id = st.number_input("Project ID (0 for all projects)", min_value=0, step=1)
+    audit_since = st.date_input("From", value=date.today() - timedelta(days=30))
+    audit_until = st.date_input("To", value=date.today())
+    audit_filters = {"since": audit_since.isoformat(), "until": (audit_until + timedelta(days=1)).isoformat()}
+    if audit_project_id:
+        audit_filters["project_id"] = audit_project_id
+
+    # Display one page of the audit log
+    data_grid("project_audit_log", "audit", ["Timestamp", "AuditID", "ProjectID", "Title", "Action"],
+              filters={"action": "Action (e.g. Deleted, Updated)"}, default_sort="-Timestamp",
+              params=audit_filters, empty_message="No entries found in the project audit log.")
@@ -7,14 +7,18 @@ CREATE TABLE Professors (
     ProfessorID INT AUTO_INCREMENT PRIMARY KEY,
     Name VARCHAR(100) NOT NULL,
     Department VARCHAR(100),
-    Email VARCHAR(100) UNIQUE NOT NULL
+    Email VARCHAR(100) UNIQUE NOT NULL, -- Also serves the PreventDuplicateProfessors lookup
+    INDEX idx_professors_name (Name), -- Sort and prefix filter by name
+    INDEX idx_professors_department (Department), -- Department filter and sort
+    FULLTEXT INDEX ft_professors (Name, Department, Email) -- /search
 );
 
 -- Funding Agencies Table
 CREATE TABLE FundingAgencies (
     AgencyID INT AUTO_INCREMENT PRIMARY KEY,
     Name VARCHAR(100) NOT NULL UNIQUE,
-    Budget DECIMAL(15, 2) NOT NULL
+    Budget DECIMAL(15, 2) NOT NULL,
+    INDEX idx_agencies_budget (Budget) -- Budget range filter and sort
 );
 
 -- Grants Table
@@ -22,6 +26,8 @@ CREATE TABLE Grants (
     GrantID INT AUTO_INCREMENT PRIMARY KEY,
     Amount DECIMAL(15, 2) NOT NULL,
     FundingAgencyID INT NOT NULL,
+    INDEX idx_grants_agency (FundingAgencyID), -- Agency filter (ordered by GrantID), agency deletes and rollups
+    INDEX idx_grants_amount (Amount), -- Amount range filter and sort
     FOREIGN KEY (FundingAgencyID) REFERENCES FundingAgencies(AgencyID) 
         ON DELETE CASCADE
 );
@@ -31,7 +37,11 @@ CREATE TABLE Projects (
     ProjectID INT AUTO_INCREMENT PRIMARY KEY,
     Title VARCHAR(200) NOT NULL,
     StartDate DATE NOT NULL,
-    EndDate DATE
+    EndDate DATE,
+    INDEX idx_projects_title (Title), -- Sort and prefix filter by title
+    INDEX idx_projects_start (StartDate), -- Start date range filter and sort
+    INDEX idx_projects_end (EndDate), -- End date range filter and sort
+    FULLTEXT INDEX ft_projects (Title) -- /search
 );
 
 -- Projects_Grants (Many-to-Many relationship between Projects and Grants)
@@ -39,6 +49,7 @@ CREATE TABLE Projects_Grants (
     ProjectID INT NOT NULL,
     GrantID INT NOT NULL,
     PRIMARY KEY (ProjectID, GrantID),
+    INDEX idx_projects_grants_grant (GrantID, ProjectID), -- Projects of a grant (rollup triggers, grant deletes)
     FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
         ON DELETE CASCADE,
     FOREIGN KEY (GrantID) REFERENCES Grants(GrantID)
@@ -50,6 +61,7 @@ CREATE TABLE Professors_Projects (
     ProfessorID INT NOT NULL,
     ProjectID INT NOT NULL,
     PRIMARY KEY (ProfessorID, ProjectID),
+    INDEX idx_professors_projects_project (ProjectID, ProfessorID), -- Professors of a project (views, triggers)
     FOREIGN KEY (ProfessorID) REFERENCES Professors(ProfessorID)
         ON DELETE CASCADE,
     FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
@@ -60,20 +72,106 @@ CREATE TABLE Professors_Projects (
 CREATE TABLE Publications (
     PublicationID INT AUTO_INCREMENT PRIMARY KEY,
     Title VARCHAR(200) NOT NULL,
-    ProjectID INT UNIQUE, -- One-to-One relationship with Projects
+    ProjectID INT UNIQUE, -- One-to-One relationship with Projects; NULL once the project is converted
+    INDEX idx_publications_title (Title), -- Sort and prefix filter by title
+    FULLTEXT INDEX ft_publications (Title), -- /search
     FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
+        ON DELETE SET NULL
+);
+
+-- Professors_Publications (Professors credited on a publication, copied from the
+-- project's professors when it is converted so the publication keeps its authors)
+CREATE TABLE Professors_Publications (
+    ProfessorID INT NOT NULL,
+    PublicationID INT NOT NULL,
+    PRIMARY KEY (ProfessorID, PublicationID),
+    INDEX idx_professors_publications_publication (PublicationID, ProfessorID), -- Professors of a publication
+    FOREIGN KEY (ProfessorID) REFERENCES Professors(ProfessorID)
+        ON DELETE CASCADE,
+    FOREIGN KEY (PublicationID) REFERENCES Publications(PublicationID)
         ON DELETE CASCADE
 );
 
 -- ProjectAudit Table for Historical Records
+-- Range-partitioned by month on Timestamp, so time-window queries only read the
+-- matching partitions and old months can be archived by archive_audit.py with a
+-- partition exchange instead of a long DELETE. Partitions are named pYYYYMM and
+-- hold that month; pmax catches anything beyond the last monthly partition and is
+-- kept empty by archive_audit.py creating partitions ahead of time.
 CREATE TABLE ProjectAudit (
-    AuditID INT AUTO_INCREMENT PRIMARY KEY,
+    AuditID INT AUTO_INCREMENT,
     ProjectID INT,
     Title VARCHAR(200),
     StartDate DATE,
     EndDate DATE,
     Action VARCHAR(50), -- e.g., 'Deleted', 'Updated'
-    Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    Timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (AuditID, Timestamp), -- Unique keys must include the partitioning column
+    INDEX idx_audit_timestamp (Timestamp), -- Audit log sorted by Timestamp DESC
+    INDEX idx_audit_project (ProjectID, Timestamp) -- Audit history of one project
+)
+PARTITION BY RANGE COLUMNS (Timestamp) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- GrantUsage Ledger: append-only record of every deduction from a grant.
+-- No foreign key to Grants, so the history outlives grants removed once fully used.
+CREATE TABLE GrantUsage (
+    UsageID INT AUTO_INCREMENT PRIMARY KEY,
+    GrantID INT NOT NULL,
+    Amount DECIMAL(15, 2) NOT NULL,
+    RemainingAmount DECIMAL(15, 2) NOT NULL,
+    IdempotencyKey VARCHAR(64) UNIQUE, -- Client-supplied key so retries are not charged twice
+    UsedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_usage_grant (GrantID, UsedAt), -- Usage history of one grant
+    INDEX idx_usage_time (UsedAt) -- Ledger sorted by UsedAt DESC
+);
+
+-- Funding Rollups: per-project, per-professor and per-agency totals kept current by
+-- the Rollup* triggers below, so funding reports read precomputed rows instead of
+-- re-joining and re-aggregating. Funding is the current balance of the linked grants.
+CREATE TABLE ProjectFunding (
+    ProjectID INT PRIMARY KEY,
+    GrantCount INT NOT NULL DEFAULT 0,
+    TotalFunding DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    INDEX idx_project_funding_total (TotalFunding),
+    FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE ProfessorFunding (
+    ProfessorID INT PRIMARY KEY,
+    ProjectCount INT NOT NULL DEFAULT 0,
+    TotalFunding DECIMAL(15, 2) NOT NULL DEFAULT 0, -- Sum of the funding of the professor's projects
+    INDEX idx_professor_funding_total (TotalFunding),
+    FOREIGN KEY (ProfessorID) REFERENCES Professors(ProfessorID)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE AgencyFunding (
+    AgencyID INT PRIMARY KEY,
+    GrantCount INT NOT NULL DEFAULT 0,
+    TotalGranted DECIMAL(15, 2) NOT NULL DEFAULT 0, -- Sum of the agency's grant balances
+    INDEX idx_agency_funding_total (TotalGranted),
+    FOREIGN KEY (AgencyID) REFERENCES FundingAgencies(AgencyID)
+        ON DELETE CASCADE
+);
+
+-- Change Log: one row per insert, update and delete of the tables clients sync
+-- (everything above except the audit, ledger and rollup tables), written by the
+-- Track* triggers and read by GET /changes?since=<version>. Versions are allocated
+-- by AUTO_INCREMENT as changes are written, so they can commit out of order; readers
+-- only go up to a watermark below the oldest uncommitted entry. Old entries can be
+-- deleted (e.g. by ChangedAt); clients whose version predates the oldest remaining
+-- entry are told to reload.
+CREATE TABLE ChangeLog (
+    Version BIGINT AUTO_INCREMENT PRIMARY KEY,
+    TableName VARCHAR(64) NOT NULL,
+    RowKey INT NOT NULL, -- The row's ID, or the first key column of an association table
+    RowKey2 INT, -- The second key column of an association table
+    Action VARCHAR(10) NOT NULL, -- 'insert', 'update' or 'delete'
+    ChangedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_changes_time (ChangedAt) -- Pruning old entries
 );
 
 -- Trigger to Log Deleted Projects
@@ -138,6 +236,473 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- Triggers to Maintain the Funding Rollups
+-- Rows deleted by ON DELETE CASCADE do not fire triggers in MySQL, so deletes of
+-- projects, grants and agencies adjust the rollups for their cascaded links up front.
+DELIMITER $$
+CREATE TRIGGER RollupProjectCreated
+AFTER INSERT ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProjectFunding (ProjectID) VALUES (NEW.ProjectID);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupProfessorCreated
+AFTER INSERT ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProfessorFunding (ProfessorID) VALUES (NEW.ProfessorID);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupAgencyCreated
+AFTER INSERT ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    INSERT INTO AgencyFunding (AgencyID) VALUES (NEW.AgencyID);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupGrantIssued
+AFTER INSERT ON Grants
+FOR EACH ROW FOLLOWS AdjustAgencyBudget
+BEGIN
+    UPDATE AgencyFunding
+    SET GrantCount = GrantCount + 1, TotalGranted = TotalGranted + NEW.Amount
+    WHERE AgencyID = NEW.FundingAgencyID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupGrantBalance
+AFTER UPDATE ON Grants
+FOR EACH ROW
+BEGIN
+    DECLARE delta DECIMAL(15, 2) DEFAULT NEW.Amount - OLD.Amount;
+
+    IF delta <> 0 THEN
+        UPDATE ProjectFunding pf
+        JOIN Projects_Grants pg ON pg.ProjectID = pf.ProjectID
+        SET pf.TotalFunding = pf.TotalFunding + delta
+        WHERE pg.GrantID = NEW.GrantID;
+
+        UPDATE ProfessorFunding pf
+        JOIN (
+            SELECT pp.ProfessorID, COUNT(*) AS Links
+            FROM Professors_Projects pp
+            JOIN Projects_Grants pg ON pg.ProjectID = pp.ProjectID
+            WHERE pg.GrantID = NEW.GrantID
+            GROUP BY pp.ProfessorID
+        ) l ON l.ProfessorID = pf.ProfessorID
+        SET pf.TotalFunding = pf.TotalFunding + delta * l.Links;
+    END IF;
+
+    IF NEW.FundingAgencyID = OLD.FundingAgencyID THEN
+        UPDATE AgencyFunding
+        SET TotalGranted = TotalGranted + delta
+        WHERE AgencyID = NEW.FundingAgencyID;
+    ELSE
+        UPDATE AgencyFunding
+        SET GrantCount = GrantCount - 1, TotalGranted = TotalGranted - OLD.Amount
+        WHERE AgencyID = OLD.FundingAgencyID;
+        UPDATE AgencyFunding
+        SET GrantCount = GrantCount + 1, TotalGranted = TotalGranted + NEW.Amount
+        WHERE AgencyID = NEW.FundingAgencyID;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupGrantRemoved
+BEFORE DELETE ON Grants
+FOR EACH ROW
+BEGIN
+    UPDATE ProjectFunding pf
+    JOIN Projects_Grants pg ON pg.ProjectID = pf.ProjectID
+    SET pf.GrantCount = pf.GrantCount - 1, pf.TotalFunding = pf.TotalFunding - OLD.Amount
+    WHERE pg.GrantID = OLD.GrantID;
+
+    UPDATE ProfessorFunding pf
+    JOIN (
+        SELECT pp.ProfessorID, COUNT(*) AS Links
+        FROM Professors_Projects pp
+        JOIN Projects_Grants pg ON pg.ProjectID = pp.ProjectID
+        WHERE pg.GrantID = OLD.GrantID
+        GROUP BY pp.ProfessorID
+    ) l ON l.ProfessorID = pf.ProfessorID
+    SET pf.TotalFunding = pf.TotalFunding - OLD.Amount * l.Links;
+
+    UPDATE AgencyFunding
+    SET GrantCount = GrantCount - 1, TotalGranted = TotalGranted - OLD.Amount
+    WHERE AgencyID = OLD.FundingAgencyID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupGrantLinked
+AFTER INSERT ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    DECLARE grant_amount DECIMAL(15, 2);
+    SELECT Amount INTO grant_amount FROM Grants WHERE GrantID = NEW.GrantID;
+
+    UPDATE ProjectFunding
+    SET GrantCount = GrantCount + 1, TotalFunding = TotalFunding + grant_amount
+    WHERE ProjectID = NEW.ProjectID;
+
+    UPDATE ProfessorFunding pf
+    JOIN Professors_Projects pp ON pp.ProfessorID = pf.ProfessorID
+    SET pf.TotalFunding = pf.TotalFunding + grant_amount
+    WHERE pp.ProjectID = NEW.ProjectID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupGrantUnlinked
+AFTER DELETE ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    DECLARE grant_amount DECIMAL(15, 2);
+    SELECT Amount INTO grant_amount FROM Grants WHERE GrantID = OLD.GrantID;
+
+    UPDATE ProjectFunding
+    SET GrantCount = GrantCount - 1, TotalFunding = TotalFunding - grant_amount
+    WHERE ProjectID = OLD.ProjectID;
+
+    UPDATE ProfessorFunding pf
+    JOIN Professors_Projects pp ON pp.ProfessorID = pf.ProfessorID
+    SET pf.TotalFunding = pf.TotalFunding - grant_amount
+    WHERE pp.ProjectID = OLD.ProjectID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupProfessorLinked
+AFTER INSERT ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    UPDATE ProfessorFunding
+    SET ProjectCount = ProjectCount + 1,
+        TotalFunding = TotalFunding + COALESCE((SELECT TotalFunding FROM ProjectFunding WHERE ProjectID = NEW.ProjectID), 0)
+    WHERE ProfessorID = NEW.ProfessorID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupProfessorUnlinked
+AFTER DELETE ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    UPDATE ProfessorFunding
+    SET ProjectCount = ProjectCount - 1,
+        TotalFunding = TotalFunding - COALESCE((SELECT TotalFunding FROM ProjectFunding WHERE ProjectID = OLD.ProjectID), 0)
+    WHERE ProfessorID = OLD.ProfessorID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupProjectRemoved
+BEFORE DELETE ON Projects
+FOR EACH ROW FOLLOWS LogProjectDeletion
+BEGIN
+    UPDATE ProfessorFunding pf
+    JOIN Professors_Projects pp ON pp.ProfessorID = pf.ProfessorID
+    JOIN ProjectFunding prf ON prf.ProjectID = pp.ProjectID
+    SET pf.ProjectCount = pf.ProjectCount - 1, pf.TotalFunding = pf.TotalFunding - prf.TotalFunding
+    WHERE pp.ProjectID = OLD.ProjectID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER RollupAgencyRemoved
+BEFORE DELETE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    UPDATE ProjectFunding pf
+    JOIN (
+        SELECT pg.ProjectID, COUNT(*) AS Links, SUM(g.Amount) AS Amount
+        FROM Projects_Grants pg
+        JOIN Grants g ON g.GrantID = pg.GrantID
+        WHERE g.FundingAgencyID = OLD.AgencyID
+        GROUP BY pg.ProjectID
+    ) x ON x.ProjectID = pf.ProjectID
+    SET pf.GrantCount = pf.GrantCount - x.Links, pf.TotalFunding = pf.TotalFunding - x.Amount;
+
+    UPDATE ProfessorFunding pf
+    JOIN (
+        SELECT pp.ProfessorID, SUM(g.Amount) AS Amount
+        FROM Professors_Projects pp
+        JOIN Projects_Grants pg ON pg.ProjectID = pp.ProjectID
+        JOIN Grants g ON g.GrantID = pg.GrantID
+        WHERE g.FundingAgencyID = OLD.AgencyID
+        GROUP BY pp.ProfessorID
+    ) x ON x.ProfessorID = pf.ProfessorID
+    SET pf.TotalFunding = pf.TotalFunding - x.Amount;
+END$$
+DELIMITER ;
+
+-- Change Log Procedure and Triggers
+-- LogChange appends one entry. Writers share no row, so logging changes does not
+-- serialize their transactions.
+DELIMITER $$
+CREATE PROCEDURE LogChange(
+    IN table_name VARCHAR(64),
+    IN row_key INT,
+    IN row_key2 INT,
+    IN change_action VARCHAR(10)
+)
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES (table_name, row_key, row_key2, change_action);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProfessorCreated
+AFTER INSERT ON Professors
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Professors', NEW.ProfessorID, NULL, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProfessorChanged
+AFTER UPDATE ON Professors
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Professors', NEW.ProfessorID, NULL, 'update');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProfessorRemoved
+AFTER DELETE ON Professors
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Professors', OLD.ProfessorID, NULL, 'delete');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackAgencyCreated
+AFTER INSERT ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    CALL LogChange('FundingAgencies', NEW.AgencyID, NULL, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackAgencyChanged
+AFTER UPDATE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    CALL LogChange('FundingAgencies', NEW.AgencyID, NULL, 'update');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackAgencyRemoved
+AFTER DELETE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    CALL LogChange('FundingAgencies', OLD.AgencyID, NULL, 'delete');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackGrantCreated
+AFTER INSERT ON Grants
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Grants', NEW.GrantID, NULL, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackGrantChanged
+AFTER UPDATE ON Grants
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Grants', NEW.GrantID, NULL, 'update');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackGrantRemoved
+AFTER DELETE ON Grants
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Grants', OLD.GrantID, NULL, 'delete');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProjectCreated
+AFTER INSERT ON Projects
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Projects', NEW.ProjectID, NULL, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProjectChanged
+AFTER UPDATE ON Projects
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Projects', NEW.ProjectID, NULL, 'update');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProjectRemoved
+AFTER DELETE ON Projects
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Projects', OLD.ProjectID, NULL, 'delete');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackPublicationCreated
+AFTER INSERT ON Publications
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Publications', NEW.PublicationID, NULL, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackPublicationChanged
+AFTER UPDATE ON Publications
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Publications', NEW.PublicationID, NULL, 'update');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackPublicationRemoved
+AFTER DELETE ON Publications
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Publications', OLD.PublicationID, NULL, 'delete');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackGrantLinkCreated
+AFTER INSERT ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Projects_Grants', NEW.ProjectID, NEW.GrantID, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackGrantLinkRemoved
+AFTER DELETE ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Projects_Grants', OLD.ProjectID, OLD.GrantID, 'delete');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProfessorLinkCreated
+AFTER INSERT ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Professors_Projects', NEW.ProfessorID, NEW.ProjectID, 'insert');
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProfessorLinkRemoved
+AFTER DELETE ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    CALL LogChange('Professors_Projects', OLD.ProfessorID, OLD.ProjectID, 'delete');
+END$$
+DELIMITER ;
+
+-- Rows deleted by ON DELETE CASCADE do not fire triggers in MySQL, so deletes of
+-- professors, projects, grants and agencies log their cascaded rows up front.
+DELIMITER $$
+CREATE TRIGGER TrackProfessorCascade
+BEFORE DELETE ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    SELECT 'Professors_Projects', ProfessorID, ProjectID, 'delete'
+    FROM Professors_Projects
+    WHERE ProfessorID = OLD.ProfessorID
+    ORDER BY ProjectID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackProjectCascade
+BEFORE DELETE ON Projects
+FOR EACH ROW
+BEGIN
+    -- The project's publication is kept with its ProjectID set to NULL
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    SELECT c.TableName, c.RowKey, c.RowKey2, c.Action
+    FROM (
+        SELECT 'Professors_Projects' AS TableName, ProfessorID AS RowKey, ProjectID AS RowKey2, 'delete' AS Action
+        FROM Professors_Projects WHERE ProjectID = OLD.ProjectID
+        UNION ALL
+        SELECT 'Projects_Grants', ProjectID, GrantID, 'delete'
+        FROM Projects_Grants WHERE ProjectID = OLD.ProjectID
+        UNION ALL
+        SELECT 'Publications', PublicationID, NULL, 'update'
+        FROM Publications WHERE ProjectID = OLD.ProjectID
+    ) c
+    ORDER BY c.TableName, c.RowKey, c.RowKey2;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackGrantCascade
+BEFORE DELETE ON Grants
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    SELECT 'Projects_Grants', ProjectID, GrantID, 'delete'
+    FROM Projects_Grants
+    WHERE GrantID = OLD.GrantID
+    ORDER BY ProjectID;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackAgencyCascade
+BEFORE DELETE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    -- Links before their grants, as if the grants had been deleted one by one
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    SELECT c.TableName, c.RowKey, c.RowKey2, 'delete'
+    FROM (
+        SELECT 1 AS Step, 'Projects_Grants' AS TableName, pg.ProjectID AS RowKey, pg.GrantID AS RowKey2
+        FROM Projects_Grants pg
+        JOIN Grants g ON g.GrantID = pg.GrantID
+        WHERE g.FundingAgencyID = OLD.AgencyID
+        UNION ALL
+        SELECT 2, 'Grants', GrantID, NULL
+        FROM Grants WHERE FundingAgencyID = OLD.AgencyID
+    ) c
+    ORDER BY c.Step, c.RowKey, c.RowKey2;
+END$$
+DELIMITER ;
+
 -- Stored Procedure to Convert Project into Publication
 DELIMITER $$
 CREATE PROCEDURE ConvertProjectToPublication(IN project_id INT, IN publication_title VARCHAR(255))
@@ -200,25 +765,27 @@ END$$
 DELIMITER ;
 
 -- View to List Professors and Their Active Projects
+-- Both key columns come from Professors_Projects, so ordering by them follows its primary key.
 CREATE VIEW ProfessorProjects AS
 SELECT 
-    p.ProfessorID, 
+    pp.ProfessorID, 
     p.Name AS ProfessorName, 
-    pr.ProjectID, 
+    pp.ProjectID, 
     pr.Title AS ProjectTitle
 FROM 
-    Professors p
+    Professors_Projects pp
 JOIN 
-    Professors_Projects pp ON p.ProfessorID = pp.ProfessorID
+    Professors p ON p.ProfessorID = pp.ProfessorID
 JOIN 
     Projects pr ON pp.ProjectID = pr.ProjectID;
 
 -- View to List Projects with Grants and Funding Agencies
+-- Both key columns come from Projects_Grants, so ordering by them follows its primary key.
 CREATE VIEW ProjectGrantsFunding AS
 SELECT 
     pg.ProjectID,
     pr.Title AS ProjectTitle,
-    g.GrantID,
+    pg.GrantID,
     g.Amount AS GrantAmount,
     fa.AgencyID,
     fa.Name AS FundingAgencyName
@@ -243,34 +810,156 @@ LEFT JOIN
 WHERE 
     pp.ProjectID IS NULL;
 
--- Deduct Grant Amount Procedure
+-- Funding Rollup Views
+CREATE VIEW ProjectFundingSummary AS
+SELECT
+    pf.ProjectID,
+    pr.Title AS ProjectTitle,
+    pf.GrantCount,
+    pf.TotalFunding
+FROM
+    ProjectFunding pf
+JOIN
+    Projects pr ON pf.ProjectID = pr.ProjectID;
+
+CREATE VIEW ProfessorFundingSummary AS
+SELECT
+    pf.ProfessorID,
+    p.Name AS ProfessorName,
+    p.Department,
+    pf.ProjectCount,
+    pf.TotalFunding
+FROM
+    ProfessorFunding pf
+JOIN
+    Professors p ON pf.ProfessorID = p.ProfessorID;
+
+CREATE VIEW AgencyFundingSummary AS
+SELECT
+    af.AgencyID,
+    fa.Name AS AgencyName,
+    fa.Budget AS RemainingBudget,
+    af.GrantCount,
+    af.TotalGranted
+FROM
+    AgencyFunding af
+JOIN
+    FundingAgencies fa ON af.AgencyID = fa.AgencyID;
+
+-- Triggers to Keep the Grant Usage Ledger Append-Only
 DELIMITER $$
-CREATE PROCEDURE DeductGrantAmount(IN grant_id INT, IN used_amount DECIMAL(15, 2))
+CREATE TRIGGER PreventGrantUsageUpdate
+BEFORE UPDATE ON GrantUsage
+FOR EACH ROW
 BEGIN
-    DECLARE current_amount DECIMAL(15, 2);
+    SIGNAL SQLSTATE '45000'
+    SET MESSAGE_TEXT = 'Grant usage records cannot be modified.';
+END$$
+DELIMITER ;
 
-    -- Get the current grant amount
-    SELECT Amount INTO current_amount
-    FROM Grants
-    WHERE GrantID = grant_id;
+DELIMITER $$
+CREATE TRIGGER PreventGrantUsageDeletion
+BEFORE DELETE ON GrantUsage
+FOR EACH ROW
+BEGIN
+    SIGNAL SQLSTATE '45000'
+    SET MESSAGE_TEXT = 'Grant usage records cannot be deleted.';
+END$$
+DELIMITER ;
 
-    -- Check if the grant exists
-    IF current_amount IS NULL THEN
+-- Deduct Grant Amount Procedure
+-- The deduction is a single conditional UPDATE, so concurrent usages of the same
+-- grant are serialized by its row lock and can never overdraw it. Every usage is
+-- recorded in GrantUsage; calling again with the same idempotency key returns the
+-- original remaining amount instead of deducting twice.
+DELIMITER $$
+CREATE PROCEDURE DeductGrantAmount(
+    IN grant_id INT,
+    IN used_amount DECIMAL(15, 2),
+    IN idempotency_key VARCHAR(64),
+    OUT remaining_amount DECIMAL(15, 2)
+)
+proc: BEGIN
+    DECLARE previous_usage INT DEFAULT NULL;
+    DECLARE previous_grant INT DEFAULT NULL;
+
+    IF used_amount IS NULL OR used_amount <= 0 THEN
         SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'Grant not found.';
+        SET MESSAGE_TEXT = 'Invalid used amount.';
     END IF;
 
-    -- Deduct the amount
-    SET current_amount = current_amount - used_amount;
+    -- Replay a usage that was already recorded under this key
+    IF idempotency_key IS NOT NULL THEN
+        SELECT UsageID, GrantID, RemainingAmount
+        INTO previous_usage, previous_grant, remaining_amount
+        FROM GrantUsage
+        WHERE IdempotencyKey = idempotency_key;
+
+        IF previous_usage IS NOT NULL THEN
+            IF previous_grant <> grant_id THEN
+                SIGNAL SQLSTATE '45000'
+                SET MESSAGE_TEXT = 'Idempotency key already used for a different grant.';
+            END IF;
+            LEAVE proc;
+        END IF;
+    END IF;
 
-    -- Update or delete the grant
-    IF current_amount = 0 THEN
+    -- Deduct only if enough remains
+    UPDATE Grants
+    SET Amount = Amount - used_amount
+    WHERE GrantID = grant_id AND Amount >= used_amount;
+
+    IF ROW_COUNT() = 0 THEN
+        IF EXISTS (SELECT 1 FROM Grants WHERE GrantID = grant_id) THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Amount exceeds remaining grant budget.';
+        ELSE
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Grant not found.';
+        END IF;
+    END IF;
+
+    SELECT Amount INTO remaining_amount
+    FROM Grants
+    WHERE GrantID = grant_id;
+
+    INSERT INTO GrantUsage (GrantID, Amount, RemainingAmount, IdempotencyKey)
+    VALUES (grant_id, used_amount, remaining_amount, idempotency_key);
+
+    -- Delete the grant once it is fully used
+    IF remaining_amount = 0 THEN
         DELETE FROM Grants WHERE GrantID = grant_id;
-    ELSEIF current_amount < 0 THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = "Amount exceeds remaining grant budget."
-    ELSE
-        UPDATE Grants SET Amount = current_amount WHERE GrantID = grant_id;
     END IF;
 END$$
-DELIMITER ;
\ No newline at end of file
+DELIMITER ;
+
+-- Stored Procedure to Rebuild the Funding Rollups from the Base Tables
+-- Run once after loading existing data, or to repair the rollups.
+DELIMITER $$
+CREATE PROCEDURE RebuildFundingRollups()
+BEGIN
+    DELETE FROM ProfessorFunding;
+    DELETE FROM ProjectFunding;
+    DELETE FROM AgencyFunding;
+
+    INSERT INTO ProjectFunding (ProjectID, GrantCount, TotalFunding)
+    SELECT pr.ProjectID, COUNT(g.GrantID), COALESCE(SUM(g.Amount), 0)
+    FROM Projects pr
+    LEFT JOIN Projects_Grants pg ON pg.ProjectID = pr.ProjectID
+    LEFT JOIN Grants g ON g.GrantID = pg.GrantID
+    GROUP BY pr.ProjectID;
+
+    INSERT INTO ProfessorFunding (ProfessorID, ProjectCount, TotalFunding)
+    SELECT p.ProfessorID, COUNT(pp.ProjectID), COALESCE(SUM(pf.TotalFunding), 0)
+    FROM Professors p
+    LEFT JOIN Professors_Projects pp ON pp.ProfessorID = p.ProfessorID
+    LEFT JOIN ProjectFunding pf ON pf.ProjectID = pp.ProjectID
+    GROUP BY p.ProfessorID;
+
+    INSERT INTO AgencyFunding (AgencyID, GrantCount, TotalGranted)
+    SELECT fa.AgencyID, COUNT(g.GrantID), COALESCE(SUM(g.Amount), 0)
+    FROM FundingAgencies fa
+    LEFT JOIN Grants g ON g.FundingAgencyID = fa.AgencyID
+    GROUP BY fa.AgencyID;
+END$$
+DELIMITER ;
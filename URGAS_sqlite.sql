@@ -0,0 +1,670 @@
+-- URGAS schema for the embedded SQLite engine (DB_ENGINE=sqlite).
+-- Mirrors URGAS_setup.sql: same tables, indexes, views and trigger behaviour. The
+-- stored procedures are implemented in Python by SQLiteRepository in repository.py.
+-- Differences from MySQL:
+--   * SQLite has no IF/ELSE in triggers, so conditional branches become WHEN
+--     clauses or conditions in the WHERE clause, and SIGNAL becomes RAISE(ABORT).
+--   * Triggers cannot change NEW, so DefaultFundingAgency fills in the agency with
+--     an UPDATE after the insert and FundingAgencyID is nullable until then.
+--   * Cascaded deletes fire triggers in SQLite, but only after the parent row is
+--     gone. The parent BEFORE DELETE triggers therefore delete the child links
+--     first, so the link triggers still see the parent and maintain the rollups.
+--   * ProjectAudit is not partitioned.
+
+-- Professors Table
+CREATE TABLE Professors (
+    ProfessorID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Name VARCHAR(100) NOT NULL,
+    Department VARCHAR(100),
+    Email VARCHAR(100) UNIQUE NOT NULL
+);
+CREATE INDEX idx_professors_name ON Professors (Name);
+CREATE INDEX idx_professors_department ON Professors (Department);
+
+-- Funding Agencies Table
+CREATE TABLE FundingAgencies (
+    AgencyID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Name VARCHAR(100) NOT NULL UNIQUE,
+    Budget DECIMAL(15, 2) NOT NULL
+);
+CREATE INDEX idx_agencies_budget ON FundingAgencies (Budget);
+
+-- Grants Table
+CREATE TABLE Grants (
+    GrantID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Amount DECIMAL(15, 2) NOT NULL,
+    FundingAgencyID INT, -- Set by DefaultFundingAgency when not given
+    FOREIGN KEY (FundingAgencyID) REFERENCES FundingAgencies(AgencyID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_grants_agency ON Grants (FundingAgencyID);
+CREATE INDEX idx_grants_amount ON Grants (Amount);
+
+-- Projects Table
+CREATE TABLE Projects (
+    ProjectID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Title VARCHAR(200) NOT NULL,
+    StartDate DATE NOT NULL,
+    EndDate DATE
+);
+CREATE INDEX idx_projects_title ON Projects (Title);
+CREATE INDEX idx_projects_start ON Projects (StartDate);
+CREATE INDEX idx_projects_end ON Projects (EndDate);
+
+-- Projects_Grants (Many-to-Many relationship between Projects and Grants)
+CREATE TABLE Projects_Grants (
+    ProjectID INT NOT NULL,
+    GrantID INT NOT NULL,
+    PRIMARY KEY (ProjectID, GrantID),
+    FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
+        ON DELETE CASCADE,
+    FOREIGN KEY (GrantID) REFERENCES Grants(GrantID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_projects_grants_grant ON Projects_Grants (GrantID, ProjectID);
+
+-- Professors_Projects (Many-to-Many relationship between Professors and Projects)
+CREATE TABLE Professors_Projects (
+    ProfessorID INT NOT NULL,
+    ProjectID INT NOT NULL,
+    PRIMARY KEY (ProfessorID, ProjectID),
+    FOREIGN KEY (ProfessorID) REFERENCES Professors(ProfessorID)
+        ON DELETE CASCADE,
+    FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_professors_projects_project ON Professors_Projects (ProjectID, ProfessorID);
+
+-- Publications Table
+CREATE TABLE Publications (
+    PublicationID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Title VARCHAR(200) NOT NULL,
+    ProjectID INT UNIQUE, -- One-to-One relationship with Projects; NULL once the project is converted
+    FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
+        ON DELETE SET NULL
+);
+CREATE INDEX idx_publications_title ON Publications (Title);
+
+-- Professors_Publications (Professors credited on a publication, copied from the
+-- project's professors when it is converted so the publication keeps its authors)
+CREATE TABLE Professors_Publications (
+    ProfessorID INT NOT NULL,
+    PublicationID INT NOT NULL,
+    PRIMARY KEY (ProfessorID, PublicationID),
+    FOREIGN KEY (ProfessorID) REFERENCES Professors(ProfessorID)
+        ON DELETE CASCADE,
+    FOREIGN KEY (PublicationID) REFERENCES Publications(PublicationID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_professors_publications_publication ON Professors_Publications (PublicationID, ProfessorID);
+
+-- ProjectAudit Table for Historical Records
+CREATE TABLE ProjectAudit (
+    AuditID INTEGER PRIMARY KEY AUTOINCREMENT,
+    ProjectID INT,
+    Title VARCHAR(200),
+    StartDate DATE,
+    EndDate DATE,
+    Action VARCHAR(50), -- e.g., 'Deleted', 'Updated'
+    Timestamp DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX idx_audit_timestamp ON ProjectAudit (Timestamp);
+CREATE INDEX idx_audit_project ON ProjectAudit (ProjectID, Timestamp);
+
+-- GrantUsage Ledger: append-only record of every deduction from a grant
+CREATE TABLE GrantUsage (
+    UsageID INTEGER PRIMARY KEY AUTOINCREMENT,
+    GrantID INT NOT NULL,
+    Amount DECIMAL(15, 2) NOT NULL,
+    RemainingAmount DECIMAL(15, 2) NOT NULL,
+    IdempotencyKey VARCHAR(64) UNIQUE,
+    UsedAt DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX idx_usage_grant ON GrantUsage (GrantID, UsedAt);
+CREATE INDEX idx_usage_time ON GrantUsage (UsedAt);
+
+-- Funding Rollups
+CREATE TABLE ProjectFunding (
+    ProjectID INT PRIMARY KEY,
+    GrantCount INT NOT NULL DEFAULT 0,
+    TotalFunding DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    FOREIGN KEY (ProjectID) REFERENCES Projects(ProjectID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_project_funding_total ON ProjectFunding (TotalFunding);
+
+CREATE TABLE ProfessorFunding (
+    ProfessorID INT PRIMARY KEY,
+    ProjectCount INT NOT NULL DEFAULT 0,
+    TotalFunding DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    FOREIGN KEY (ProfessorID) REFERENCES Professors(ProfessorID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_professor_funding_total ON ProfessorFunding (TotalFunding);
+
+CREATE TABLE AgencyFunding (
+    AgencyID INT PRIMARY KEY,
+    GrantCount INT NOT NULL DEFAULT 0,
+    TotalGranted DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    FOREIGN KEY (AgencyID) REFERENCES FundingAgencies(AgencyID)
+        ON DELETE CASCADE
+);
+CREATE INDEX idx_agency_funding_total ON AgencyFunding (TotalGranted);
+
+-- Trigger to Log Deleted Projects
+CREATE TRIGGER LogProjectDeletion
+BEFORE DELETE ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProjectAudit (ProjectID, Title, StartDate, EndDate, Action)
+    VALUES (OLD.ProjectID, OLD.Title, OLD.StartDate, OLD.EndDate, 'Deleted');
+END;
+
+-- Trigger to Log Updated Projects
+CREATE TRIGGER LogProjectUpdate
+BEFORE UPDATE ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProjectAudit (ProjectID, Title, StartDate, EndDate, Action)
+    VALUES (OLD.ProjectID, OLD.Title, OLD.StartDate, OLD.EndDate, 'Updated');
+END;
+
+-- Trigger to Assign Default Funding Agency to Grants
+CREATE TRIGGER DefaultFundingAgency
+AFTER INSERT ON Grants
+FOR EACH ROW WHEN NEW.FundingAgencyID IS NULL
+BEGIN
+    SELECT RAISE(ABORT, 'Column ''FundingAgencyID'' cannot be null')
+    WHERE NOT EXISTS (SELECT 1 FROM FundingAgencies);
+
+    UPDATE Grants
+    SET FundingAgencyID = (SELECT AgencyID FROM FundingAgencies LIMIT 1)
+    WHERE GrantID = NEW.GrantID;
+
+    UPDATE FundingAgencies
+    SET Budget = ROUND(Budget - NEW.Amount, 2)
+    WHERE AgencyID = (SELECT FundingAgencyID FROM Grants WHERE GrantID = NEW.GrantID);
+END;
+
+-- Trigger to Auto-Adjust Funding Agency Budget
+CREATE TRIGGER AdjustAgencyBudget
+AFTER INSERT ON Grants
+FOR EACH ROW
+BEGIN
+    UPDATE FundingAgencies
+    SET Budget = ROUND(Budget - NEW.Amount, 2)
+    WHERE AgencyID = NEW.FundingAgencyID;
+END;
+
+-- Trigger to Prevent Duplicate Professors by Email
+CREATE TRIGGER PreventDuplicateProfessors
+BEFORE INSERT ON Professors
+FOR EACH ROW WHEN EXISTS (SELECT 1 FROM Professors WHERE Email = NEW.Email)
+BEGIN
+    SELECT RAISE(ABORT, 'Duplicate professor email not allowed.');
+END;
+
+-- Triggers to Maintain the Funding Rollups
+CREATE TRIGGER RollupProjectCreated
+AFTER INSERT ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProjectFunding (ProjectID) VALUES (NEW.ProjectID);
+END;
+
+CREATE TRIGGER RollupProfessorCreated
+AFTER INSERT ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO ProfessorFunding (ProfessorID) VALUES (NEW.ProfessorID);
+END;
+
+CREATE TRIGGER RollupAgencyCreated
+AFTER INSERT ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    INSERT INTO AgencyFunding (AgencyID) VALUES (NEW.AgencyID);
+END;
+
+CREATE TRIGGER RollupGrantIssued
+AFTER INSERT ON Grants
+FOR EACH ROW
+BEGIN
+    UPDATE AgencyFunding
+    SET GrantCount = GrantCount + 1, TotalGranted = ROUND(TotalGranted + NEW.Amount, 2)
+    WHERE AgencyID = NEW.FundingAgencyID;
+END;
+
+CREATE TRIGGER RollupGrantBalance
+AFTER UPDATE OF Amount, FundingAgencyID ON Grants
+FOR EACH ROW
+BEGIN
+    UPDATE ProjectFunding
+    SET TotalFunding = ROUND(TotalFunding + NEW.Amount - OLD.Amount, 2)
+    WHERE NEW.Amount <> OLD.Amount
+      AND ProjectID IN (SELECT ProjectID FROM Projects_Grants WHERE GrantID = NEW.GrantID);
+
+    UPDATE ProfessorFunding
+    SET TotalFunding = ROUND(TotalFunding + (NEW.Amount - OLD.Amount) * (
+        SELECT COUNT(*)
+        FROM Professors_Projects pp
+        JOIN Projects_Grants pg ON pg.ProjectID = pp.ProjectID
+        WHERE pg.GrantID = NEW.GrantID AND pp.ProfessorID = ProfessorFunding.ProfessorID
+    ), 2)
+    WHERE NEW.Amount <> OLD.Amount
+      AND ProfessorID IN (
+        SELECT pp.ProfessorID
+        FROM Professors_Projects pp
+        JOIN Projects_Grants pg ON pg.ProjectID = pp.ProjectID
+        WHERE pg.GrantID = NEW.GrantID
+      );
+
+    UPDATE AgencyFunding
+    SET TotalGranted = ROUND(TotalGranted + NEW.Amount - OLD.Amount, 2)
+    WHERE AgencyID = NEW.FundingAgencyID AND NEW.FundingAgencyID IS OLD.FundingAgencyID;
+
+    UPDATE AgencyFunding
+    SET GrantCount = GrantCount - 1, TotalGranted = ROUND(TotalGranted - OLD.Amount, 2)
+    WHERE AgencyID = OLD.FundingAgencyID AND NEW.FundingAgencyID IS NOT OLD.FundingAgencyID;
+
+    UPDATE AgencyFunding
+    SET GrantCount = GrantCount + 1, TotalGranted = ROUND(TotalGranted + NEW.Amount, 2)
+    WHERE AgencyID = NEW.FundingAgencyID AND NEW.FundingAgencyID IS NOT OLD.FundingAgencyID;
+END;
+
+CREATE TRIGGER RollupGrantRemoved
+BEFORE DELETE ON Grants
+FOR EACH ROW
+BEGIN
+    -- Unlink first so RollupGrantUnlinked adjusts the project and professor totals
+    DELETE FROM Projects_Grants WHERE GrantID = OLD.GrantID;
+
+    UPDATE AgencyFunding
+    SET GrantCount = GrantCount - 1, TotalGranted = ROUND(TotalGranted - OLD.Amount, 2)
+    WHERE AgencyID = OLD.FundingAgencyID;
+END;
+
+CREATE TRIGGER RollupGrantLinked
+AFTER INSERT ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    UPDATE ProjectFunding
+    SET GrantCount = GrantCount + 1,
+        TotalFunding = ROUND(TotalFunding + (SELECT Amount FROM Grants WHERE GrantID = NEW.GrantID), 2)
+    WHERE ProjectID = NEW.ProjectID;
+
+    UPDATE ProfessorFunding
+    SET TotalFunding = ROUND(TotalFunding + (SELECT Amount FROM Grants WHERE GrantID = NEW.GrantID), 2)
+    WHERE ProfessorID IN (SELECT ProfessorID FROM Professors_Projects WHERE ProjectID = NEW.ProjectID);
+END;
+
+CREATE TRIGGER RollupGrantUnlinked
+AFTER DELETE ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    UPDATE ProjectFunding
+    SET GrantCount = GrantCount - 1,
+        TotalFunding = ROUND(TotalFunding - COALESCE((SELECT Amount FROM Grants WHERE GrantID = OLD.GrantID), 0), 2)
+    WHERE ProjectID = OLD.ProjectID;
+
+    UPDATE ProfessorFunding
+    SET TotalFunding = ROUND(TotalFunding - COALESCE((SELECT Amount FROM Grants WHERE GrantID = OLD.GrantID), 0), 2)
+    WHERE ProfessorID IN (SELECT ProfessorID FROM Professors_Projects WHERE ProjectID = OLD.ProjectID);
+END;
+
+CREATE TRIGGER RollupProfessorLinked
+AFTER INSERT ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    UPDATE ProfessorFunding
+    SET ProjectCount = ProjectCount + 1,
+        TotalFunding = ROUND(TotalFunding + COALESCE((SELECT TotalFunding FROM ProjectFunding WHERE ProjectID = NEW.ProjectID), 0), 2)
+    WHERE ProfessorID = NEW.ProfessorID;
+END;
+
+CREATE TRIGGER RollupProfessorUnlinked
+AFTER DELETE ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    UPDATE ProfessorFunding
+    SET ProjectCount = ProjectCount - 1,
+        TotalFunding = ROUND(TotalFunding - COALESCE((SELECT TotalFunding FROM ProjectFunding WHERE ProjectID = OLD.ProjectID), 0), 2)
+    WHERE ProfessorID = OLD.ProfessorID;
+END;
+
+CREATE TRIGGER RollupProjectRemoved
+BEFORE DELETE ON Projects
+FOR EACH ROW
+BEGIN
+    -- Unlink professors while the project's funding is still known, then its grants
+    DELETE FROM Professors_Projects WHERE ProjectID = OLD.ProjectID;
+    DELETE FROM Projects_Grants WHERE ProjectID = OLD.ProjectID;
+END;
+
+CREATE TRIGGER RollupAgencyRemoved
+BEFORE DELETE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    -- Remove the agency's grants through RollupGrantRemoved
+    DELETE FROM Grants WHERE FundingAgencyID = OLD.AgencyID;
+END;
+
+-- Triggers to Keep the Grant Usage Ledger Append-Only
+CREATE TRIGGER PreventGrantUsageUpdate
+BEFORE UPDATE ON GrantUsage
+FOR EACH ROW
+BEGIN
+    SELECT RAISE(ABORT, 'Grant usage records cannot be modified.');
+END;
+
+CREATE TRIGGER PreventGrantUsageDeletion
+BEFORE DELETE ON GrantUsage
+FOR EACH ROW
+BEGIN
+    SELECT RAISE(ABORT, 'Grant usage records cannot be deleted.');
+END;
+
+-- Search Index: the /search counterpart of the MySQL FULLTEXT indexes, kept current
+-- by triggers. Rows are keyed by ID * 4 + 1, 2 or 3 for professors, projects and
+-- publications, so each trigger finds its row by rowid.
+CREATE VIRTUAL TABLE SearchIndex USING fts5(label, detail, type UNINDEXED, item_id UNINDEXED);
+
+CREATE TRIGGER SearchProfessorCreated
+AFTER INSERT ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO SearchIndex (rowid, label, detail, type, item_id)
+    VALUES (NEW.ProfessorID * 4 + 1, NEW.Name, COALESCE(NEW.Department || ', ', '') || NEW.Email,
+            'professor', NEW.ProfessorID);
+END;
+
+CREATE TRIGGER SearchProfessorChanged
+AFTER UPDATE ON Professors
+FOR EACH ROW
+BEGIN
+    UPDATE SearchIndex
+    SET label = NEW.Name, detail = COALESCE(NEW.Department || ', ', '') || NEW.Email
+    WHERE rowid = NEW.ProfessorID * 4 + 1;
+END;
+
+CREATE TRIGGER SearchProfessorRemoved
+AFTER DELETE ON Professors
+FOR EACH ROW
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.ProfessorID * 4 + 1;
+END;
+
+CREATE TRIGGER SearchProjectCreated
+AFTER INSERT ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO SearchIndex (rowid, label, detail, type, item_id)
+    VALUES (NEW.ProjectID * 4 + 2, NEW.Title, NEW.StartDate || COALESCE(' - ' || NEW.EndDate, ''),
+            'project', NEW.ProjectID);
+END;
+
+CREATE TRIGGER SearchProjectChanged
+AFTER UPDATE ON Projects
+FOR EACH ROW
+BEGIN
+    UPDATE SearchIndex
+    SET label = NEW.Title, detail = NEW.StartDate || COALESCE(' - ' || NEW.EndDate, '')
+    WHERE rowid = NEW.ProjectID * 4 + 2;
+END;
+
+CREATE TRIGGER SearchProjectRemoved
+AFTER DELETE ON Projects
+FOR EACH ROW
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.ProjectID * 4 + 2;
+END;
+
+CREATE TRIGGER SearchPublicationCreated
+AFTER INSERT ON Publications
+FOR EACH ROW
+BEGIN
+    INSERT INTO SearchIndex (rowid, label, detail, type, item_id)
+    VALUES (NEW.PublicationID * 4 + 3, NEW.Title, NULL, 'publication', NEW.PublicationID);
+END;
+
+CREATE TRIGGER SearchPublicationChanged
+AFTER UPDATE ON Publications
+FOR EACH ROW
+BEGIN
+    UPDATE SearchIndex SET label = NEW.Title WHERE rowid = NEW.PublicationID * 4 + 3;
+END;
+
+CREATE TRIGGER SearchPublicationRemoved
+AFTER DELETE ON Publications
+FOR EACH ROW
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.PublicationID * 4 + 3;
+END;
+
+-- Change Log: one row per insert, update and delete of the tables clients sync, read
+-- by GET /changes?since=<version>. Versions are never reused, even after old entries
+-- are deleted; writers hold the database lock until they commit, so they commit in
+-- version order. Cascaded deletes fire the Track*Removed triggers, so no cascade
+-- triggers are needed.
+CREATE TABLE ChangeLog (
+    Version INTEGER PRIMARY KEY AUTOINCREMENT,
+    TableName VARCHAR(64) NOT NULL,
+    RowKey INT NOT NULL,
+    RowKey2 INT,
+    Action VARCHAR(10) NOT NULL,
+    ChangedAt DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX idx_changes_time ON ChangeLog (ChangedAt);
+
+CREATE TRIGGER TrackProfessorCreated
+AFTER INSERT ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Professors', NEW.ProfessorID, NULL, 'insert');
+END;
+
+CREATE TRIGGER TrackProfessorChanged
+AFTER UPDATE ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Professors', NEW.ProfessorID, NULL, 'update');
+END;
+
+CREATE TRIGGER TrackProfessorRemoved
+AFTER DELETE ON Professors
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Professors', OLD.ProfessorID, NULL, 'delete');
+END;
+
+CREATE TRIGGER TrackAgencyCreated
+AFTER INSERT ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('FundingAgencies', NEW.AgencyID, NULL, 'insert');
+END;
+
+CREATE TRIGGER TrackAgencyChanged
+AFTER UPDATE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('FundingAgencies', NEW.AgencyID, NULL, 'update');
+END;
+
+CREATE TRIGGER TrackAgencyRemoved
+AFTER DELETE ON FundingAgencies
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('FundingAgencies', OLD.AgencyID, NULL, 'delete');
+END;
+
+CREATE TRIGGER TrackGrantCreated
+AFTER INSERT ON Grants
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Grants', NEW.GrantID, NULL, 'insert');
+END;
+
+CREATE TRIGGER TrackGrantChanged
+AFTER UPDATE ON Grants
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Grants', NEW.GrantID, NULL, 'update');
+END;
+
+CREATE TRIGGER TrackGrantRemoved
+AFTER DELETE ON Grants
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Grants', OLD.GrantID, NULL, 'delete');
+END;
+
+CREATE TRIGGER TrackProjectCreated
+AFTER INSERT ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Projects', NEW.ProjectID, NULL, 'insert');
+END;
+
+CREATE TRIGGER TrackProjectChanged
+AFTER UPDATE ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Projects', NEW.ProjectID, NULL, 'update');
+END;
+
+CREATE TRIGGER TrackProjectRemoved
+AFTER DELETE ON Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Projects', OLD.ProjectID, NULL, 'delete');
+END;
+
+CREATE TRIGGER TrackPublicationCreated
+AFTER INSERT ON Publications
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Publications', NEW.PublicationID, NULL, 'insert');
+END;
+
+CREATE TRIGGER TrackPublicationChanged
+AFTER UPDATE ON Publications
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Publications', NEW.PublicationID, NULL, 'update');
+END;
+
+CREATE TRIGGER TrackPublicationRemoved
+AFTER DELETE ON Publications
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Publications', OLD.PublicationID, NULL, 'delete');
+END;
+
+CREATE TRIGGER TrackGrantLinkCreated
+AFTER INSERT ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Projects_Grants', NEW.ProjectID, NEW.GrantID, 'insert');
+END;
+
+CREATE TRIGGER TrackGrantLinkRemoved
+AFTER DELETE ON Projects_Grants
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Projects_Grants', OLD.ProjectID, OLD.GrantID, 'delete');
+END;
+
+CREATE TRIGGER TrackProfessorLinkCreated
+AFTER INSERT ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Professors_Projects', NEW.ProfessorID, NEW.ProjectID, 'insert');
+END;
+
+CREATE TRIGGER TrackProfessorLinkRemoved
+AFTER DELETE ON Professors_Projects
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, RowKey2, Action)
+    VALUES ('Professors_Projects', OLD.ProfessorID, OLD.ProjectID, 'delete');
+END;
+
+-- Views
+CREATE VIEW ProfessorProjects AS
+SELECT
+    pp.ProfessorID,
+    p.Name AS ProfessorName,
+    pp.ProjectID,
+    pr.Title AS ProjectTitle
+FROM Professors_Projects pp
+JOIN Professors p ON p.ProfessorID = pp.ProfessorID
+JOIN Projects pr ON pp.ProjectID = pr.ProjectID;
+
+CREATE VIEW ProjectGrantsFunding AS
+SELECT
+    pg.ProjectID,
+    pr.Title AS ProjectTitle,
+    pg.GrantID,
+    g.Amount AS GrantAmount,
+    fa.AgencyID,
+    fa.Name AS FundingAgencyName
+FROM Projects_Grants pg
+JOIN Projects pr ON pg.ProjectID = pr.ProjectID
+JOIN Grants g ON pg.GrantID = g.GrantID
+JOIN FundingAgencies fa ON g.FundingAgencyID = fa.AgencyID;
+
+CREATE VIEW ProfessorsWithoutProjects AS
+SELECT
+    p.ProfessorID,
+    p.Name AS ProfessorName
+FROM Professors p
+LEFT JOIN Professors_Projects pp ON p.ProfessorID = pp.ProfessorID
+WHERE pp.ProjectID IS NULL;
+
+CREATE VIEW ProjectFundingSummary AS
+SELECT
+    pf.ProjectID,
+    pr.Title AS ProjectTitle,
+    pf.GrantCount,
+    pf.TotalFunding
+FROM ProjectFunding pf
+JOIN Projects pr ON pf.ProjectID = pr.ProjectID;
+
+CREATE VIEW ProfessorFundingSummary AS
+SELECT
+    pf.ProfessorID,
+    p.Name AS ProfessorName,
+    p.Department,
+    pf.ProjectCount,
+    pf.TotalFunding
+FROM ProfessorFunding pf
+JOIN Professors p ON pf.ProfessorID = p.ProfessorID;
+
+CREATE VIEW AgencyFundingSummary AS
+SELECT
+    af.AgencyID,
+    fa.Name AS AgencyName,
+    fa.Budget AS RemainingBudget,
+    af.GrantCount,
+    af.TotalGranted
+FROM AgencyFunding af
+JOIN FundingAgencies fa ON af.AgencyID = fa.AgencyID;
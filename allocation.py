@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def to_cents(values):
+    """Convert Decimal amounts to whole cents, so caps and totals are compared exactly."""
+    return np.array([int(round(value * 100)) for value in values], dtype=np.int64)
+
+
+def plan_allocation(grant_amounts, grant_agencies, agency_caps, project_funding, project_grant_counts,
+                    max_grants_per_project):
+    """Propose which open project each unassigned grant should fund.
+
+    Amounts are in cents. ``grant_agencies`` holds the index of each grant's
+    agency in ``agency_caps``, which says how much each agency may allocate
+    in this plan. A project can hold at most ``max_grants_per_project``
+    grants, counting the ones it already has.
+
+    The plan evens out funding: grants are handed out in rounds, and each
+    round pairs the largest remaining grants with the least funded projects
+    that still have room, one grant per project. Every step of a round is a
+    vectorized operation over all grants or projects, and there are at most
+    ``max_grants_per_project`` rounds, so thousands of grants and projects
+    are planned in milliseconds.
+
+    Returns ``(assigned, reasons)``: for each grant the index of the chosen
+    project, or -1 with ``reasons`` saying why it was left unassigned
+    ('agency_cap' or 'no_capacity').
+    """
+    grant_amounts = np.asarray(grant_amounts, dtype=np.int64)
+    grant_agencies = np.asarray(grant_agencies, dtype=np.int64)
+    cap_left = np.maximum(np.asarray(agency_caps, dtype=np.int64), 0)
+    funding = np.array(project_funding, dtype=np.int64)
+    capacity = np.maximum(max_grants_per_project - np.asarray(project_grant_counts, dtype=np.int64), 0)
+
+    assigned = np.full(len(grant_amounts), -1, dtype=np.int64)
+    # Largest grants first; ties keep input order
+    pending = np.argsort(-grant_amounts, kind='stable')
+    pending = pending[grant_amounts[pending] <= cap_left[grant_agencies[pending]]]
+
+    while len(pending):
+        open_projects = np.flatnonzero(capacity > 0)
+        if not len(open_projects):
+            break
+
+        # Running total of each agency's pending grants, largest first; a grant
+        # is affordable this round if its agency's total up to it fits the cap
+        agency = grant_agencies[pending]
+        by_agency = np.argsort(agency, kind='stable')
+        amounts = grant_amounts[pending][by_agency]
+        totals = np.cumsum(amounts)
+        group_start = np.flatnonzero(np.r_[True, np.diff(agency[by_agency]) != 0])
+        group_sizes = np.diff(np.r_[group_start, len(amounts)])
+        spent = totals - np.repeat(totals[group_start] - amounts[group_start], group_sizes)
+        affordable = np.empty(len(pending), dtype=bool)
+        affordable[by_agency] = spent <= cap_left[agency[by_agency]]
+
+        candidates = pending[affordable][:len(open_projects)]
+        targets = open_projects[np.argsort(funding[open_projects], kind='stable')][:len(candidates)]
+
+        assigned[candidates] = targets
+        funding[targets] += grant_amounts[candidates]
+        capacity[targets] -= 1
+        cap_left -= np.bincount(grant_agencies[candidates], weights=grant_amounts[candidates],
+                                minlength=len(cap_left)).astype(np.int64)
+
+        # Drop the grants handed out and those their agency can no longer afford
+        pending = pending[assigned[pending] < 0]
+        pending = pending[grant_amounts[pending] <= cap_left[grant_agencies[pending]]]
+
+    reasons = np.full(len(grant_amounts), None, dtype=object)
+    left = np.flatnonzero(assigned < 0)
+    reasons[left] = np.where(grant_amounts[left] > cap_left[grant_agencies[left]], 'agency_cap', 'no_capacity')
+    return assigned, reasons
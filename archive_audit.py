@@ -0,0 +1,225 @@
+import argparse
+import gzip
+import json
+import os
+import re
+from datetime import date
+
+from mysql.connector import Error, errorcode
+
+# Archive configuration
+ARCHIVE_CONFIG = {
+    'archive_dir': os.getenv('AUDIT_ARCHIVE_DIR', 'audit_archive'),
+    'retention_months': int(os.getenv('AUDIT_RETENTION_MONTHS', 12)),
+    'months_ahead': int(os.getenv('AUDIT_PARTITIONS_AHEAD', 3)),
+    'lock_wait_timeout': int(os.getenv('AUDIT_LOCK_WAIT_TIMEOUT', 5))
+}
+EXPORT_CHUNK_SIZE = 5000
+
+# Monthly partitions are named pYYYYMM; partitions being archived are swapped into
+# a plain table named STAGING_PREFIX + partition name until their rows are written out.
+PARTITION_NAME = re.compile(r'^p(\d{4})(\d{2})$')
+STAGING_PREFIX = 'ProjectAuditArchive_'
+
+
+def add_months(month, count):
+    """Return the first day of the month ``count`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def monthly_partitions(cursor):
+    """Return ``(name, month)`` for each monthly ProjectAudit partition, oldest first."""
+    cursor.execute("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ProjectAudit'
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name or '')
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return partitions
+
+
+def ensure_partitions(connection, months_ahead, today=None):
+    """Split pmax into monthly partitions up to ``months_ahead`` months from now.
+
+    Run ahead of time this only splits an empty pmax, which is a quick metadata
+    change. The first run on a table with no monthly partitions starts from the
+    oldest row so existing history is spread over its own months.
+    """
+    today = today or date.today()
+    target = add_months(month_start(today), months_ahead)
+    cursor = connection.cursor()
+    try:
+        partitions = monthly_partitions(cursor)
+        if partitions:
+            start = add_months(partitions[-1][1], 1)
+        else:
+            cursor.execute("SELECT MIN(Timestamp) FROM ProjectAudit")
+            oldest = cursor.fetchone()[0]
+            start = month_start(min(oldest.date(), today) if oldest else today)
+
+        months = []
+        while start <= target:
+            months.append(start)
+            start = add_months(start, 1)
+        if not months:
+            return []
+
+        definitions = [f"PARTITION p{m:%Y%m} VALUES LESS THAN ('{add_months(m, 1):%Y-%m-%d}')" for m in months]
+        definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        cursor.execute(f"ALTER TABLE ProjectAudit REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})")
+        return [f"p{m:%Y%m}" for m in months]
+    finally:
+        cursor.close()
+
+
+def encode_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def export_table(connection, table, path):
+    """Write every row of ``table`` to a gzip-compressed NDJSON file; return the row count.
+
+    Rows are read from an unbuffered cursor in chunks and written to a temporary
+    file that only replaces ``path`` once it is complete.
+    """
+    cursor = connection.cursor()
+    count = 0
+    try:
+        cursor.execute(f"SELECT * FROM {table} ORDER BY AuditID")
+        columns = list(cursor.column_names)
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                f.write(''.join(json.dumps(dict(zip(columns, row)), default=encode_value) + '\n' for row in rows))
+                count += len(rows)
+    finally:
+        cursor.close()
+    os.replace(path + '.tmp', path)
+    return count
+
+
+def archive_staging_table(connection, staging, archive_dir):
+    """Export a staging table to the archive directory and drop it."""
+    path = os.path.join(archive_dir, f"ProjectAudit_{staging[len(STAGING_PREFIX):]}.ndjson.gz")
+    count = export_table(connection, staging, path)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        cursor.close()
+    return path, count
+
+
+def detach_partition(connection, name):
+    """Swap a partition's rows into an empty staging table and drop the partition.
+
+    EXCHANGE PARTITION and DROP PARTITION only change metadata, so the table is
+    locked for moments rather than for a row-by-row DELETE; the triggers writing
+    new audit rows only wait while a lock is held.
+    """
+    staging = STAGING_PREFIX + name
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"CREATE TABLE {staging} LIKE ProjectAudit")
+        cursor.execute(f"ALTER TABLE {staging} REMOVE PARTITIONING")
+        cursor.execute(f"ALTER TABLE ProjectAudit EXCHANGE PARTITION {name} WITH TABLE {staging}")
+        cursor.execute(f"ALTER TABLE ProjectAudit DROP PARTITION {name}")
+    finally:
+        cursor.close()
+    return staging
+
+
+def staging_tables(cursor):
+    """Return staging tables left behind by an interrupted run."""
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME LIKE %s
+        ORDER BY TABLE_NAME
+    """, (STAGING_PREFIX.replace('_', '\\_') + '%',))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def archive_audit(connection, retention_months, archive_dir, months_ahead, lock_wait_timeout=5,
+                  dry_run=False, today=None):
+    """Archive audit partitions older than the retention period and create upcoming ones.
+
+    Returns ``(archived, created)`` where ``archived`` lists ``(partition, path, rows)``.
+    """
+    today = today or date.today()
+    cutoff = add_months(month_start(today), -retention_months)
+    cursor = connection.cursor()
+    try:
+        # Give up quickly rather than queue behind a long transaction: a waiting
+        # ALTER would also hold up every trigger insert queued behind it.
+        cursor.execute("SET SESSION lock_wait_timeout = %s", (lock_wait_timeout,))
+        leftovers = staging_tables(cursor)
+        expired = [name for name, month in monthly_partitions(cursor) if add_months(month, 1) <= cutoff]
+    finally:
+        cursor.close()
+
+    if dry_run:
+        return [(name, None, None) for name in expired], []
+
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = []
+    for staging in leftovers:
+        path, count = archive_staging_table(connection, staging, archive_dir)
+        archived.append((staging[len(STAGING_PREFIX):], path, count))
+    for name in expired:
+        staging = detach_partition(connection, name)
+        path, count = archive_staging_table(connection, staging, archive_dir)
+        archived.append((name, path, count))
+    created = ensure_partitions(connection, months_ahead, today)
+    return archived, created
+
+
+if __name__ == '__main__':
+    from backend import DB_ENGINE, connect_to_database, repository
+
+    parser = argparse.ArgumentParser(
+        description="Move ProjectAudit partitions past retention to compressed files and add upcoming partitions.")
+    parser.add_argument('--archive-dir', default=ARCHIVE_CONFIG['archive_dir'],
+                        help=f"directory for archived partitions (default: {ARCHIVE_CONFIG['archive_dir']})")
+    parser.add_argument('--retention-months', type=int, default=ARCHIVE_CONFIG['retention_months'],
+                        help=f"months of audit history kept online (default: {ARCHIVE_CONFIG['retention_months']})")
+    parser.add_argument('--months-ahead', type=int, default=ARCHIVE_CONFIG['months_ahead'],
+                        help=f"future monthly partitions to keep ready (default: {ARCHIVE_CONFIG['months_ahead']})")
+    parser.add_argument('--dry-run', action='store_true', help="only list the partitions that would be archived")
+    args = parser.parse_args()
+
+    # The archive exchanges MySQL partitions; the SQLite schema has none
+    if repository.engine != 'mysql':
+        print(f"archive_audit.py is MySQL only; DB_ENGINE is '{DB_ENGINE}'.")
+        raise SystemExit(2)
+
+    connection = connect_to_database()
+    try:
+        archived, created = archive_audit(connection, args.retention_months, args.archive_dir, args.months_ahead,
+                                          ARCHIVE_CONFIG['lock_wait_timeout'], dry_run=args.dry_run)
+    except Error as e:
+        if e.errno == errorcode.ER_LOCK_WAIT_TIMEOUT:
+            print("ProjectAudit is busy; nothing was lost, run the archive again later.")
+        else:
+            print(f"Error archiving audit log: {e}")
+        raise SystemExit(1)
+    finally:
+        connection.close()
+
+    for name, path, count in archived:
+        if args.dry_run:
+            print(f"{name}: would be archived")
+        else:
+            print(f"{name}: {count} rows archived to {path}")
+    for name in created:
+        print(f"{name}: partition created")
@@ -1,9 +1,36 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, has_request_context, jsonify, request, send_from_directory
 from flask_cors import CORS
-import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
 from dotenv import load_dotenv
+from werkzeug.exceptions import HTTPException
+import base64
+import binascii
+import csv
+import functools
+import io
+import json
+import logging
 import os
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs, urlencode
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from allocation import plan_allocation, to_cents
+from collaboration_graph import CollaborationGraph
+from db_pool import ConnectionPool, PoolTimeout
+from live_updates import Broadcaster, TooManySubscribers
+from metrics import (BYTES_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE, ROWS_BUCKETS,
+                     InstrumentedConnection, MetricsRegistry)
+from repository import SEARCH_SOURCES, create_repository
+from response_cache import ResponseCache
+from response_encoding import COMPRESSIBLE_MIMETYPES, FastJSONProvider, compress, negotiate_encoding
+from snapshot_export import (SNAPSHOT_CONFIG, SnapshotError, SnapshotTooOldError, export_snapshot, list_snapshots,
+                             read_manifest)
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +38,11 @@ load_dotenv()
 # Flask app initialization
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+app.json = FastJSONProvider(app)
+
+# Database engine: 'mysql', or 'sqlite' for the embedded engine stored at SQLITE_PATH
+DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'urgas.db')
 
 # Database connection configuration
 DB_CONFIG = {
@@ -20,20 +52,229 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME')
 }
 
+# Connection pool configuration
+POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', '1') != '0'
+}
+
+# List endpoint page sizes
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+
+# Response cache configuration
+CACHE_CONFIG = {
+    'max_entries': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256)),
+    'max_bytes': int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    'ttl': float(os.getenv('RESPONSE_CACHE_TTL', 60))
+}
+
+# Seconds between checks of the change log for writes made by other worker processes,
+# whose cached responses are then dropped (0 disables; serve.py enables it for several workers)
+CACHE_SYNC_SECONDS = float(os.getenv('CACHE_SYNC_SECONDS', 0))
+
+# Cached GET endpoints primed by warm_up() before a worker serves requests
+WARMUP_PATHS = [path.strip() for path in os.getenv(
+    'WARMUP_PATHS',
+    '/professors,/projects,/grants,/fundingagencies,/publications,'
+    '/professor_projects,/project_grants_funding,/professors_without_projects,/project_audit_log'
+).split(',') if path.strip()]
+
+# Tables read by each view, so writes to a base table also invalidate the views over it
+VIEW_TABLES = {
+    'ProfessorProjects': ('Professors', 'Professors_Projects', 'Projects'),
+    'ProjectGrantsFunding': ('Projects_Grants', 'Projects', 'Grants', 'FundingAgencies'),
+    'ProfessorsWithoutProjects': ('Professors', 'Professors_Projects'),
+    'ProjectFundingSummary': ('Projects', 'Projects_Grants', 'Grants'),
+    'ProfessorFundingSummary': ('Professors', 'Professors_Projects', 'Projects', 'Projects_Grants', 'Grants'),
+    'AgencyFundingSummary': ('FundingAgencies', 'Grants')
+}
+
+# Bulk ingest limits
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 500))
+BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 10000))
+
+# Bulk project conversion: projects converted per transaction, bounding how long their rows stay locked
+CONVERT_BATCH_SIZE = int(os.getenv('CONVERT_BATCH_SIZE', 100))
+
+# Streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Grant allocation planner default
+ALLOCATION_MAX_GRANTS_PER_PROJECT = int(os.getenv('ALLOCATION_MAX_GRANTS_PER_PROJECT', 3))
+
+# Collaboration graph: seconds before the in-memory graph is reloaded to pick up
+# writes made outside this process (0 disables), and the deepest neighborhood served
+COLLABORATION_GRAPH_MAX_AGE = float(os.getenv('COLLABORATION_GRAPH_MAX_AGE', 300))
+COLLABORATION_MAX_HOPS = int(os.getenv('COLLABORATION_MAX_HOPS', 4))
+
+# Change feed: most change log entries read per /changes request
+CHANGES_MAX_ROWS = int(os.getenv('CHANGES_MAX_ROWS', 5000))
+
+# Live balance updates: tables pushed to /live/balances subscribers, seconds between
+# polls of the change log, events buffered per slow client, and keep-alive interval.
+# Each open stream holds a request thread, so at most LIVE_MAX_SUBSCRIBERS are served
+# per process (0 for no limit) and the rest of the threads stay free for the API.
+LIVE_TABLES = ('Grants', 'FundingAgencies')
+LIVE_POLL_SECONDS = float(os.getenv('LIVE_POLL_SECONDS', 1))
+LIVE_QUEUE_SIZE = int(os.getenv('LIVE_QUEUE_SIZE', 100))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv('LIVE_HEARTBEAT_SECONDS', 15))
+LIVE_MAX_SUBSCRIBERS = int(os.getenv('LIVE_MAX_SUBSCRIBERS', 4))
+
+# Batch reads: most operations per /batch request, and GET endpoints that cannot be batched
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+BATCH_EXCLUDED_ENDPOINTS = ('stream_balances', 'get_metrics')
+
+# List response shapes: 'rows' (an object per row) or 'columns' (column names once, rows as arrays)
+RESPONSE_SHAPES = ('rows', 'columns')
+
+# Responses of at least COMPRESS_MIN_BYTES are compressed when the client accepts it (0 disables)
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+
+# Search results per request
+SEARCH_DEFAULT_LIMIT = int(os.getenv('SEARCH_DEFAULT_LIMIT', 10))
+SEARCH_MAX_LIMIT = int(os.getenv('SEARCH_MAX_LIMIT', 50))
+SEARCH_MAX_LENGTH = 100
+
+# Slow query log: statements taking at least SLOW_QUERY_SECONDS (0 disables) are
+# logged to SLOW_QUERY_LOG, or to stderr when no file is given
+SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_SECONDS', 0.5))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG')
+
+slow_query_log = logging.getLogger('urgas.slow_queries')
+slow_query_log.setLevel(logging.INFO)
+slow_query_log.propagate = False
+slow_query_log.addHandler(logging.FileHandler(SLOW_QUERY_LOG) if SLOW_QUERY_LOG else logging.StreamHandler())
+
+# Metrics
+metrics = MetricsRegistry()
+HTTP_REQUESTS = metrics.counter(
+    'urgas_http_requests_total', "HTTP requests handled", ('method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'urgas_http_request_duration_seconds', "Time to produce a response", ('method', 'route'))
+HTTP_RESPONSE_BYTES = metrics.histogram(
+    'urgas_http_response_bytes', "Size of non-streamed response bodies", ('route',), BYTES_BUCKETS)
+DB_CONNECT_SECONDS = metrics.histogram(
+    'urgas_db_connect_duration_seconds', "Time to open a new database connection")
+DB_CHECKOUT_SECONDS = metrics.histogram(
+    'urgas_db_checkout_duration_seconds', "Time to check a connection out of the pool")
+DB_STATEMENTS = metrics.counter(
+    'urgas_db_statements_total', "SQL statements executed", ('route', 'statement'))
+DB_STATEMENT_SECONDS = metrics.histogram(
+    'urgas_db_statement_duration_seconds', "Time spent executing statements and fetching their rows",
+    ('route', 'phase'))
+DB_ROWS_RETURNED = metrics.histogram(
+    'urgas_db_rows_returned', "Rows fetched per statement", ('route',), ROWS_BUCKETS)
+DB_SLOW_STATEMENTS = metrics.counter(
+    'urgas_db_slow_statements_total', "Statements logged to the slow query log", ('route',))
+
 # Helper Functions
+repository = create_repository(DB_ENGINE, DB_CONFIG, SQLITE_PATH)
+
 def connect_to_database():
-    """Establish a connection to the MySQL database."""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        if connection.is_connected():
-            return connection
-    except Error as e:
-        print(f"Error connecting to database: {e}")
+    """Open a new connection to the configured database."""
+    return repository.connect()
+
+def current_route():
+    """Return the URL rule of the current request, used to label metrics."""
+    if not has_request_context():
+        return '-'
+    return request.url_rule.rule if request.url_rule else '<unmatched>'
+
+def params_shape(params, many=False):
+    """Describe statement parameters by type only, so no values reach the logs."""
+    if params is None:
         return None
+    if many:
+        params = list(params)
+        return f"{len(params)} x {params_shape(params[0])}" if params else "0 rows"
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    types = [type(value).__name__ for value in params]
+    return types if len(types) <= 10 else types[:10] + [f"... {len(types)} values"]
+
+def record_statement(route, query, params, execute_seconds, fetch_seconds, rows, many):
+    """Record a finished SQL statement and log it if it was slow."""
+    words = query.split(None, 1)
+    DB_STATEMENTS.inc((route, words[0].upper() if words else '-'))
+    DB_STATEMENT_SECONDS.observe((route, 'execute'), execute_seconds)
+    DB_STATEMENT_SECONDS.observe((route, 'fetch'), fetch_seconds)
+    DB_ROWS_RETURNED.observe((route,), rows)
+    elapsed = execute_seconds + fetch_seconds
+    if SLOW_QUERY_SECONDS > 0 and elapsed >= SLOW_QUERY_SECONDS:
+        DB_SLOW_STATEMENTS.inc((route,))
+        slow_query_log.info(json.dumps({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'route': route,
+            'seconds': round(elapsed, 6),
+            'execute_seconds': round(execute_seconds, 6),
+            'fetch_seconds': round(fetch_seconds, 6),
+            'rows': rows,
+            'statement': ' '.join(query.split()),
+            'params': params_shape(params, many)
+        }))
+
+def open_pooled_connection():
+    """Open a timed connection whose cursors report to the metrics and slow query log."""
+    start = time.perf_counter()
+    connection = connect_to_database()
+    DB_CONNECT_SECONDS.observe((), time.perf_counter() - start)
+    return InstrumentedConnection(connection, record_statement, current_route)
+
+pool = ConnectionPool(open_pooled_connection, **POOL_CONFIG)
+metrics.stats_gauges('urgas_db_pool', "Connection pool statistic", pool.stats)
+
+def checkout_connection():
+    """Check a connection out of the pool, recording the wait."""
+    start = time.perf_counter()
+    try:
+        return pool.connect()
+    finally:
+        DB_CHECKOUT_SECONDS.observe((), time.perf_counter() - start)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Record the duration, status and size of every response."""
+    started = g.get('request_started')
+    if started is not None:
+        route = current_route()
+        HTTP_REQUESTS.inc((request.method, route, str(response.status_code)))
+        HTTP_REQUEST_SECONDS.observe((request.method, route), time.perf_counter() - started)
+        if not response.is_streamed:
+            HTTP_RESPONSE_BYTES.observe((route,), response.calculate_content_length() or 0)
+    return response
+
+def get_db():
+    """Return the pooled connection shared by the current request."""
+    if 'db' not in g:
+        try:
+            g.db = checkout_connection()
+        except (Error, PoolTimeout) as e:
+            print(f"Error connecting to database: {e}")
+            return None
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Return the request's connection to the pool."""
+    connection = g.pop('db', None)
+    if connection is not None:
+        pool.release(connection)
 
 def execute_query(query, params=None):
     """Execute a query with optional parameters."""
-    connection = connect_to_database()
+    connection = get_db()
     if not connection:
         return None
 
@@ -44,14 +285,32 @@ def execute_query(query, params=None):
         return cursor.lastrowid
     except Error as e:
         print(f"Error executing query: {e}")
+        connection.rollback()
+        return None
+    finally:
+        cursor.close()
+
+def run_operation(operation, *args):
+    """Run a repository operation on the request's connection and commit it."""
+    connection = get_db()
+    if not connection:
+        return None
+
+    cursor = connection.cursor()
+    try:
+        result = operation(cursor, *args)
+        connection.commit()
+        return result
+    except Error as e:
+        print(f"Error executing operation: {e}")
+        connection.rollback()
         return None
     finally:
         cursor.close()
-        connection.close()
 
 def fetch_query(query, params=None):
     """Fetch data from the database."""
-    connection = connect_to_database()
+    connection = get_db()
     if not connection:
         return None
 
@@ -64,18 +323,880 @@ def fetch_query(query, params=None):
         return None
     finally:
         cursor.close()
-        connection.close()
+
+def fetch_columns(query, params=None):
+    """Fetch a query's column names and its rows as tuples."""
+    connection = get_db()
+    if not connection:
+        return None
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        return list(cursor.column_names), rows
+    except Error as e:
+        print(f"Error fetching data: {e}")
+        return None
+    finally:
+        cursor.close()
+
+# Response Cache
+response_cache = ResponseCache(**CACHE_CONFIG)
+metrics.stats_gauges('urgas_response_cache', "Response cache statistic", response_cache.stats)
+
+# Tables written alongside a tracked table without change log entries of their own
+CHANGE_LOG_COMPANIONS = {
+    'Professors': ('Professors_Publications',),
+    'Projects': ('ProjectAudit', 'Professors_Publications'),
+    'Grants': ('GrantUsage',)
+}
+cache_sync_lock = threading.Lock()
+cache_sync = {'version': None, 'checked': 0.0}
+
+def sync_response_cache():
+    """Drop cached responses for tables other worker processes changed.
+
+    Runs at most every CACHE_SYNC_SECONDS per process, reading the tables
+    changed since the last check from the change log. When the log no
+    longer reaches back that far, or more than CHANGES_MAX_ROWS entries were
+    written since, the whole cache is dropped.
+    """
+    now = time.monotonic()
+    if now - cache_sync['checked'] < CACHE_SYNC_SECONDS or not cache_sync_lock.acquire(blocking=False):
+        return
+    try:
+        connection = get_db()
+        if not connection:
+            return
+        since = cache_sync['version']
+        latest = repository.change_watermark(connection, since, CHANGES_MAX_ROWS)
+        cursor = connection.cursor(dictionary=True)
+        try:
+            if since is not None and latest != since:
+                cursor.execute("SELECT MIN(Version) AS Oldest FROM ChangeLog;")
+                oldest = cursor.fetchone()['Oldest']
+                cursor.execute("SELECT COUNT(*) AS Entries FROM ChangeLog WHERE Version > %s AND Version <= %s;",
+                               (since, latest))
+                if oldest is None or oldest > since + 1 or cursor.fetchone()['Entries'] == CHANGES_MAX_ROWS:
+                    # Too far behind to catch up entry by entry
+                    response_cache.clear()
+                    latest = repository.change_watermark(connection)
+                else:
+                    cursor.execute("SELECT DISTINCT TableName FROM ChangeLog WHERE Version > %s AND Version <= %s;",
+                                   (since, latest))
+                    tables = [row['TableName'] for row in cursor.fetchall()]
+                    response_cache.invalidate(tables + [companion for table in tables
+                                                        for companion in CHANGE_LOG_COMPANIONS.get(table, ())])
+        finally:
+            cursor.close()
+            connection.rollback()
+        cache_sync['version'] = latest
+        cache_sync['checked'] = now
+    except Error as e:
+        print(f"Error checking the change log: {e}")
+    finally:
+        cache_sync_lock.release()
+
+def cached(*sources):
+    """Cache a GET endpoint's response until one of the tables it reads changes.
+
+    ``sources`` are table or view names; views are expanded to their base
+    tables. Responses carry an ETag, and a matching If-None-Match yields
+    304 Not Modified without a body. Streaming exports bypass the cache.
+    """
+    tables = tuple(sorted({t for source in sources for t in VIEW_TABLES.get(source, (source,))}))
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled or request.args.get('format'):
+                return view(*args, **kwargs)
+
+            if CACHE_SYNC_SECONDS > 0:
+                sync_response_cache()
+            key = request.full_path
+            entry = response_cache.get(key)
+            status = 'HIT'
+            if entry is None:
+                status = 'MISS'
+                generations = response_cache.generations(tables)
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = response_cache.put(key, response.get_data(), response.mimetype, tables, generations)
+
+            # Compressed bodies are cached with the entry, so hits are not compressed again
+            encoding = choose_encoding(len(entry.body), entry.mimetype)
+            if encoding:
+                response = Response(response_cache.encoded_body(key, entry, encoding,
+                                                                lambda body: compress(body, encoding)),
+                                    mimetype=entry.mimetype)
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                response.set_etag(entry.etag, weak=True)
+            else:
+                response = Response(entry.body, mimetype=entry.mimetype)
+                response.set_etag(entry.etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Cache'] = status
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+def invalidates(*tables):
+    """Drop cached responses for ``tables`` once a write endpoint has run.
+
+    List every table the endpoint can change, including rows touched by
+    triggers and ON DELETE CASCADE.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                return view(*args, **kwargs)
+            finally:
+                response_cache.invalidate(tables)
+        return wrapper
+    return decorator
+
+# Collaboration Graph
+collaboration_graph = CollaborationGraph(max_age=COLLABORATION_GRAPH_MAX_AGE)
+metrics.stats_gauges('urgas_collaboration_graph', "Collaboration graph statistic", collaboration_graph.stats)
+
+class GraphUnavailable(Exception):
+    """Raised when the collaboration graph cannot be read from the database."""
+
+def read_collaboration_links():
+    """Return the professor-project and project-grant-agency links the graph is built from."""
+    memberships = fetch_columns("SELECT ProfessorID, ProjectID FROM Professors_Projects;")
+    fundings = fetch_columns("""
+        SELECT pg.ProjectID, pg.GrantID, g.FundingAgencyID
+        FROM Projects_Grants pg
+        JOIN Grants g ON g.GrantID = pg.GrantID;
+    """)
+    if memberships is None or fundings is None:
+        raise GraphUnavailable("Error loading the collaboration graph.")
+    return memberships[1], fundings[1]
+
+def grant_fundings(cursor, links):
+    """Return ``(project_id, grant_id, agency_id)`` for ``(project_id, grant_id)`` links, for the graph."""
+    agencies = {}
+    grant_ids = list({grant_id for _, grant_id in links})
+    for chunk in batches(grant_ids):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"SELECT GrantID, FundingAgencyID FROM Grants WHERE GrantID IN ({placeholders})",
+                       tuple(chunk))
+        agencies.update(cursor.fetchall())
+    return [(project_id, grant_id, agencies.get(grant_id)) for project_id, grant_id in links]
+
+def committed_statement(cursor, query, params):
+    """A run_operation operation that executes one statement and reports success."""
+    cursor.execute(query, params)
+    return True
+
+# Compression
+def choose_encoding(size, mimetype):
+    """Return the content coding to compress a response with, or None to send it as is."""
+    if COMPRESS_MIN_BYTES <= 0 or size < COMPRESS_MIN_BYTES or mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None
+    return negotiate_encoding(request.accept_encodings)
+
+@app.after_request
+def compress_response(response):
+    """Compress a response the client accepts compressed (br, else gzip).
+
+    Cached responses arrive already compressed; streamed exports are sent
+    as they are read.
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    if response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(response.calculate_content_length() or 0, response.mimetype)
+    if encoding:
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        if response.get_etag()[0]:
+            response.set_etag(response.get_etag()[0], weak=True)
+    return response
+
+# Pagination, Filtering and Sorting
+def encode_cursor(sort, values):
+    """Encode the sort order and last row's sort values as an opaque cursor."""
+    payload = json.dumps({'s': sort, 'v': values}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort):
+    """Decode a cursor produced by encode_cursor for the given sort order."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload['v']
+        cursor_sort = payload['s']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor.")
+    if cursor_sort != sort or not isinstance(values, list):
+        raise ValueError("Cursor does not match the requested sort order.")
+    return values
+
+def parse_sort(sort_param, columns, key_columns, default_sort):
+    """Turn a sort parameter like '-StartDate,Title' into (column, descending) pairs.
+
+    The key columns are appended as tie-breakers so the order is total and
+    can be resumed from a cursor.
+    """
+    order = []
+    for item in (sort_param or default_sort or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith('-')
+        column = item.lstrip('+-')
+        if column not in columns:
+            raise ValueError(f"Cannot sort by '{column}'. Sortable columns: {', '.join(columns)}.")
+        if column not in [c for c, _ in order]:
+            order.append((column, descending))
+    tie_descending = order[0][1] if order else False
+    for column in key_columns:
+        if column not in [c for c, _ in order]:
+            order.append((column, tie_descending))
+    return order
+
+def keyset_condition(order, values, not_null=()):
+    """Build a WHERE clause selecting rows strictly after the given sort values.
+
+    MySQL sorts NULLs first in ascending order and last in descending order,
+    so sort columns not listed in ``not_null`` are handled as nullable.
+    """
+    if len(values) != len(order):
+        raise ValueError("Cursor does not match the requested sort order.")
+    alternatives = []
+    params = []
+    for i, (column, descending) in enumerate(order):
+        terms = []
+        term_params = []
+        for (prev_column, _), prev_value in zip(order[:i], values[:i]):
+            if prev_value is None:
+                terms.append(f"{prev_column} IS NULL")
+            else:
+                terms.append(f"{prev_column} = %s")
+                term_params.append(prev_value)
+        value = values[i]
+        if value is None:
+            if descending:
+                continue  # Nothing sorts after NULL in descending order
+            terms.append(f"{column} IS NOT NULL")
+        elif descending and column in not_null:
+            terms.append(f"{column} < %s")
+            term_params.append(value)
+        elif descending:
+            terms.append(f"({column} < %s OR {column} IS NULL)")
+            term_params.append(value)
+        else:
+            terms.append(f"{column} > %s")
+            term_params.append(value)
+        alternatives.append("(" + " AND ".join(terms) + ")")
+        params.extend(term_params)
+    if not alternatives:
+        return "1 = 0", []
+    return "(" + " OR ".join(alternatives) + ")", params
+
+def filter_conditions(filters, args):
+    """Build WHERE clauses for the whitelisted filters present in the request args."""
+    conditions = []
+    params = []
+    for name, (column, operator) in (filters or {}).items():
+        value = args.get(name)
+        if value is None or value == '':
+            continue
+        if operator == 'prefix':
+            escaped = value.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+            conditions.append(f"{column} LIKE %s ESCAPE '!'")
+            params.append(escaped + '%')
+        else:
+            conditions.append(f"{column} {operator} %s")
+            params.append(value)
+    return conditions, params
+
+def parse_limit(args):
+    """Return the requested page size, or None when the client did not ask for paging."""
+    if 'limit' not in args and 'cursor' not in args:
+        return None
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return min(limit, MAX_PAGE_SIZE)
+
+def sort_key(order):
+    """Return the canonical string form of a sort order."""
+    return ','.join(f"-{c}" if d else c for c, d in order)
+
+def build_list_query(source, key_columns, columns, filters, args, default_sort=None, paginate=True):
+    """Build a filtered, sorted and keyset-paginated SELECT for a table or view.
+
+    Returns the query, its parameters, the resolved sort order and the page
+    size (None when the full result was requested or ``paginate`` is off).
+    """
+    order = parse_sort(args.get('sort'), columns, key_columns, default_sort)
+    conditions, params = filter_conditions(filters, args)
+    limit = parse_limit(args) if paginate else None
+    if paginate and args.get('cursor'):
+        values = decode_cursor(args['cursor'], sort_key(order))
+        condition, cursor_params = keyset_condition(order, values, key_columns)
+        conditions.append(condition)
+        params.extend(cursor_params)
+
+    query = f"SELECT {', '.join(columns)} FROM {source}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY " + ", ".join(f"{c} DESC" if d else c for c, d in order)
+    if limit is not None:
+        # Fetch one extra row to learn whether another page follows.
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    return query + ";", tuple(params), order, limit
+
+def stream_query(query, params, export_format, filename):
+    """Stream a query's rows as NDJSON or CSV from an unbuffered cursor.
+
+    The export holds its own pooled connection for as long as the client is
+    reading, and rows are fetched and encoded EXPORT_CHUNK_SIZE at a time so
+    memory use does not grow with the size of the result.
+    """
+    try:
+        connection = checkout_connection()
+    except (Error, PoolTimeout) as e:
+        print(f"Error connecting to database: {e}")
+        return jsonify({"error": "Database unavailable."}), 503
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        columns = list(cursor.column_names)
+    except Error as e:
+        print(f"Error fetching data: {e}")
+        cursor.close()
+        pool.release(connection)
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        finished = False
+        try:
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                yield buffer.getvalue()
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                if export_format == 'csv':
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows(['' if v is None else v for v in row] for row in rows)
+                    yield buffer.getvalue()
+                else:
+                    yield ''.join(app.json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+            finished = True
+        finally:
+            if finished:
+                cursor.close()
+                pool.release(connection)
+            else:
+                # The client went away mid-stream; unread rows make the
+                # connection unusable, so close it rather than draining it.
+                pool.invalidate(connection)
+
+    return Response(generate(), mimetype=EXPORT_FORMATS[export_format], headers={
+        'Content-Disposition': f'attachment; filename={filename}.{export_format}',
+        'X-Accel-Buffering': 'no'
+    })
+
+def list_response(source, key_columns, columns, filters=None, default_sort=None):
+    """Respond with rows from a table or view, honouring filters, sort and paging.
+
+    Without ``limit``/``cursor`` the full (filtered, sorted) result is returned
+    as a JSON array, as before. With them the response is an object holding
+    the page in ``data`` and the ``next_cursor`` to pass back for the next
+    page (null on the last page). ``shape=columns`` names the columns once
+    and sends rows as arrays. ``format=ndjson`` or ``format=csv`` streams
+    the whole filtered result instead.
+    """
+    export_format = request.args.get('format')
+    if export_format:
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"Unsupported format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}."}), 400
+        try:
+            query, params, _, _ = build_list_query(
+                source, key_columns, columns, filters, request.args, default_sort, paginate=False)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return stream_query(query, params, export_format, source)
+
+    shape = request.args.get('shape', 'rows')
+    if shape not in RESPONSE_SHAPES:
+        return jsonify({"error": f"Unsupported shape '{shape}'. Use one of: {', '.join(RESPONSE_SHAPES)}."}), 400
+    try:
+        query, params, order, limit = build_list_query(
+            source, key_columns, columns, filters, request.args, default_sort)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if shape == 'columns':
+        return columns_response(query, params, order, limit)
+
+    data = fetch_query(query, params)
+    if limit is None:
+        return jsonify(data)
+    if data is None:
+        return jsonify({"error": "Error fetching data."}), 500
+
+    next_cursor = None
+    if len(data) > limit:
+        data = data[:limit]
+        last = data[-1]
+        next_cursor = encode_cursor(sort_key(order), [last[c] for c, _ in order])
+    return jsonify({'data': data, 'next_cursor': next_cursor, 'limit': limit})
+
+def columns_response(query, params, order, limit):
+    """Respond with ``{"columns": [...], "rows": [[...], ...]}``, naming each column once.
+
+    Rows are read from a plain (tuple) cursor, so no per-row dicts are built.
+    With paging the object also holds ``next_cursor`` and ``limit``.
+    """
+    result = fetch_columns(query, params)
+    if result is None:
+        return jsonify({"error": "Error fetching data."}), 500
+    names, rows = result
+    if limit is None:
+        return jsonify({'columns': names, 'rows': rows})
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_key(order), [last[names.index(c)] for c, _ in order])
+    return jsonify({'columns': names, 'rows': rows, 'next_cursor': next_cursor, 'limit': limit})
+
+# Columns, keys and filters for list endpoints
+PROFESSOR_COLUMNS = ('ProfessorID', 'Name', 'Department', 'Email')
+PROFESSOR_FILTERS = {
+    'name': ('Name', 'prefix'),
+    'department': ('Department', '='),
+    'email': ('Email', '=')
+}
+PROJECT_COLUMNS = ('ProjectID', 'Title', 'StartDate', 'EndDate')
+PROJECT_FILTERS = {
+    'title': ('Title', 'prefix'),
+    'start_from': ('StartDate', '>='),
+    'start_to': ('StartDate', '<='),
+    'end_from': ('EndDate', '>='),
+    'end_to': ('EndDate', '<=')
+}
+GRANT_COLUMNS = ('GrantID', 'Amount', 'FundingAgencyID')
+GRANT_FILTERS = {
+    'agency_id': ('FundingAgencyID', '='),
+    'min_amount': ('Amount', '>='),
+    'max_amount': ('Amount', '<=')
+}
+AGENCY_COLUMNS = ('AgencyID', 'Name', 'Budget')
+AGENCY_FILTERS = {
+    'name': ('Name', 'prefix'),
+    'min_budget': ('Budget', '>='),
+    'max_budget': ('Budget', '<=')
+}
+PUBLICATION_COLUMNS = ('PublicationID', 'Title', 'ProjectID')
+PUBLICATION_FILTERS = {
+    'title': ('Title', 'prefix'),
+    'project_id': ('ProjectID', '=')
+}
+PROFESSOR_PROJECT_COLUMNS = ('ProfessorID', 'ProfessorName', 'ProjectID', 'ProjectTitle')
+PROFESSOR_PROJECT_FILTERS = {
+    'professor_id': ('ProfessorID', '='),
+    'project_id': ('ProjectID', '=')
+}
+PROJECT_GRANT_COLUMNS = ('ProjectID', 'ProjectTitle', 'GrantID', 'GrantAmount', 'AgencyID', 'FundingAgencyName')
+PROJECT_GRANT_FILTERS = {
+    'project_id': ('ProjectID', '='),
+    'grant_id': ('GrantID', '='),
+    'agency_id': ('AgencyID', '='),
+    'min_amount': ('GrantAmount', '>='),
+    'max_amount': ('GrantAmount', '<=')
+}
+PROFESSOR_WITHOUT_PROJECT_COLUMNS = ('ProfessorID', 'ProfessorName')
+PROFESSOR_WITHOUT_PROJECT_FILTERS = {
+    'name': ('ProfessorName', 'prefix')
+}
+PROJECT_FUNDING_COLUMNS = ('ProjectID', 'ProjectTitle', 'GrantCount', 'TotalFunding')
+PROJECT_FUNDING_FILTERS = {
+    'project_id': ('ProjectID', '='),
+    'min_funding': ('TotalFunding', '>='),
+    'max_funding': ('TotalFunding', '<=')
+}
+PROFESSOR_FUNDING_COLUMNS = ('ProfessorID', 'ProfessorName', 'Department', 'ProjectCount', 'TotalFunding')
+PROFESSOR_FUNDING_FILTERS = {
+    'professor_id': ('ProfessorID', '='),
+    'department': ('Department', '='),
+    'min_funding': ('TotalFunding', '>='),
+    'max_funding': ('TotalFunding', '<=')
+}
+AGENCY_FUNDING_COLUMNS = ('AgencyID', 'AgencyName', 'RemainingBudget', 'GrantCount', 'TotalGranted')
+AGENCY_FUNDING_FILTERS = {
+    'agency_id': ('AgencyID', '='),
+    'min_granted': ('TotalGranted', '>='),
+    'max_granted': ('TotalGranted', '<=')
+}
+GRANT_USAGE_COLUMNS = ('UsageID', 'GrantID', 'Amount', 'RemainingAmount', 'IdempotencyKey', 'UsedAt')
+GRANT_USAGE_FILTERS = {
+    'grant_id': ('GrantID', '='),
+    'since': ('UsedAt', '>='),
+    'until': ('UsedAt', '<=')
+}
+AUDIT_COLUMNS = ('AuditID', 'ProjectID', 'Title', 'StartDate', 'EndDate', 'Action', 'Timestamp')
+AUDIT_FILTERS = {
+    'project_id': ('ProjectID', '='),
+    'action': ('Action', '='),
+    'since': ('Timestamp', '>='),
+    'until': ('Timestamp', '<=')
+}
+
+# Tables in the change log: key columns and the columns sent for inserted and updated rows
+CHANGE_TABLES = {
+    'Professors': (('ProfessorID',), PROFESSOR_COLUMNS),
+    'FundingAgencies': (('AgencyID',), AGENCY_COLUMNS),
+    'Grants': (('GrantID',), GRANT_COLUMNS),
+    'Projects': (('ProjectID',), PROJECT_COLUMNS),
+    'Publications': (('PublicationID',), PUBLICATION_COLUMNS),
+    'Projects_Grants': (('ProjectID', 'GrantID'), ('ProjectID', 'GrantID')),
+    'Professors_Projects': (('ProfessorID', 'ProjectID'), ('ProfessorID', 'ProjectID'))
+}
+
+# Grant Usage Helpers
+# Errors signalled by DeductGrantAmount and the HTTP status each maps to
+GRANT_USAGE_ERRORS = {
+    'Invalid used amount.': 400,
+    'Grant not found.': 404,
+    'Amount exceeds remaining grant budget.': 409,
+    'Idempotency key already used for a different grant.': 409
+}
+
+class GrantUsageError(Exception):
+    """A grant usage was rejected by DeductGrantAmount."""
+
+    def __init__(self, index, message, status):
+        super().__init__(message)
+        self.index = index
+        self.status = status
+
+def apply_grant_usages(connection, usages):
+    """Apply ``(grant_id, amount, idempotency_key)`` usages in one transaction.
+
+    Grants are locked in ID order so concurrent batches cannot deadlock, and
+    usages of the same grant keep their relative order. Returns the remaining
+    amount after each usage, in input order. If any usage is rejected the
+    whole transaction is rolled back and GrantUsageError is raised.
+    """
+    order = sorted(range(len(usages)), key=lambda i: usages[i][0])
+    for attempt in range(2):
+        remaining = [None] * len(usages)
+        cursor = connection.cursor()
+        index = None
+        try:
+            for index in order:
+                grant_id, amount, idempotency_key = usages[index]
+                remaining[index] = repository.deduct_grant_amount(cursor, grant_id, amount, idempotency_key)
+            connection.commit()
+            return remaining
+        except Error as e:
+            connection.rollback()
+            if e.errno == errorcode.ER_DUP_ENTRY and attempt == 0:
+                # A concurrent retry with the same idempotency key committed
+                # first; running again replays its recorded result.
+                continue
+            status = GRANT_USAGE_ERRORS.get(e.msg)
+            if status is None:
+                raise
+            raise GrantUsageError(index, e.msg, status)
+        finally:
+            cursor.close()
+
+def parse_grant_usage(row):
+    """Validate one usage payload and return ``(amount, idempotency_key)``."""
+    try:
+        amount = require_amount(row, 'amount')
+    except ValueError:
+        raise ValueError("Invalid used amount.")
+    idempotency_key = optional_text(row, 'idempotency_key')
+    if idempotency_key and len(idempotency_key) > 64:
+        raise ValueError("idempotency_key must be at most 64 characters.")
+    return amount, idempotency_key
+
+# Bulk Ingest Helpers
+def read_bulk_rows():
+    """Read bulk rows from a JSON array or an uploaded CSV file."""
+    upload = request.files.get('file')
+    if upload is not None:
+        text = upload.read().decode('utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        text = request.get_data(as_text=True)
+    else:
+        text = None
+
+    if text is not None:
+        rows = [{k.strip(): (v.strip() or None) if isinstance(v, str) else v
+                 for k, v in row.items() if k is not None}
+                for row in csv.DictReader(io.StringIO(text))]
+    else:
+        rows = request.get_json(silent=True)
+        if isinstance(rows, dict):
+            rows = rows.get('rows')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Expected a JSON array of objects or a CSV upload.")
+
+    if not rows:
+        raise ValueError("No rows provided.")
+    if len(rows) > BULK_MAX_ROWS:
+        raise ValueError(f"At most {BULK_MAX_ROWS} rows can be ingested per request.")
+    return rows
+
+def batches(items, size=None):
+    """Yield successive slices of at most ``size`` items."""
+    size = size or BULK_BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def require_text(row, field):
+    """Return a required, non-empty string field."""
+    value = row.get(field)
+    if value is None or str(value).strip() == '':
+        raise ValueError(f"'{field}' is required.")
+    return str(value).strip()
+
+def optional_text(row, field):
+    """Return an optional string field, or None."""
+    value = row.get(field)
+    if value is None or str(value).strip() == '':
+        return None
+    return str(value).strip()
+
+def require_int(row, field, required=True):
+    """Return a positive integer field."""
+    value = row.get(field)
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"'{field}' is required.")
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{field}' must be an integer.")
+    if number < 1:
+        raise ValueError(f"'{field}' must be a positive integer.")
+    return number
+
+def require_amount(row, field):
+    """Return a positive decimal amount field."""
+    value = row.get(field)
+    if value is None or value == '':
+        raise ValueError(f"'{field}' is required.")
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"'{field}' must be a number.")
+    if not amount.is_finite() or amount <= 0:
+        raise ValueError(f"'{field}' must be greater than zero.")
+    return amount
+
+def parse_date(row, field, required=True):
+    """Return an ISO date field as a date."""
+    value = row.get(field)
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"'{field}' is required.")
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError(f"'{field}' must be a date in YYYY-MM-DD format.")
+
+def existing_values(cursor, table, column, values):
+    """Return which of ``values`` exist in ``table.column``, checked in batches."""
+    found = set()
+    values = list(set(values))
+    for chunk in batches(values):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", tuple(chunk))
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+def existing_pairs(cursor, table, columns, pairs):
+    """Return which ``(a, b)`` pairs already exist in an association table."""
+    found = set()
+    pairs = list(set(pairs))
+    for chunk in batches(pairs):
+        placeholders = ', '.join(['(%s, %s)'] * len(chunk))
+        params = tuple(value for pair in chunk for value in pair)
+        cursor.execute(
+            f"SELECT {columns[0]}, {columns[1]} FROM {table} "
+            f"WHERE ({columns[0]}, {columns[1]}) IN ({placeholders})", params)
+        found.update((row[0], row[1]) for row in cursor.fetchall())
+    return found
+
+def bulk_ingest(validate, insert_query, id_field=None, after_commit=None):
+    """Validate bulk rows and insert the valid ones in a single transaction.
+
+    ``validate(rows, cursor)`` returns a per-row error map and the list of
+    ``(index, params)`` to insert. Rows are written with batched
+    ``executemany``; on any database error the whole batch is rolled back.
+    ``after_commit(cursor, params)`` runs once the rows are committed.
+    The response lists a result for every input row, including the
+    generated ID when ``id_field`` is given.
+    """
+    try:
+        rows = read_bulk_rows()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
+
+    cursor = connection.cursor()
+    ids = []
+    try:
+        errors, valid = validate(rows, cursor)
+        for chunk in batches(valid):
+            cursor.executemany(insert_query, [params for _, params in chunk])
+            if id_field:
+                # A multi-row INSERT allocates consecutive AUTO_INCREMENT
+                # values starting at the reported LAST_INSERT_ID().
+                ids.extend(range(cursor.lastrowid, cursor.lastrowid + len(chunk)))
+        connection.commit()
+        if after_commit:
+            after_commit(cursor, [params for _, params in valid])
+    except Error as e:
+        print(f"Error executing bulk insert: {e}")
+        connection.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+
+    results = [{'index': i, 'status': 'error', 'error': errors[i]} if i in errors else None
+               for i in range(len(rows))]
+    for n, (index, _) in enumerate(valid):
+        results[index] = {'index': index, 'status': 'created'}
+        if id_field:
+            results[index][id_field] = ids[n]
+    return jsonify({'created': len(valid), 'failed': len(errors), 'results': results})
+
+def validate_professor_rows(rows, cursor):
+    """Validate professor rows, rejecting emails already used in the batch or table."""
+    errors = {}
+    candidates = []
+    seen = set()
+    for i, row in enumerate(rows):
+        try:
+            name = require_text(row, 'name')
+            email = require_text(row, 'email')
+            if email.lower() in seen:
+                raise ValueError(f"Duplicate email '{email}' in batch.")
+            seen.add(email.lower())
+            candidates.append((i, (name, optional_text(row, 'department'), email)))
+        except ValueError as e:
+            errors[i] = str(e)
+
+    taken = {email.lower() for email in existing_values(cursor, 'Professors', 'Email', [p[2] for _, p in candidates])}
+    valid = []
+    for i, params in candidates:
+        if params[2].lower() in taken:
+            errors[i] = "Duplicate professor email not allowed."
+        else:
+            valid.append((i, params))
+    return errors, valid
+
+def validate_project_rows(rows, cursor):
+    """Validate project rows."""
+    errors = {}
+    valid = []
+    for i, row in enumerate(rows):
+        try:
+            title = require_text(row, 'title')
+            start_date = parse_date(row, 'start_date')
+            end_date = parse_date(row, 'end_date', required=False)
+            if end_date and end_date < start_date:
+                raise ValueError("'end_date' must not be before 'start_date'.")
+            valid.append((i, (title, start_date, end_date)))
+        except ValueError as e:
+            errors[i] = str(e)
+    return errors, valid
+
+def validate_grant_rows(rows, cursor):
+    """Validate grant rows, checking funding agencies with one set-based query."""
+    errors = {}
+    candidates = []
+    for i, row in enumerate(rows):
+        try:
+            amount = require_amount(row, 'amount')
+            agency_id = require_int(row, 'funding_agency_id', required=False)
+            candidates.append((i, (amount, agency_id)))
+        except ValueError as e:
+            errors[i] = str(e)
+
+    agencies = existing_values(cursor, 'FundingAgencies', 'AgencyID',
+                               [p[1] for _, p in candidates if p[1] is not None])
+    valid = []
+    for i, params in candidates:
+        if params[1] is not None and params[1] not in agencies:
+            errors[i] = f"Funding agency with ID {params[1]} does not exist."
+        else:
+            valid.append((i, params))
+    return errors, valid
+
+def validate_association_rows(rows, cursor, fields, tables, table, columns, labels):
+    """Validate association rows with set-based existence and duplicate checks."""
+    errors = {}
+    candidates = []
+    seen = set()
+    for i, row in enumerate(rows):
+        try:
+            pair = (require_int(row, fields[0]), require_int(row, fields[1]))
+            if pair in seen:
+                raise ValueError("Duplicate association in batch.")
+            seen.add(pair)
+            candidates.append((i, pair))
+        except ValueError as e:
+            errors[i] = str(e)
+
+    present = [existing_values(cursor, tables[n], columns[n], [p[n] for _, p in candidates]) for n in range(2)]
+    linked = existing_pairs(cursor, table, columns, [p for _, p in candidates])
+    valid = []
+    for i, pair in candidates:
+        if pair[0] not in present[0]:
+            errors[i] = f"{labels[0]} with ID {pair[0]} does not exist."
+        elif pair[1] not in present[1]:
+            errors[i] = f"{labels[1]} with ID {pair[1]} does not exist."
+        elif pair in linked:
+            errors[i] = "Association already exists."
+        else:
+            valid.append((i, pair))
+    return errors, valid
 
 # CRUD Endpoints
 
 @app.route('/professors', methods=['GET'])
+@cached('Professors')
 def get_professors():
     """Get all professors."""
-    query = "SELECT * FROM Professors;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("Professors", ('ProfessorID',), PROFESSOR_COLUMNS, PROFESSOR_FILTERS)
 
 @app.route('/professors', methods=['POST'])
+@invalidates('Professors')
 def add_professor():
     """Add a new professor."""
     data = request.json
@@ -83,14 +1204,25 @@ def add_professor():
     professor_id = execute_query(query, (data['name'], data['department'], data['email']))
     return jsonify({'professor_id': professor_id})
 
+@app.route('/professors/bulk', methods=['POST'])
+@invalidates('Professors')
+def add_professors_bulk():
+    """Add many professors from a JSON array or CSV upload."""
+    return bulk_ingest(validate_professor_rows,
+                       "INSERT INTO Professors (Name, Department, Email) VALUES (%s, %s, %s)",
+                       id_field='professor_id')
+
 @app.route('/professors/<int:professor_id>', methods=['DELETE'])
+@invalidates('Professors', 'Professors_Projects', 'Professors_Publications')
 def delete_professor(professor_id):
     """Delete a professor by ID."""
     query = "DELETE FROM Professors WHERE ProfessorID = %s;"
-    execute_query(query, (professor_id,))
+    if run_operation(committed_statement, query, (professor_id,)):
+        collaboration_graph.remove_professor(professor_id)
     return jsonify({'message': f'Professor with ID {professor_id} deleted.'})
 
 @app.route('/professors/<int:professor_id>', methods=['PUT'])
+@invalidates('Professors')
 def update_professor(professor_id):
     """Update a professor by ID."""
     data = request.json
@@ -111,13 +1243,13 @@ def update_professor(professor_id):
     return jsonify({'message': f'Professor with ID {professor_id} updated.'})
 
 @app.route('/projects', methods=['GET'])
+@cached('Projects')
 def get_projects():
     """Get all projects."""
-    query = "SELECT * FROM Projects;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("Projects", ('ProjectID',), PROJECT_COLUMNS, PROJECT_FILTERS)
 
 @app.route('/projects', methods=['POST'])
+@invalidates('Projects')
 def add_project():
     """Add a new project."""
     data = request.json
@@ -125,7 +1257,16 @@ def add_project():
     project_id = execute_query(query, (data['title'], data['start_date'], data.get('end_date')))
     return jsonify({'project_id': project_id})
 
+@app.route('/projects/bulk', methods=['POST'])
+@invalidates('Projects')
+def add_projects_bulk():
+    """Add many projects from a JSON array or CSV upload."""
+    return bulk_ingest(validate_project_rows,
+                       "INSERT INTO Projects (Title, StartDate, EndDate) VALUES (%s, %s, %s)",
+                       id_field='project_id')
+
 @app.route('/projects/<int:project_id>', methods=['PUT'])
+@invalidates('Projects', 'ProjectAudit')
 def update_project(project_id):
     """Update a project."""
     data = request.json
@@ -146,13 +1287,13 @@ def update_project(project_id):
     return jsonify({'message': f'Project with ID {project_id} updated.'})
 
 @app.route('/grants', methods=['GET'])
+@cached('Grants')
 def get_grants():
     """Get all grants."""
-    query = "SELECT * FROM Grants;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("Grants", ('GrantID',), GRANT_COLUMNS, GRANT_FILTERS)
 
 @app.route('/grants', methods=['POST'])
+@invalidates('Grants', 'FundingAgencies')
 def add_grant():
     """Add a new grant."""
     data = request.json
@@ -160,14 +1301,22 @@ def add_grant():
     grant_id = execute_query(query, (data['amount'], data['funding_agency_id']))
     return jsonify({'grant_id': grant_id})
 
+@app.route('/grants/bulk', methods=['POST'])
+@invalidates('Grants', 'FundingAgencies')
+def add_grants_bulk():
+    """Add many grants from a JSON array or CSV upload."""
+    return bulk_ingest(validate_grant_rows,
+                       "INSERT INTO Grants (Amount, FundingAgencyID) VALUES (%s, %s)",
+                       id_field='grant_id')
+
 @app.route('/fundingagencies', methods=['GET'])
+@cached('FundingAgencies')
 def get_funding_agencies():
     """Get all funding agencies."""
-    query = "SELECT * FROM FundingAgencies;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("FundingAgencies", ('AgencyID',), AGENCY_COLUMNS, AGENCY_FILTERS)
 
 @app.route('/fundingagencies', methods=['POST'])
+@invalidates('FundingAgencies')
 def add_funding_agency():
     """Add a new funding agency."""
     data = request.json
@@ -176,71 +1325,174 @@ def add_funding_agency():
     return jsonify({'funding_agency_id': agency_id})
 
 @app.route('/fundingagencies/<int:agency_id>', methods=['DELETE'])
+@invalidates('FundingAgencies', 'Grants', 'Projects_Grants')
 def delete_funding_agency(agency_id):
     """Delete a funding agency by ID."""
     query = "DELETE FROM FundingAgencies WHERE AgencyID = %s;"
-    execute_query(query, (agency_id,))
+    if run_operation(committed_statement, query, (agency_id,)):
+        collaboration_graph.remove_agency(agency_id)
     return jsonify({'message': f'Funding Agency with ID {agency_id} deleted.'})
 
 @app.route('/professor_projects', methods=['GET'])
+@cached('ProfessorProjects')
 def get_professor_projects():
     """Get data from the ProfessorProjects view."""
-    query = "SELECT * FROM ProfessorProjects;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("ProfessorProjects", ('ProfessorID', 'ProjectID'),
+                         PROFESSOR_PROJECT_COLUMNS, PROFESSOR_PROJECT_FILTERS)
 
 @app.route('/project_grants_funding', methods=['GET'])
+@cached('ProjectGrantsFunding')
 def get_project_grants_funding():
     """Get data from the ProjectGrantsFunding view."""
-    query = "SELECT * FROM ProjectGrantsFunding;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("ProjectGrantsFunding", ('ProjectID', 'GrantID'),
+                         PROJECT_GRANT_COLUMNS, PROJECT_GRANT_FILTERS)
 
 @app.route('/professors_without_projects', methods=['GET'])
+@cached('ProfessorsWithoutProjects')
 def get_professors_without_projects():
     """Get data from the ProfessorsWithoutProjects view."""
-    query = "SELECT * FROM ProfessorsWithoutProjects;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("ProfessorsWithoutProjects", ('ProfessorID',),
+                         PROFESSOR_WITHOUT_PROJECT_COLUMNS, PROFESSOR_WITHOUT_PROJECT_FILTERS)
 
 @app.route('/publications', methods=['GET'])
+@cached('Publications')
 def get_publications():
     """Get all publications."""
-    query = "SELECT * FROM Publications;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("Publications", ('PublicationID',), PUBLICATION_COLUMNS, PUBLICATION_FILTERS)
 
 @app.route('/professor_publications/<int:professor_id>', methods=['GET'])
+@cached('Publications', 'Projects', 'Professors_Projects', 'Professors_Publications')
 def get_professor_publications(professor_id):
-    """Get publications made by a specific professor."""
+    """Get publications made by a specific professor.
+
+    Publications of converted projects are included when the conversion
+    kept the project's professors; their project fields are null.
+    """
     query = """
         SELECT pub.PublicationID, pub.Title AS PublicationTitle, pr.ProjectID, pr.Title AS ProjectTitle
         FROM Publications pub
         JOIN Projects pr ON pub.ProjectID = pr.ProjectID
         JOIN Professors_Projects pp ON pr.ProjectID = pp.ProjectID
-        WHERE pp.ProfessorID = %s;
+        WHERE pp.ProfessorID = %s
+        UNION ALL
+        SELECT pub.PublicationID, pub.Title, NULL, NULL
+        FROM Professors_Publications ppub
+        JOIN Publications pub ON pub.PublicationID = ppub.PublicationID
+        WHERE ppub.ProfessorID = %s;
     """
-    data = fetch_query(query, (professor_id,))
+    data = fetch_query(query, (professor_id, professor_id))
     return jsonify(data)
 
 @app.route('/convert_project_to_publication', methods=['POST'])
+@invalidates('Publications', 'Projects', 'ProjectAudit', 'Professors_Projects', 'Projects_Grants')
 def convert_project_to_publication():
     """Convert a project to a publication."""
     data = request.json
-    query = "CALL ConvertProjectToPublication(%s, %s);"
-    execute_query(query, (data['project_id'], data['publication_title']))
+    def convert(cursor):
+        repository.convert_project_to_publication(cursor, data['project_id'], data['publication_title'])
+        return True
+    if run_operation(convert):
+        collaboration_graph.remove_project(data['project_id'])
     return jsonify({'message': 'Project converted to publication.'})
 
+def validate_conversion_rows(rows):
+    """Validate conversion rows, returning a per-row error map and ``(index, (project_id, title))``."""
+    errors = {}
+    valid = []
+    seen = set()
+    for i, row in enumerate(rows):
+        try:
+            project_id = require_int(row, 'project_id')
+            title = require_text(row, 'publication_title')
+            if len(title) > 200:
+                raise ValueError("'publication_title' must be at most 200 characters.")
+            if project_id in seen:
+                raise ValueError("Duplicate project in batch.")
+            seen.add(project_id)
+            valid.append((i, (project_id, title)))
+        except ValueError as e:
+            errors[i] = str(e)
+    return errors, valid
+
+@app.route('/convert_projects_to_publications', methods=['POST'])
+@invalidates('Publications', 'Projects', 'ProjectAudit', 'Professors_Projects', 'Projects_Grants',
+             'Professors_Publications')
+def convert_projects_to_publications():
+    """Convert many projects to publications from a JSON array or CSV upload.
+
+    Rows carry ``project_id`` and ``publication_title``. Projects are
+    converted in ID order, CONVERT_BATCH_SIZE per transaction, so each batch
+    holds its locks only briefly and a failing batch leaves the others
+    committed. With ``preserve_links=1`` the professors of each project are
+    kept on its publication. The response lists a result for every row.
+    """
+    try:
+        rows = read_bulk_rows()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    preserve_links = request.args.get('preserve_links', '0') not in ('0', 'false', '')
+    errors, valid = validate_conversion_rows(rows)
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
+
+    index_of = {project_id: i for i, (project_id, _) in valid}
+    publications = {}
+    cursor = connection.cursor()
+    try:
+        for chunk in batches(sorted(conversion for _, conversion in valid), CONVERT_BATCH_SIZE):
+            try:
+                converted, skipped = repository.convert_projects(cursor, chunk, preserve_links)
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                print(f"Error converting projects: {e}")
+                errors.update({index_of[project_id]: str(e) for project_id, _ in chunk})
+                continue
+            publications.update(converted)
+            errors.update({index_of[project_id]: message for project_id, message in skipped.items()})
+            for project_id in converted:
+                collaboration_graph.remove_project(project_id)
+    finally:
+        cursor.close()
+
+    results = [{'index': i, 'status': 'error', 'error': errors[i]} if i in errors else None
+               for i in range(len(rows))]
+    for project_id, publication_id in publications.items():
+        index = index_of[project_id]
+        results[index] = {'index': index, 'status': 'converted', 'project_id': project_id,
+                          'publication_id': publication_id}
+    return jsonify({'converted': len(publications), 'failed': len(errors), 'results': results})
+
+def update_collaboration_graph(update, *args):
+    """Apply a committed change to the collaboration graph.
+
+    The write is already committed, so a failure here must not fail the
+    request; the graph is reloaded from the database on its next read.
+    """
+    try:
+        update(*args)
+    except Exception as e:
+        print(f"Error updating the collaboration graph: {e}")
+        collaboration_graph.mark_stale()
+
 @app.route('/assign_grant_to_project', methods=['POST'])
+@invalidates('Projects_Grants')
 def assign_grant_to_project():
     """Associate a grant with a project."""
-    data = request.json
-    project_id = data.get('project_id')
-    grant_id = data.get('grant_id')
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object with project_id and grant_id."}), 400
+    try:
+        project_id = require_int(data, 'project_id')
+        grant_id = require_int(data, 'grant_id')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Ensure both ProjectID and GrantID exist
     project_exists = fetch_query("SELECT 1 FROM Projects WHERE ProjectID = %s", (project_id,))
-    grant_exists = fetch_query("SELECT 1 FROM Grants WHERE GrantID = %s", (grant_id,))
+    grant_exists = fetch_query("SELECT FundingAgencyID FROM Grants WHERE GrantID = %s", (grant_id,))
 
     if not project_exists:
         return jsonify({"error": f"Project with ID {project_id} does not exist."}), 400
@@ -250,24 +1502,45 @@ def assign_grant_to_project():
     # Insert the association
     query = "INSERT INTO Projects_Grants (ProjectID, GrantID) VALUES (%s, %s)"
     try:
-        execute_query(query, (project_id, grant_id))
+        if run_operation(committed_statement, query, (project_id, grant_id)):
+            update_collaboration_graph(collaboration_graph.add_fundings,
+                                       [(project_id, grant_id, grant_exists[0]['FundingAgencyID'])])
         return jsonify({"message": "Grant successfully associated with project."}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/assign_grant_to_project/bulk', methods=['POST'])
+@invalidates('Projects_Grants')
+def assign_grants_to_projects_bulk():
+    """Associate many grants with projects in one transaction."""
+    def validate(rows, cursor):
+        return validate_association_rows(
+            rows, cursor, ('project_id', 'grant_id'), ('Projects', 'Grants'),
+            'Projects_Grants', ('ProjectID', 'GrantID'), ('Project', 'Grant'))
+    def add_to_graph(cursor, links):
+        update_collaboration_graph(lambda: collaboration_graph.add_fundings(grant_fundings(cursor, links)))
+    return bulk_ingest(validate, "INSERT INTO Projects_Grants (ProjectID, GrantID) VALUES (%s, %s)",
+                       after_commit=add_to_graph)
+
 @app.route('/project_audit_log', methods=['GET'])
+@cached('ProjectAudit')
 def get_project_audit_log():
     """Fetch the project audit log."""
-    query = "SELECT * FROM ProjectAudit ORDER BY Timestamp DESC;"
-    data = fetch_query(query)
-    return jsonify(data)
+    return list_response("ProjectAudit", ('AuditID',), AUDIT_COLUMNS, AUDIT_FILTERS,
+                         default_sort='-Timestamp')
 
 @app.route('/assign_professor_to_project', methods=['POST'])
+@invalidates('Professors_Projects')
 def assign_professor_to_project():
     """Associate a professor with a project."""
-    data = request.json
-    professor_id = data.get('professor_id')
-    project_id = data.get('project_id')
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object with professor_id and project_id."}), 400
+    try:
+        professor_id = require_int(data, 'professor_id')
+        project_id = require_int(data, 'project_id')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Validate that both ProfessorID and ProjectID exist
     professor_exists = fetch_query("SELECT 1 FROM Professors WHERE ProfessorID = %s", (professor_id,))
@@ -281,30 +1554,787 @@ def assign_professor_to_project():
     # Insert into Professors_Projects table
     query = "INSERT INTO Professors_Projects (ProfessorID, ProjectID) VALUES (%s, %s)"
     try:
-        execute_query(query, (professor_id, project_id))
+        if run_operation(committed_statement, query, (professor_id, project_id)):
+            update_collaboration_graph(collaboration_graph.add_memberships, [(professor_id, project_id)])
         return jsonify({"message": "Professor successfully associated with project."}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@app.route('/assign_professor_to_project/bulk', methods=['POST'])
+@invalidates('Professors_Projects')
+def assign_professors_to_projects_bulk():
+    """Associate many professors with projects in one transaction."""
+    def validate(rows, cursor):
+        return validate_association_rows(
+            rows, cursor, ('professor_id', 'project_id'), ('Professors', 'Projects'),
+            'Professors_Projects', ('ProfessorID', 'ProjectID'), ('Professor', 'Project'))
+    return bulk_ingest(validate, "INSERT INTO Professors_Projects (ProfessorID, ProjectID) VALUES (%s, %s)",
+                       after_commit=lambda cursor, links: update_collaboration_graph(
+                           collaboration_graph.add_memberships, links))
+
 @app.route('/use_grant/<int:grant_id>', methods=['PUT'])
+@invalidates('Grants', 'Projects_Grants', 'GrantUsage')
 def use_grant(grant_id):
     """Deduct the used amount from the grant."""
-    data = request.json
-    used_amount = data.get('amount')
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object with the used amount."}), 400
+    data.setdefault('idempotency_key', request.headers.get('Idempotency-Key'))
 
     # Validate input
-    if not used_amount or used_amount <= 0:
-        return jsonify({"error": "Invalid used amount."}), 400
+    try:
+        used_amount, idempotency_key = parse_grant_usage(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
 
     # Call the stored procedure
     try:
-        execute_query("CALL DeductGrantAmount(%s, %s)", (grant_id, used_amount))
-        return jsonify({"message": "Grant updated successfully or deleted if amount reached zero."}), 200
+        remaining_amount = apply_grant_usages(connection, [(grant_id, used_amount, idempotency_key)])[0]
+    except GrantUsageError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    if remaining_amount == 0:
+        collaboration_graph.remove_grants([grant_id])
+    return jsonify({
+        "message": "Grant updated successfully or deleted if amount reached zero.",
+        "grant_id": grant_id,
+        "remaining_amount": remaining_amount,
+        "grant_deleted": remaining_amount == 0
+    }), 200
+
+@app.route('/use_grants', methods=['POST'])
+@invalidates('Grants', 'Projects_Grants', 'GrantUsage')
+def use_grants():
+    """Deduct many grant usages in a single transaction."""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('usages')
+    if not isinstance(data, list) or not data or not all(isinstance(row, dict) for row in data):
+        return jsonify({"error": "Expected a non-empty JSON array of usages."}), 400
+    if len(data) > BULK_MAX_ROWS:
+        return jsonify({"error": f"At most {BULK_MAX_ROWS} usages can be applied per request."}), 400
+
+    usages = []
+    for index, row in enumerate(data):
+        try:
+            grant_id = require_int(row, 'grant_id')
+            used_amount, idempotency_key = parse_grant_usage(row)
+        except ValueError as e:
+            return jsonify({"error": str(e), "index": index}), 400
+        usages.append((grant_id, used_amount, idempotency_key))
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
+
+    try:
+        remaining = apply_grant_usages(connection, usages)
+    except GrantUsageError as e:
+        return jsonify({"error": str(e), "index": e.index, "grant_id": usages[e.index][0]}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    collaboration_graph.remove_grants([usage[0] for usage, left in zip(usages, remaining) if left == 0])
+    return jsonify({"results": [
+        {"index": index, "grant_id": usage[0], "remaining_amount": remaining[index],
+         "grant_deleted": remaining[index] == 0}
+        for index, usage in enumerate(usages)
+    ]}), 200
+
+@app.route('/grant_usage', methods=['GET'])
+@cached('GrantUsage')
+def get_grant_usage():
+    """Get the grant usage ledger."""
+    return list_response("GrantUsage", ('UsageID',), GRANT_USAGE_COLUMNS, GRANT_USAGE_FILTERS,
+                         default_sort='-UsedAt')
+
+@app.route('/rollups/projects', methods=['GET'])
+@cached('ProjectFundingSummary')
+def get_project_funding():
+    """Get precomputed funding totals per project."""
+    return list_response("ProjectFundingSummary", ('ProjectID',), PROJECT_FUNDING_COLUMNS,
+                         PROJECT_FUNDING_FILTERS, default_sort='-TotalFunding')
+
+@app.route('/rollups/professors', methods=['GET'])
+@cached('ProfessorFundingSummary')
+def get_professor_funding():
+    """Get precomputed funding totals per professor."""
+    return list_response("ProfessorFundingSummary", ('ProfessorID',), PROFESSOR_FUNDING_COLUMNS,
+                         PROFESSOR_FUNDING_FILTERS, default_sort='-TotalFunding')
+
+@app.route('/rollups/agencies', methods=['GET'])
+@cached('AgencyFundingSummary')
+def get_agency_funding():
+    """Get precomputed grant totals and remaining budget per funding agency."""
+    return list_response("AgencyFundingSummary", ('AgencyID',), AGENCY_FUNDING_COLUMNS,
+                         AGENCY_FUNDING_FILTERS, default_sort='-TotalGranted')
+
+# Grant Allocation
+def parse_allocation_constraints(data):
+    """Validate a plan request and return ``(max_grants_per_project, window_start, window_end, agency_caps)``."""
+    max_grants = require_int(data, 'max_grants_per_project', required=False) or ALLOCATION_MAX_GRANTS_PER_PROJECT
+    window_start = parse_date(data, 'window_start', required=False) or date.today()
+    window_end = parse_date(data, 'window_end', required=False) or window_start
+    if window_end < window_start:
+        raise ValueError("'window_end' must not be before 'window_start'.")
+    caps = data.get('agency_caps') or {}
+    if not isinstance(caps, dict):
+        raise ValueError("'agency_caps' must be an object mapping agency IDs to amounts.")
+    agency_caps = {}
+    for agency_id, amount in caps.items():
+        agency_caps[require_int({'agency_id': agency_id}, 'agency_id')] = require_amount({'cap': amount}, 'cap')
+    return max_grants, window_start, window_end, agency_caps
+
+def build_allocation_plan(max_grants, window_start, window_end, agency_caps):
+    """Propose links between unassigned grants and the projects active in the window.
+
+    Each agency may allocate up to its cap from ``agency_caps``; agencies
+    without one are not capped. Returns None if the data cannot be read.
+    """
+    grants = fetch_columns("""
+        SELECT g.GrantID, g.Amount, g.FundingAgencyID
+        FROM Grants g
+        WHERE NOT EXISTS (SELECT 1 FROM Projects_Grants pg WHERE pg.GrantID = g.GrantID)
+        ORDER BY g.GrantID;
+    """)
+    projects = fetch_columns("""
+        SELECT p.ProjectID, pf.GrantCount, pf.TotalFunding
+        FROM Projects p
+        JOIN ProjectFunding pf ON pf.ProjectID = p.ProjectID
+        WHERE p.StartDate <= %s AND (p.EndDate IS NULL OR p.EndDate >= %s)
+        ORDER BY p.ProjectID;
+    """, (window_end, window_start))
+    agencies = fetch_columns("SELECT AgencyID FROM FundingAgencies ORDER BY AgencyID;")
+    if grants is None or projects is None or agencies is None:
+        return None
+    grants, projects, agencies = grants[1], projects[1], agencies[1]
+
+    # Budget already excludes every issued grant, so it does not bound linking them;
+    # an agency without a cap may allocate all of its unassigned grants
+    unassigned_totals = defaultdict(Decimal)
+    for _, amount, agency_id in grants:
+        unassigned_totals[agency_id] += amount
+    agency_index = {agency_id: index for index, (agency_id,) in enumerate(agencies)}
+    caps = [agency_caps.get(agency_id, unassigned_totals[agency_id]) for agency_id, in agencies]
+    started = time.perf_counter()
+    assigned, reasons = plan_allocation(
+        to_cents([amount for _, amount, _ in grants]),
+        [agency_index[agency_id] for _, _, agency_id in grants],
+        to_cents(caps),
+        to_cents([funding for _, _, funding in projects]),
+        [count for _, count, _ in projects],
+        max_grants)
+    seconds = time.perf_counter() - started
+
+    assignments = []
+    unassigned = []
+    for (grant_id, amount, agency_id), project, reason in zip(grants, assigned.tolist(), reasons.tolist()):
+        if project >= 0:
+            assignments.append({'grant_id': grant_id, 'project_id': projects[project][0],
+                                'amount': amount, 'agency_id': agency_id})
+        else:
+            unassigned.append({'grant_id': grant_id, 'amount': amount, 'agency_id': agency_id, 'reason': reason})
+    return {
+        'constraints': {'max_grants_per_project': max_grants, 'window_start': window_start.isoformat(),
+                        'window_end': window_end.isoformat(),
+                        'agency_caps': {str(agency_id): cap for agency_id, cap in agency_caps.items()}},
+        'assignments': assignments,
+        'unassigned': unassigned,
+        'summary': {
+            'grants_considered': len(grants),
+            'projects_considered': len(projects),
+            'grants_assigned': len(assignments),
+            'amount_assigned': sum((a['amount'] for a in assignments), Decimal('0.00')),
+            'projects_funded': len({a['project_id'] for a in assignments}),
+            'plan_seconds': round(seconds, 6)
+        }
+    }
+
+@app.route('/allocations/plan', methods=['POST'])
+def plan_allocations():
+    """Dry run: propose grant-to-project links without changing anything.
+
+    Unassigned grants go to projects active between ``window_start`` and
+    ``window_end`` (default today), largest grants to the least funded
+    projects, with at most ``max_grants_per_project`` grants per project and
+    each agency allocating at most its ``agency_caps`` entry (agencies
+    without one are not capped). Send the ``assignments`` (or the accepted subset) to
+    /allocations/commit to apply them.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object of constraints."}), 400
+    try:
+        constraints = parse_allocation_constraints(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    plan = build_allocation_plan(*constraints)
+    if plan is None:
+        return jsonify({"error": "Error fetching data."}), 500
+    return jsonify(plan)
+
+@app.route('/allocations/commit', methods=['POST'])
+@invalidates('Projects_Grants')
+def commit_allocations():
+    """Apply accepted plan assignments in one transaction.
+
+    Nothing is applied if any grant has been linked to a project since the
+    plan was made (409, with the grants in ``grant_ids``) or if a grant or
+    project no longer exists (404).
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('assignments')
+    if not isinstance(data, list) or not data or not all(isinstance(row, dict) for row in data):
+        return jsonify({"error": "Expected a non-empty JSON array of assignments."}), 400
+    if len(data) > BULK_MAX_ROWS:
+        return jsonify({"error": f"At most {BULK_MAX_ROWS} assignments can be committed per request."}), 400
+
+    assignments = []
+    seen = set()
+    for index, row in enumerate(data):
+        try:
+            grant_id = require_int(row, 'grant_id')
+            project_id = require_int(row, 'project_id')
+        except ValueError as e:
+            return jsonify({"error": str(e), "index": index}), 400
+        if grant_id in seen:
+            return jsonify({"error": f"Grant {grant_id} is assigned more than once.", "index": index}), 400
+        seen.add(grant_id)
+        assignments.append((grant_id, project_id))
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
+
+    cursor = connection.cursor()
+    try:
+        missing_grants = sorted(seen - existing_values(cursor, 'Grants', 'GrantID', seen))
+        project_ids = {project_id for _, project_id in assignments}
+        missing_projects = sorted(project_ids - existing_values(cursor, 'Projects', 'ProjectID', project_ids))
+        if missing_grants or missing_projects:
+            connection.rollback()
+            return jsonify({"error": "Some grants or projects in the plan no longer exist.",
+                            "grant_ids": missing_grants, "project_ids": missing_projects}), 404
+        taken = repository.claim_grants(cursor, assignments)
+        if taken:
+            connection.rollback()
+            return jsonify({"error": "Some grants were assigned to a project after the plan was made.",
+                            "grant_ids": taken}), 409
+        fundings = grant_fundings(cursor, [(project_id, grant_id) for grant_id, project_id in assignments])
+        connection.commit()
+        collaboration_graph.add_fundings(fundings)
+    except Error as e:
+        connection.rollback()
+        if e.errno == errorcode.ER_DUP_ENTRY:
+            return jsonify({"error": "Some grants in the plan are already linked to their project."}), 409
+        if e.errno == errorcode.ER_NO_REFERENCED_ROW_2:
+            return jsonify({"error": "Some grants or projects in the plan no longer exist."}), 404
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+    return jsonify({"committed": len(assignments)})
+
+# Change Feed
+def parse_change_tables(args):
+    """Return the tables to report, from ``tables`` (comma separated), or all of them."""
+    tables = [t.strip() for t in args.get('tables', '').split(',') if t.strip()]
+    unknown = [t for t in tables if t not in CHANGE_TABLES]
+    if unknown:
+        raise ValueError(f"Unknown table '{unknown[0]}'. Use any of: {', '.join(CHANGE_TABLES)}.")
+    return tables or list(CHANGE_TABLES)
+
+def current_rows(cursor, table, keys):
+    """Return the current rows of ``table`` for ``keys`` (tuples of key values), by key."""
+    key_columns, columns = CHANGE_TABLES[table]
+    select = ', '.join(columns)
+    found = {}
+    for chunk in batches(keys):
+        if len(key_columns) == 1:
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"SELECT {select} FROM {table} WHERE {key_columns[0]} IN ({placeholders})",
+                           tuple(key[0] for key in chunk))
+        else:
+            placeholders = ', '.join(['(%s, %s)'] * len(chunk))
+            cursor.execute(f"SELECT {select} FROM {table} WHERE ({', '.join(key_columns)}) IN ({placeholders})",
+                           tuple(value for key in chunk for value in key))
+        for row in cursor.fetchall():
+            found[tuple(row[column] for column in key_columns)] = row
+    return found
+
+def read_changes(connection, cursor, since, tables):
+    """Return the change feed after version ``since`` for ``tables``, read with ``cursor``.
+
+    Several changes to one row are collapsed into one entry carrying the
+    row as it is now; a row that no longer exists is reported as deleted.
+    At most CHANGES_MAX_ROWS log entries are read, and none past an entry
+    whose transaction is still open; ``has_more`` says there are more after
+    ``version``. ``reset`` means the log no longer reaches back to ``since``.
+    """
+    # One snapshot, so the log and the rows are read consistently
+    version = repository.change_watermark(connection, since, CHANGES_MAX_ROWS)
+    cursor.execute("SELECT MIN(Version) AS Oldest, MAX(Version) AS Newest FROM ChangeLog;")
+    bounds = cursor.fetchone()
+    # A rolled back version leaves a gap that can also look like a pruned log; a reset is safe, only slower
+    if (since > 0 and bounds['Newest'] is None) or (bounds['Newest'] is not None and (
+            since > bounds['Newest'] or bounds['Oldest'] > since + 1)):
+        return {'version': repository.change_watermark(connection), 'reset': True, 'has_more': False, 'changes': []}
+
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT Version, TableName, RowKey, RowKey2, Action
+        FROM ChangeLog
+        WHERE Version > %s AND Version <= %s AND TableName IN ({placeholders})
+        ORDER BY Version;
+    """, [since, version] + tables)
+    entries = cursor.fetchall()
+    cursor.execute("SELECT COUNT(*) AS Entries FROM ChangeLog WHERE Version > %s AND Version <= %s;",
+                   (since, version))
+    has_more = cursor.fetchone()['Entries'] == CHANGES_MAX_ROWS
+
+    # Each row's first action, ordered by its last change
+    changed = {}
+    for entry in entries:
+        key = (entry['TableName'],) + ((entry['RowKey'],) if entry['RowKey2'] is None
+                                       else (entry['RowKey'], entry['RowKey2']))
+        changed[key] = changed.pop(key, entry['Action'])
+    keys_by_table = {}
+    for key in changed:
+        keys_by_table.setdefault(key[0], []).append(key[1:])
+    rows = {table: current_rows(cursor, table, keys) for table, keys in keys_by_table.items()}
+
+    changes = []
+    for key, first_action in changed.items():
+        table = key[0]
+        row = rows[table].get(key[1:])
+        if row is None:
+            action = 'delete'
+        else:
+            action = 'insert' if first_action == 'insert' else 'update'
+        changes.append({'table': table, 'action': action,
+                        'key': dict(zip(CHANGE_TABLES[table][0], key[1:])), 'row': row})
+    return {'version': version, 'reset': False, 'has_more': has_more, 'changes': changes}
+
+def parse_since(args):
+    """Return the ``since`` version, or None when the client did not send one."""
+    if 'since' not in args:
+        return None
+    try:
+        since = int(args['since'])
+    except ValueError:
+        raise ValueError("since must be an integer.")
+    if since < 0:
+        raise ValueError("since must not be negative.")
+    return since
+
+@app.route('/changes', methods=['GET'])
+def get_changes():
+    """Get the rows inserted, updated or deleted since ``since`` (a version from an earlier response).
+
+    Pass ``version`` back as ``since`` until ``has_more`` is false. On
+    ``reset`` the client must reload the tables, then sync from the
+    ``version`` returned with it.
+    """
+    try:
+        since = parse_since(request.args) or 0
+        tables = parse_change_tables(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
+
+    cursor = connection.cursor(dictionary=True)
+    try:
+        return jsonify(read_changes(connection, cursor, since, tables))
+    except Error as e:
+        print(f"Error fetching changes: {e}")
+        return jsonify({"error": "Error fetching changes."}), 500
+    finally:
+        cursor.close()
+
+# Live Balances
+def poll_balance_changes(version):
+    """Read the grant and agency changes after ``version`` for the live updates broadcaster."""
+    connection = checkout_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        if version is None:
+            return repository.change_watermark(connection), []
+        feed = read_changes(connection, cursor, version, list(LIVE_TABLES))
+        return feed['version'], [feed] if feed['changes'] or feed['reset'] else []
+    finally:
+        cursor.close()
+        pool.release(connection)
+
+live_updates = Broadcaster(poll_balance_changes, interval=LIVE_POLL_SECONDS, queue_size=LIVE_QUEUE_SIZE,
+                           max_subscribers=LIVE_MAX_SUBSCRIBERS)
+metrics.stats_gauges('urgas_live_updates', "Live updates statistic", live_updates.stats)
+
+# Set when this process stops taking requests, so open event streams end and clients reconnect elsewhere
+draining = threading.Event()
+
+def server_sent_event(feed):
+    """Format a change feed as a Server-Sent Event whose ID is its version."""
+    kind = 'reset' if feed['reset'] else 'balances'
+    data = app.json.dumps({'version': feed['version'], 'changes': feed['changes']})
+    return f"id: {feed['version']}\nevent: {kind}\ndata: {data}\n\n"
+
+def parse_heartbeat(args):
+    """Return the keep-alive interval a stream asked for, at most LIVE_HEARTBEAT_SECONDS."""
+    if 'heartbeat' not in args:
+        return LIVE_HEARTBEAT_SECONDS
+    try:
+        heartbeat = float(args['heartbeat'])
+    except ValueError:
+        raise ValueError("heartbeat must be a number of seconds.")
+    if heartbeat < 1:
+        raise ValueError("heartbeat must be at least 1 second.")
+    return min(heartbeat, LIVE_HEARTBEAT_SECONDS)
+
+@app.route('/live/balances', methods=['GET'])
+def stream_balances():
+    """Push grant and agency balance changes to the client as Server-Sent Events.
+
+    Every ``balances`` event carries the changed Grants and FundingAgencies
+    rows (as in /changes) and its version as the event ID. A client that
+    reconnects with ``Last-Event-ID`` (or ``since``) first receives what it
+    missed; a ``reset`` event means it must reload the balances. One poller
+    reads each change once for all connected clients. ``heartbeat`` asks
+    for keep-alive comments more often than every LIVE_HEARTBEAT_SECONDS.
+    Past LIVE_MAX_SUBSCRIBERS open streams, 503 is returned.
+    """
+    try:
+        since = parse_since({'since': request.headers['Last-Event-ID']} if 'Last-Event-ID' in request.headers
+                            else request.args)
+        heartbeat = parse_heartbeat(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        subscription = live_updates.subscribe()
+    except TooManySubscribers as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '30'}
+    except (Error, PoolTimeout) as e:
+        print(f"Error starting live updates: {e}")
+        return jsonify({"error": "Database unavailable."}), 503
+
+    # Catch up from the client's version before switching to live events
+    missed = []
+    if since is not None:
+        connection = get_db()
+        if not connection:
+            live_updates.unsubscribe(subscription)
+            return jsonify({"error": "Database unavailable."}), 503
+        cursor = connection.cursor(dictionary=True)
+        try:
+            while True:
+                feed = read_changes(connection, cursor, since, list(LIVE_TABLES))
+                if feed['changes'] or feed['reset']:
+                    missed.append(feed)
+                since = feed['version']
+                if not feed['has_more']:
+                    break
+        except Error as e:
+            live_updates.unsubscribe(subscription)
+            print(f"Error fetching changes: {e}")
+            return jsonify({"error": "Error fetching changes."}), 500
+        finally:
+            cursor.close()
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            for feed in missed:
+                yield server_sent_event(feed)
+            while True:
+                try:
+                    feed = subscription.events.get(timeout=heartbeat)
+                except queue.Empty:
+                    if subscription.closed or draining.is_set():
+                        return
+                    yield ': keep-alive\n\n'
+                    continue
+                # Changes up to the catch-up version were already sent
+                if since is None or feed['version'] > since:
+                    yield server_sent_event(feed)
+        finally:
+            live_updates.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Collaborations
+def collaboration_response(query, *args):
+    """Answer ``query`` from the collaboration graph, loading it first if needed."""
+    try:
+        if collaboration_graph.needs_load():
+            collaboration_graph.load(read_collaboration_links)
+    except GraphUnavailable as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({'data': query(*args)})
+
+@app.route('/collaborations/professors/<int:professor_id>/coinvestigators', methods=['GET'])
+def get_coinvestigators(professor_id):
+    """Get the professors who share a project with a professor, most shared projects first."""
+    return collaboration_response(collaboration_graph.coinvestigators, professor_id)
+
+@app.route('/collaborations/professors/<int:professor_id>/neighborhood', methods=['GET'])
+def get_collaboration_neighborhood(professor_id):
+    """Get the professors within ``hops`` (default 2) co-investigator steps of a professor."""
+    try:
+        hops = int(request.args.get('hops', 2))
+    except ValueError:
+        return jsonify({"error": "hops must be an integer."}), 400
+    if not 1 <= hops <= COLLABORATION_MAX_HOPS:
+        return jsonify({"error": f"hops must be between 1 and {COLLABORATION_MAX_HOPS}."}), 400
+    return collaboration_response(collaboration_graph.neighborhood, professor_id, hops)
+
+@app.route('/collaborations/professors/<int:professor_id>/shared_agencies', methods=['GET'])
+def get_shared_agencies(professor_id):
+    """Get the professors funded by the same agencies as a professor."""
+    return collaboration_response(collaboration_graph.shared_agencies, professor_id)
+
+@app.route('/collaborations/clusters', methods=['GET'])
+def get_collaboration_clusters():
+    """Get the groups of professors connected through shared projects, largest first."""
+    try:
+        min_size = int(request.args.get('min_size', 2))
+    except ValueError:
+        return jsonify({"error": "min_size must be an integer."}), 400
+    return collaboration_response(collaboration_graph.clusters, max(min_size, 1))
+
+@app.route('/collaboration_graph_stats', methods=['GET'])
+def get_collaboration_graph_stats():
+    """Get collaboration graph size, load and change statistics."""
+    return jsonify(collaboration_graph.stats())
+
+# Search
+def parse_search_types(args):
+    """Return the record types to search, from ``type`` (comma separated), or all of them."""
+    types = [t.strip() for t in args.get('type', '').split(',') if t.strip()]
+    unknown = [t for t in types if t not in SEARCH_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown type '{unknown[0]}'. Use one of: {', '.join(SEARCH_SOURCES)}.")
+    return [t for t in SEARCH_SOURCES if t in types] or list(SEARCH_SOURCES)
+
+def parse_search_limit(args):
+    """Return the requested number of results, capped at SEARCH_MAX_LIMIT."""
+    try:
+        limit = int(args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return min(limit, SEARCH_MAX_LIMIT)
+
+@app.route('/search', methods=['GET'])
+@cached('Professors', 'Projects', 'Publications')
+def search():
+    """Search professors, projects and publications by name, title, department or email.
+
+    Every word of ``q`` must match the start of a word in the record; a
+    number also matches the record with that ID. Results are ranked by ID
+    match, then by whether the name or title starts with the query, then
+    by relevance.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"error": "q is required."}), 400
+    if len(q) > SEARCH_MAX_LENGTH:
+        return jsonify({"error": f"q must be at most {SEARCH_MAX_LENGTH} characters."}), 400
+    try:
+        types = parse_search_types(request.args)
+        limit = parse_search_limit(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    words = re.findall(r'\w+', q)
+    if not words:
+        return jsonify({'query': q, 'results': []})
+    item_id = int(q) if q.isdigit() else None
+    rows = run_operation(repository.search, words, types, limit, item_id)
+    if rows is None:
+        return jsonify({"error": "Error searching."}), 500
+
+    # An ID match can also match by text; keep its first, highest ranked row
+    results = {}
+    for kind, record_id, label, detail, _ in rows:
+        results.setdefault((kind, record_id), {'type': kind, 'id': record_id, 'label': label, 'detail': detail})
+    return jsonify({'query': q, 'results': list(results.values())[:limit]})
+
+# Batch Reads
+def parse_batch_operation(index, operation):
+    """Validate one batch operation and return ``(id, path, query_string, etag)``."""
+    if isinstance(operation, str):
+        operation = {'path': operation}
+    if not isinstance(operation, dict):
+        raise ValueError("Each operation must be a path or an object with a 'path'.")
+    path = operation.get('path')
+    if not isinstance(path, str) or not path.strip('/'):
+        raise ValueError("'path' is required.")
+    path, _, query = path.partition('?')
+    path = '/' + path.lstrip('/')
+    params = operation.get('params') or {}
+    if not isinstance(params, dict):
+        raise ValueError("'params' must be an object.")
+    query_string = query + ('&' if query and params else '') + urlencode(params, doseq=True)
+    if 'format' in parse_qs(query_string):
+        raise ValueError("Streaming exports cannot be batched.")
+    try:
+        endpoint, _ = app.url_map.bind('').match(path, method='GET')
+    except HTTPException:
+        raise ValueError(f"No readable endpoint at '{path}'.")
+    if endpoint in BATCH_EXCLUDED_ENDPOINTS or endpoint == 'batch':
+        raise ValueError(f"'{path}' cannot be batched.")
+    return operation.get('id', index), path, query_string, operation.get('etag')
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """Run several read endpoints in one round trip and return all their responses.
+
+    Each operation names a GET ``path`` (query string allowed) with optional
+    ``params``, ``id`` and ``etag``. Operations run in order on the
+    request's single pooled connection, and through the response cache, so a
+    matching ``etag`` yields status 304 without a body. Results are
+    returned in input order as ``{"id", "status", "etag", "body"}``; one
+    failing operation does not fail the others.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('requests')
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Expected a non-empty JSON array of operations."}), 400
+    if len(data) > BATCH_MAX_REQUESTS:
+        return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} operations can be batched per request."}), 400
+    operations = []
+    for index, operation in enumerate(data):
+        try:
+            operations.append(parse_batch_operation(index, operation))
+        except ValueError as e:
+            return jsonify({"error": str(e), "index": index}), 400
+
+    # Bodies are spliced in as encoded, so results are not decoded and re-encoded
+    parts = []
+    started = g.get('request_started')
+    for operation_id, path, query_string, etag in operations:
+        headers = {'If-None-Match': etag} if etag else {}
+        # Nested request contexts share this request's app context, and so its
+        # connection; each operation is timed under its own route
+        with app.test_request_context(path, query_string=query_string, headers=headers):
+            response = app.full_dispatch_request()
+        g.request_started = started
+        entry = {'id': operation_id, 'status': response.status_code, 'etag': response.get_etag()[0]}
+        if response.status_code == 304:
+            body = None
+        elif response.is_streamed or response.mimetype != 'application/json':
+            response.close()
+            entry['status'] = 400
+            body = app.json.dumps({"error": f"'{path}' does not return JSON."}).encode()
+        else:
+            body = response.get_data()
+        encoded = app.json.dumps(entry).encode()
+        parts.append(encoded[:-1] + b',"body":' + body + b'}' if body is not None else encoded)
+    return Response(b'{"results":[' + b','.join(parts) + b']}', mimetype='application/json')
+
+# Columnar Snapshots
+@app.route('/snapshots', methods=['POST'])
+def create_snapshot():
+    """Export every table and view to Parquet files from one consistent snapshot.
+
+    With ``since`` (the name of an earlier snapshot) only what changed after
+    it is exported. Returns the new snapshot's manifest; large databases are
+    better exported with ``python snapshot_export.py``.
+    """
+    data = request.get_json(silent=True) or {}
+    since = data.get('since')
+    if since is not None and not isinstance(since, str):
+        return jsonify({"error": "since must be a snapshot name."}), 400
+
+    connection = get_db()
+    if not connection:
+        return jsonify({"error": "Database unavailable."}), 503
+
+    try:
+        manifest = export_snapshot(connection, repository, SNAPSHOT_CONFIG['snapshot_dir'], since,
+                                   SNAPSHOT_CONFIG['chunk_size'], SNAPSHOT_CONFIG['compression'],
+                                   SNAPSHOT_CONFIG['append_overlap'])
+    except SnapshotTooOldError as e:
+        return jsonify({"error": str(e)}), 409
+    except SnapshotError as e:
+        return jsonify({"error": str(e)}), 400
+    except Error as e:
+        print(f"Error exporting snapshot: {e}")
+        return jsonify({"error": "Error exporting snapshot."}), 500
+    return jsonify(manifest), 201
+
+@app.route('/snapshots', methods=['GET'])
+def get_snapshots():
+    """List the manifests of the snapshots taken so far, oldest first."""
+    return jsonify(list_snapshots(SNAPSHOT_CONFIG['snapshot_dir']))
+
+@app.route('/snapshots/<name>/<path:filename>', methods=['GET'])
+def get_snapshot_file(name, filename):
+    """Download one file of a snapshot: a Parquet file or its manifest.json."""
+    try:
+        read_manifest(SNAPSHOT_CONFIG['snapshot_dir'], name)
+    except SnapshotError as e:
+        return jsonify({"error": str(e)}), 404
+    return send_from_directory(os.path.abspath(os.path.join(SNAPSHOT_CONFIG['snapshot_dir'], name)), filename)
+
+@app.route('/pool_stats', methods=['GET'])
+def get_pool_stats():
+    """Get connection pool usage statistics."""
+    return jsonify(pool.stats())
+
+@app.route('/cache_stats', methods=['GET'])
+def get_cache_stats():
+    """Get response cache statistics."""
+    return jsonify(response_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose request, query, pool and cache metrics in the Prometheus text format."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+# Startup Warmup
+def warm_up(paths=None):
+    """Open the pool's connections and prime hot reads before serving requests.
+
+    Fills the pool up to its size, loads the collaboration graph and
+    requests each of ``paths`` (default WARMUP_PATHS) so their responses
+    are cached. Failures are reported, not raised, so a worker still
+    starts while the database is unavailable.
+    """
+    started = time.perf_counter()
+    try:
+        connections = pool.warm()
+    except (Error, PoolTimeout) as e:
+        print(f"Error opening connections during warmup: {e}")
+        connections = 0
 
+    with app.app_context():
+        try:
+            collaboration_graph.load(read_collaboration_links)
+        except GraphUnavailable as e:
+            print(f"Error loading the collaboration graph during warmup: {e}")
 
+    primed = 0
+    client = app.test_client()
+    for path in WARMUP_PATHS if paths is None else paths:
+        response = client.get(path)
+        if response.status_code == 200:
+            primed += 1
+        else:
+            print(f"Warmup request {path} returned {response.status_code}")
+    return {'connections': connections, 'primed': primed, 'seconds': round(time.perf_counter() - started, 3)}
 
-# Run the app
+# Run the app (development server; use serve.py in production)
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,315 @@
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import backend
+from seed_data import add_volume_arguments, fetch_ids, reset_database, seed_database, volumes_from_args
+
+# Results saved by --save-baseline, compared by --baseline
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# Relative weight of each operation in the request mix
+WORKLOAD = {
+    'list_professors': 20,
+    'list_projects': 15,
+    'list_grants': 10,
+    'professor_projects': 10,
+    'project_grants_funding': 10,
+    'professor_publications': 5,
+    'project_audit_log': 5,
+    'assign_professor_to_project': 8,
+    'assign_grant_to_project': 7,
+    'use_grant': 8,
+    'convert_project_to_publication': 2
+}
+
+# Share of projects set aside for conversion, so other operations never target a deleted project
+CONVERSION_SHARE = 0.1
+
+
+class Workload:
+    """Builds the requests of the benchmark mix from the IDs present in the database."""
+
+    def __init__(self, professor_ids, project_ids, grant_ids, seed=42):
+        split = max(1, int(len(project_ids) * (1 - CONVERSION_SHARE)))
+        self.professor_ids = professor_ids
+        self.project_ids = project_ids[:split]
+        self.convertible_ids = project_ids[split:]
+        self.grant_ids = grant_ids
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._workers = 0
+
+    def rng(self):
+        """Return a per-thread random generator, seeded reproducibly."""
+        if not hasattr(self._local, 'rng'):
+            with self._lock:
+                self._workers += 1
+                self._local.rng = random.Random(self.seed * 1000 + self._workers)
+        return self._local.rng
+
+    def request(self, operation):
+        """Return ``(method, path, body)`` for one operation, or None if it cannot run."""
+        rng = self.rng()
+        if operation == 'list_professors':
+            return 'GET', f"/professors?limit=100&sort={rng.choice(['Name', 'ProfessorID'])}", None
+        if operation == 'list_projects':
+            return 'GET', "/projects?limit=100&sort=-StartDate", None
+        if operation == 'list_grants':
+            return 'GET', "/grants?limit=100&sort=-Amount", None
+        if operation == 'professor_projects':
+            return 'GET', f"/professor_projects?limit=100&professor_id={rng.choice(self.professor_ids)}", None
+        if operation == 'project_grants_funding':
+            return 'GET', f"/project_grants_funding?limit=100&project_id={rng.choice(self.project_ids)}", None
+        if operation == 'professor_publications':
+            return 'GET', f"/professor_publications/{rng.choice(self.professor_ids)}", None
+        if operation == 'project_audit_log':
+            return 'GET', f"/project_audit_log?limit=50&project_id={rng.choice(self.project_ids)}", None
+        if operation == 'assign_professor_to_project':
+            return 'POST', "/assign_professor_to_project", {
+                'professor_id': rng.choice(self.professor_ids), 'project_id': rng.choice(self.project_ids)}
+        if operation == 'assign_grant_to_project':
+            return 'POST', "/assign_grant_to_project", {
+                'project_id': rng.choice(self.project_ids), 'grant_id': rng.choice(self.grant_ids)}
+        if operation == 'use_grant':
+            return 'PUT', f"/use_grant/{rng.choice(self.grant_ids)}", {'amount': round(rng.uniform(1, 50), 2)}
+        if operation == 'convert_project_to_publication':
+            with self._lock:
+                if not self.convertible_ids:
+                    return None
+                project_id = self.convertible_ids.pop()
+            return 'POST', "/convert_project_to_publication", {
+                'project_id': project_id, 'publication_title': f"Publication of project {project_id}"}
+        raise ValueError(f"Unknown operation {operation}")
+
+
+class LocalClient:
+    """Sends requests to the Flask app in-process, without an HTTP server."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def send(self, method, path, body):
+        if not hasattr(self._local, 'client'):
+            self._local.client = backend.app.test_client()
+        response = self._local.client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code
+
+
+class HttpClient:
+    """Sends requests to a running server, one keep-alive session per thread."""
+
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip('/')
+        self._requests = requests
+        self._local = threading.local()
+
+    def send(self, method, path, body):
+        if not hasattr(self._local, 'session'):
+            self._local.session = self._requests.Session()
+        response = self._local.session.request(method, self.url + path, json=body)
+        return response.status_code
+
+
+class Recorder:
+    """Collects latencies and status classes per operation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, operation, latency, status):
+        with self._lock:
+            self.latencies[operation].append(latency)
+            self.statuses[operation][status] += 1
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def summarize(recorder, elapsed):
+    """Return throughput and latency percentiles (in milliseconds) per operation and overall."""
+    results = {}
+    everything = []
+    for operation, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        everything.extend(latencies)
+        statuses = recorder.statuses[operation]
+        results[operation] = {
+            'requests': len(latencies),
+            'throughput': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'client_errors': sum(c for s, c in statuses.items() if 400 <= s < 500),
+            'server_errors': sum(c for s, c in statuses.items() if s >= 500 or s == 0)
+        }
+    everything.sort()
+    if everything:
+        results['ALL'] = {
+            'requests': len(everything),
+            'throughput': len(everything) / elapsed,
+            'p50_ms': percentile(everything, 0.50) * 1000,
+            'p95_ms': percentile(everything, 0.95) * 1000,
+            'p99_ms': percentile(everything, 0.99) * 1000,
+            'client_errors': sum(r['client_errors'] for r in results.values()),
+            'server_errors': sum(r['server_errors'] for r in results.values())
+        }
+    return results
+
+
+def execute(client, workload, recorder, operation, scheduled=None):
+    """Run one operation and record its latency.
+
+    In arrival-rate mode latency is measured from the scheduled start, so time
+    spent queued behind slow requests is counted instead of hidden.
+    """
+    spec = workload.request(operation)
+    if spec is None:
+        return
+    start = time.perf_counter()
+    try:
+        status = client.send(*spec)
+    except Exception as e:
+        print(f"Error sending {operation}: {e}")
+        status = 0
+    recorder.record(operation, time.perf_counter() - (scheduled or start), status)
+
+
+def run_fixed_concurrency(client, workload, operations, weights, concurrency, duration, seed):
+    """Keep ``concurrency`` requests in flight for ``duration`` seconds."""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            execute(client, workload, recorder, rng.choices(operations, weights)[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index in range(concurrency):
+            executor.submit(worker, index)
+    return recorder, time.perf_counter() - start
+
+
+def run_arrival_rate(client, workload, operations, weights, rate, duration, concurrency, seed):
+    """Start requests at a fixed rate per second, regardless of how fast they complete."""
+    recorder = Recorder()
+    rng = random.Random(seed)
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index in range(int(rate * duration)):
+            scheduled = start + index * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(execute, client, workload, recorder, rng.choices(operations, weights)[0], scheduled)
+    return recorder, time.perf_counter() - start
+
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of ``results`` against a saved baseline."""
+    regressions = []
+    for operation, current in results.items():
+        previous = baseline.get(operation)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{operation}: {metric} {previous[metric]:.1f} -> {current[metric]:.1f}")
+        if current['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(
+                f"{operation}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f} req/s")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'operation':<32}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'4xx':>6}{'5xx':>6}")
+    for operation, r in results.items():
+        print(f"{operation:<32}{r['requests']:>9}{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}"
+              f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['client_errors']:>6}{r['server_errors']:>6}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the URGAS API with a realistic request mix.")
+    parser.add_argument('--url', help="benchmark a running server (default: call the Flask app in-process)")
+    parser.add_argument('--populate', action='store_true',
+                        help="reset the configured database and seed it before benchmarking")
+    parser.add_argument('--concurrency', type=int, default=8, help="requests in flight (default: 8)")
+    parser.add_argument('--rate', type=float,
+                        help="start this many requests per second instead of a fixed concurrency")
+    parser.add_argument('--duration', type=float, default=30, help="seconds to run (default: 30)")
+    parser.add_argument('--warmup', type=float, default=5, help="seconds to run before measuring (default: 5)")
+    parser.add_argument('--only', help="comma-separated operations to run (default: the full mix)")
+    parser.add_argument('--baseline', help="compare against a saved baseline and exit 1 on regressions")
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PATH,
+                        help=f"save the results as a baseline (default path: {BASELINE_PATH})")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown against the baseline (default: 0.2 = 20%%)")
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    connection = backend.connect_to_database()
+    try:
+        if args.populate:
+            reset_database(connection)
+            seed_database(connection, volumes_from_args(args), seed=args.seed)
+        cursor = connection.cursor()
+        try:
+            workload = Workload(fetch_ids(cursor, 'Professors', 'ProfessorID'),
+                                fetch_ids(cursor, 'Projects', 'ProjectID'),
+                                fetch_ids(cursor, 'Grants', 'GrantID'), seed=args.seed)
+        finally:
+            cursor.close()
+    finally:
+        connection.close()
+    if not (workload.professor_ids and workload.project_ids and workload.grant_ids):
+        print("The database has no professors, projects or grants; run with --populate.")
+        sys.exit(1)
+
+    operations = args.only.split(',') if args.only else list(WORKLOAD)
+    weights = [WORKLOAD[operation] for operation in operations]
+    client = HttpClient(args.url) if args.url else LocalClient()
+
+    def run(duration):
+        if args.rate:
+            return run_arrival_rate(client, workload, operations, weights, args.rate, duration,
+                                    args.concurrency, args.seed)
+        return run_fixed_concurrency(client, workload, operations, weights, args.concurrency, duration, args.seed)
+
+    if args.warmup > 0:
+        run(args.warmup)
+    recorder, elapsed = run(args.duration)
+    results = summarize(recorder, elapsed)
+    print_report(results)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION  {regression}")
+        print(f"{len(regressions)} regressions against {args.baseline}.")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'settings': {k: v for k, v in vars(args).items() if k not in ('baseline', 'save_baseline')},
+                       'results': results}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.save_baseline}.")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,288 @@
+import threading
+import time
+from array import array
+from collections import defaultdict, deque
+
+
+class CollaborationGraph:
+    """An in-memory index of who works with whom, built from Professors_Projects and Projects_Grants.
+
+    Professors and projects get dense indices, and each node keeps its
+    neighbours in a compact ``array`` of indices, so lookups walk arrays
+    instead of self-joining the link tables. ``load`` reads the links with
+    two queries; afterwards writers apply their changes incrementally
+    (``add_memberships``, ``remove_professor``, ...) once they commit.
+    Changes the writers cannot describe, and writes made outside this
+    process, are picked up by ``mark_stale`` or once the graph is older
+    than ``max_age`` seconds (0 disables), when the next read reloads it.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._reset()
+        self._loaded_at = None
+        self._stale = True
+        self._changes = 0
+        self._loads = 0
+        self._load_seconds = 0.0
+
+    def _reset(self):
+        self._professor_index = {}
+        self._professor_ids = array('q')
+        self._professor_projects = []
+        self._project_index = {}
+        self._project_ids = array('q')
+        self._project_professors = []
+        self._project_grants = []
+        self._grant_projects = defaultdict(set)
+        self._grant_agency = {}
+        self._agency_grants = defaultdict(set)
+        self._clusters = None
+
+    def needs_load(self):
+        """Return True if the next read should reload the graph first."""
+        with self._lock:
+            return (self._stale or self._loaded_at is None
+                    or (self.max_age > 0 and time.monotonic() - self._loaded_at >= self.max_age))
+
+    def load(self, read_links):
+        """Rebuild the graph from ``read_links()``.
+
+        ``read_links`` returns ``(memberships, fundings)``: the
+        ``(professor_id, project_id)`` rows of Professors_Projects and the
+        ``(project_id, grant_id, agency_id)`` rows of Projects_Grants joined
+        to Grants. If a writer changed the graph while the links were being
+        read, the graph is loaded but left stale so the next read reloads it.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            changes = self._changes
+        memberships, fundings = read_links()
+        with self._lock:
+            self._reset()
+            self._add_memberships(memberships)
+            self._add_fundings(fundings)
+            self._stale = self._changes != changes
+            self._loaded_at = time.monotonic()
+            self._loads += 1
+            self._load_seconds = time.perf_counter() - started
+
+    def mark_stale(self):
+        """Reload the graph on the next read."""
+        with self._lock:
+            self._stale = True
+
+    # Incremental changes, applied after the writer commits
+    def add_memberships(self, memberships):
+        """Link ``(professor_id, project_id)`` pairs."""
+        with self._lock:
+            self._add_memberships(memberships)
+            self._changed()
+
+    def add_fundings(self, fundings):
+        """Link ``(project_id, grant_id, agency_id)`` rows; ``agency_id`` may be None."""
+        with self._lock:
+            self._add_fundings(fundings)
+            self._changed()
+
+    def remove_professor(self, professor_id):
+        """Drop a deleted professor and their project links."""
+        with self._lock:
+            index = self._professor_index.get(professor_id)
+            if index is not None:
+                for project in self._professor_projects[index]:
+                    self._project_professors[project].remove(index)
+                self._professor_projects[index] = array('q')
+            self._changed()
+
+    def remove_project(self, project_id):
+        """Drop a deleted (or converted) project with its professor and grant links."""
+        with self._lock:
+            index = self._project_index.get(project_id)
+            if index is not None:
+                for professor in self._project_professors[index]:
+                    self._professor_projects[professor].remove(index)
+                self._project_professors[index] = array('q')
+                for grant_id in self._project_grants[index]:
+                    self._unlink_grant(grant_id, index)
+                self._project_grants[index] = array('q')
+            self._changed()
+
+    def remove_grants(self, grant_ids):
+        """Drop deleted grants and their project links."""
+        with self._lock:
+            for grant_id in grant_ids:
+                for project in list(self._grant_projects.get(grant_id, ())):
+                    self._project_grants[project].remove(grant_id)
+                    self._unlink_grant(grant_id, project)
+            self._changed()
+
+    def remove_agency(self, agency_id):
+        """Drop a deleted agency's grants, which the database removes in cascade."""
+        with self._lock:
+            self.remove_grants(list(self._agency_grants.get(agency_id, ())))
+
+    # Queries
+    def coinvestigators(self, professor_id):
+        """Return the professors sharing a project with ``professor_id``, most shared projects first."""
+        with self._lock:
+            index = self._professor_index.get(professor_id)
+            if index is None:
+                return []
+            shared = defaultdict(list)
+            for project in self._professor_projects[index]:
+                for other in self._project_professors[project]:
+                    if other != index:
+                        shared[other].append(self._project_ids[project])
+            return sorted(({'professor_id': self._professor_ids[other], 'shared_projects': len(projects),
+                            'project_ids': sorted(projects)} for other, projects in shared.items()),
+                          key=lambda row: (-row['shared_projects'], row['professor_id']))
+
+    def neighborhood(self, professor_id, hops):
+        """Return the professors within ``hops`` co-investigator steps of ``professor_id``, nearest first."""
+        with self._lock:
+            start = self._professor_index.get(professor_id)
+            if start is None:
+                return []
+            distance = {start: 0}
+            seen_projects = set()
+            queue = deque([start])
+            while queue:
+                professor = queue.popleft()
+                if distance[professor] == hops:
+                    continue
+                for project in self._professor_projects[professor]:
+                    if project in seen_projects:
+                        continue
+                    seen_projects.add(project)
+                    for other in self._project_professors[project]:
+                        if other not in distance:
+                            distance[other] = distance[professor] + 1
+                            queue.append(other)
+            del distance[start]
+            return sorted(({'professor_id': self._professor_ids[other], 'hops': steps}
+                           for other, steps in distance.items()),
+                          key=lambda row: (row['hops'], row['professor_id']))
+
+    def shared_agencies(self, professor_id):
+        """Return the professors whose projects are funded by an agency that also funds ``professor_id``."""
+        with self._lock:
+            index = self._professor_index.get(professor_id)
+            if index is None:
+                return []
+            agencies = {self._grant_agency[grant_id]
+                        for project in self._professor_projects[index]
+                        for grant_id in self._project_grants[project]
+                        if self._grant_agency.get(grant_id) is not None}
+            shared = defaultdict(set)
+            for agency_id in agencies:
+                for grant_id in self._agency_grants[agency_id]:
+                    for project in self._grant_projects[grant_id]:
+                        for other in self._project_professors[project]:
+                            if other != index:
+                                shared[other].add(agency_id)
+            return sorted(({'professor_id': self._professor_ids[other], 'agency_ids': sorted(agency_ids)}
+                           for other, agency_ids in shared.items()),
+                          key=lambda row: (-len(row['agency_ids']), row['professor_id']))
+
+    def clusters(self, min_size=2):
+        """Return the groups of professors connected through shared projects, largest first.
+
+        Components are computed once with union-find and reused until the
+        graph changes.
+        """
+        with self._lock:
+            if self._clusters is None:
+                self._clusters = self._find_clusters()
+            return [cluster for cluster in self._clusters if len(cluster['professor_ids']) >= min_size]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'professors': sum(1 for projects in self._professor_projects if projects),
+                'projects': sum(1 for professors in self._project_professors if professors),
+                'memberships': sum(len(projects) for projects in self._professor_projects),
+                'grant_links': sum(len(grants) for grants in self._project_grants),
+                'loads': self._loads,
+                'changes': self._changes,
+                'load_seconds': round(self._load_seconds, 6),
+                'age_seconds': round(time.monotonic() - self._loaded_at, 3) if self._loaded_at else None,
+                'stale': self._stale
+            }
+
+    # Internals; callers hold the lock
+    def _changed(self):
+        self._changes += 1
+        self._clusters = None
+
+    def _professor(self, professor_id):
+        index = self._professor_index.get(professor_id)
+        if index is None:
+            index = self._professor_index[professor_id] = len(self._professor_ids)
+            self._professor_ids.append(professor_id)
+            self._professor_projects.append(array('q'))
+        return index
+
+    def _project(self, project_id):
+        index = self._project_index.get(project_id)
+        if index is None:
+            index = self._project_index[project_id] = len(self._project_ids)
+            self._project_ids.append(project_id)
+            self._project_professors.append(array('q'))
+            self._project_grants.append(array('q'))
+        return index
+
+    def _add_memberships(self, memberships):
+        for professor_id, project_id in memberships:
+            professor, project = self._professor(professor_id), self._project(project_id)
+            if project not in self._professor_projects[professor]:
+                self._professor_projects[professor].append(project)
+                self._project_professors[project].append(professor)
+
+    def _add_fundings(self, fundings):
+        for project_id, grant_id, agency_id in fundings:
+            project = self._project(project_id)
+            if project not in self._grant_projects[grant_id]:
+                self._project_grants[project].append(grant_id)
+                self._grant_projects[grant_id].add(project)
+            self._grant_agency[grant_id] = agency_id
+            if agency_id is not None:
+                self._agency_grants[agency_id].add(grant_id)
+
+    def _unlink_grant(self, grant_id, project):
+        projects = self._grant_projects.get(grant_id)
+        if projects is None:
+            return
+        projects.discard(project)
+        if not projects:
+            del self._grant_projects[grant_id]
+            agency_id = self._grant_agency.pop(grant_id, None)
+            if agency_id is not None:
+                self._agency_grants[agency_id].discard(grant_id)
+
+    def _find_clusters(self):
+        parent = list(range(len(self._professor_ids)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for professors in self._project_professors:
+            for other in professors[1:]:
+                a, b = find(professors[0]), find(other)
+                if a != b:
+                    parent[b] = a
+
+        members = defaultdict(list)
+        for professor, projects in enumerate(self._professor_projects):
+            if projects:
+                members[find(professor)].append(self._professor_ids[professor])
+        clusters = []
+        for professors in members.values():
+            projects = {project for professor_id in professors
+                        for project in self._professor_projects[self._professor_index[professor_id]]}
+            clusters.append({'professor_ids': sorted(professors), 'project_count': len(projects)})
+        return sorted(clusters, key=lambda cluster: (-len(cluster['professor_ids']), cluster['professor_ids'][0]))
@@ -0,0 +1,5 @@
+import os
+
+# Tests run the backend on a throwaway embedded database
+os.environ.setdefault('DB_ENGINE', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', ':memory:')
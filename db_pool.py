@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class ConnectionPool:
+    """A thread-safe pool of reusable database connections.
+
+    Up to ``pool_size`` connections are kept open between requests. When all
+    of them are checked out, up to ``max_overflow`` extra connections may be
+    opened; those are closed again as soon as they are returned. Callers that
+    find the pool exhausted wait up to ``timeout`` seconds before
+    ``PoolTimeout`` is raised.
+
+    Connections older than ``recycle`` seconds are closed and replaced on
+    checkout, and with ``pre_ping`` every checkout verifies the connection is
+    still alive so stale server-side sessions are never handed out.
+    """
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True):
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._created_at = {}
+        self._open = 0
+        self._checked_out = 0
+
+        self._checkouts = 0
+        self._connects = 0
+        self._recycled = 0
+        self._invalidated = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def connect(self):
+        """Check a connection out of the pool, opening one if allowed."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._open < self.pool_size + self.max_overflow:
+                    self._open += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No connection available after {self.timeout} seconds "
+                        f"({self._checked_out} checked out)."
+                    )
+                self._cond.wait(remaining)
+            self._checked_out += 1
+
+        try:
+            if connection is not None:
+                connection = self._validate(connection)
+            if connection is None:
+                connection = self._create()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool, discarding it if it is unusable."""
+        try:
+            # End any open transaction so the next borrower starts clean and
+            # does not keep reading from a stale REPEATABLE READ snapshot.
+            connection.rollback()
+        except Exception:
+            self.invalidate(connection)
+            return
+
+        with self._cond:
+            self._checked_out -= 1
+            if self._open > self.pool_size:
+                self._open -= 1
+                overflow = True
+            else:
+                self._idle.append(connection)
+                overflow = False
+            self._cond.notify()
+        if overflow:
+            self._discard(connection)
+
+    def invalidate(self, connection):
+        """Close a checked-out connection instead of returning it to the pool."""
+        self._discard(connection)
+        with self._cond:
+            self._open -= 1
+            self._checked_out -= 1
+            self._invalidated += 1
+            self._cond.notify()
+
+    def warm(self, count=None):
+        """Pre-open up to ``count`` idle connections (defaults to pool_size)."""
+        count = self.pool_size if count is None else min(count, self.pool_size)
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(self.connect())
+        finally:
+            for connection in connections:
+                self.release(connection)
+        return len(connections)
+
+    def dispose(self):
+        """Close every idle connection."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Return a snapshot of pool usage counters."""
+        with self._cond:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'overflow': max(self._open - self.pool_size, 0),
+                'checkouts': self._checkouts,
+                'connects': self._connects,
+                'recycled': self._recycled,
+                'invalidated': self._invalidated,
+                'timeouts': self._timeouts,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+                'wait_seconds_avg': round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+            }
+
+    def _create(self):
+        connection = self._creator()
+        with self._cond:
+            self._connects += 1
+            self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _validate(self, connection):
+        """Return the connection if it is still usable, otherwise None."""
+        created_at = self._created_at.get(id(connection), 0)
+        if self.recycle is not None and self.recycle >= 0 and time.monotonic() - created_at > self.recycle:
+            self._discard(connection)
+            with self._cond:
+                self._recycled += 1
+            return None
+        if self.pre_ping:
+            try:
+                alive = connection.is_connected()
+            except Exception:
+                alive = False
+            if not alive:
+                self._discard(connection)
+                with self._cond:
+                    self._invalidated += 1
+                return None
+        return connection
+
+    def _discard(self, connection):
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
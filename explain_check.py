@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import sys
+
+import backend
+from seed_data import add_volume_arguments, reset_database, seed_database, volumes_from_args
+
+# Plans captured by --update-baseline, compared on every run; empty until captured on MySQL
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'explain_baseline.json')
+
+# Table, key columns, columns, filters and default sort of each list endpoint
+LIST_ENDPOINTS = {
+    'professors': ("Professors", ('ProfessorID',), backend.PROFESSOR_COLUMNS, backend.PROFESSOR_FILTERS, None),
+    'projects': ("Projects", ('ProjectID',), backend.PROJECT_COLUMNS, backend.PROJECT_FILTERS, None),
+    'grants': ("Grants", ('GrantID',), backend.GRANT_COLUMNS, backend.GRANT_FILTERS, None),
+    'fundingagencies': ("FundingAgencies", ('AgencyID',), backend.AGENCY_COLUMNS, backend.AGENCY_FILTERS, None),
+    'publications': ("Publications", ('PublicationID',), backend.PUBLICATION_COLUMNS, backend.PUBLICATION_FILTERS, None),
+    'professor_projects': ("ProfessorProjects", ('ProfessorID', 'ProjectID'),
+                           backend.PROFESSOR_PROJECT_COLUMNS, backend.PROFESSOR_PROJECT_FILTERS, None),
+    'project_grants_funding': ("ProjectGrantsFunding", ('ProjectID', 'GrantID'),
+                               backend.PROJECT_GRANT_COLUMNS, backend.PROJECT_GRANT_FILTERS, None),
+    'professors_without_projects': ("ProfessorsWithoutProjects", ('ProfessorID',),
+                                    backend.PROFESSOR_WITHOUT_PROJECT_COLUMNS,
+                                    backend.PROFESSOR_WITHOUT_PROJECT_FILTERS, None),
+    'project_audit_log': ("ProjectAudit", ('AuditID',), backend.AUDIT_COLUMNS, backend.AUDIT_FILTERS, '-Timestamp'),
+    'grant_usage': ("GrantUsage", ('UsageID',), backend.GRANT_USAGE_COLUMNS, backend.GRANT_USAGE_FILTERS, '-UsedAt'),
+    'rollups/projects': ("ProjectFundingSummary", ('ProjectID',), backend.PROJECT_FUNDING_COLUMNS,
+                         backend.PROJECT_FUNDING_FILTERS, '-TotalFunding'),
+    'rollups/professors': ("ProfessorFundingSummary", ('ProfessorID',), backend.PROFESSOR_FUNDING_COLUMNS,
+                           backend.PROFESSOR_FUNDING_FILTERS, '-TotalFunding'),
+    'rollups/agencies': ("AgencyFundingSummary", ('AgencyID',), backend.AGENCY_FUNDING_COLUMNS,
+                         backend.AGENCY_FUNDING_FILTERS, '-TotalGranted')
+}
+
+# Request arguments checked for each list endpoint. Range filters are paired with
+# a sort on the same column, which is how the index set is meant to be used.
+LIST_CHECKS = [
+    ('professors', {}, ()),
+    ('professors', {'sort': 'Name'}, ()),
+    ('professors', {'sort': 'Name', 'name': 'Professor 12'}, ()),
+    ('professors', {'department': 'Physics'}, ()),
+    ('professors', {'sort': 'Name', 'cursor': ('Name,ProfessorID', ['Professor 500', 500])}, ()),
+    ('projects', {}, ()),
+    ('projects', {'sort': '-StartDate'}, ()),
+    ('projects', {'sort': 'StartDate', 'start_from': '2020-01-01', 'start_to': '2020-12-31'}, ()),
+    ('projects', {'sort': 'Title', 'title': 'Data'}, ()),
+    ('projects', {'sort': 'EndDate', 'cursor': ('EndDate,ProjectID', [None, 100])}, ()),
+    ('grants', {}, ()),
+    ('grants', {'agency_id': 1}, ()),
+    ('grants', {'sort': '-Amount'}, ()),
+    ('grants', {'sort': 'Amount', 'min_amount': 100000}, ()),
+    ('fundingagencies', {}, ()),
+    ('fundingagencies', {'sort': '-Budget'}, ()),
+    ('publications', {}, ()),
+    ('publications', {'sort': 'Title', 'title': 'Data'}, ()),
+    ('professor_projects', {}, ()),
+    ('professor_projects', {'professor_id': 10}, ()),
+    ('professor_projects', {'project_id': 10}, ()),
+    ('professor_projects', {'cursor': ('ProfessorID,ProjectID', [10, 20])}, ()),
+    ('project_grants_funding', {}, ()),
+    ('project_grants_funding', {'project_id': 10}, ()),
+    ('project_grants_funding', {'agency_id': 1}, ('filesort',)),
+    ('professors_without_projects', {}, ()),
+    ('project_audit_log', {}, ()),
+    ('project_audit_log', {'project_id': 10}, ()),
+    ('project_audit_log', {'since': '2024-01-01', 'until': '2024-03-31'}, ()),
+    ('grant_usage', {}, ()),
+    ('grant_usage', {'grant_id': 10}, ()),
+    ('rollups/projects', {}, ()),
+    ('rollups/professors', {}, ()),
+    ('rollups/agencies', {}, ())
+]
+
+# Statements issued directly by backend.py and by the triggers and procedures
+STATEMENT_CHECKS = [
+    ('professor_publications', """
+        SELECT pub.PublicationID, pub.Title AS PublicationTitle, pr.ProjectID, pr.Title AS ProjectTitle
+        FROM Publications pub
+        JOIN Projects pr ON pub.ProjectID = pr.ProjectID
+        JOIN Professors_Projects pp ON pr.ProjectID = pp.ProjectID
+        WHERE pp.ProfessorID = %s
+        UNION ALL
+        SELECT pub.PublicationID, pub.Title, NULL, NULL
+        FROM Professors_Publications ppub
+        JOIN Publications pub ON pub.PublicationID = ppub.PublicationID
+        WHERE ppub.ProfessorID = %s""", (10, 10), ()),
+    ('convert_projects.lock', "SELECT pr.ProjectID, pub.PublicationID FROM Projects pr "
+                              "LEFT JOIN Publications pub ON pub.ProjectID = pr.ProjectID "
+                              "WHERE pr.ProjectID IN (%s, %s) ORDER BY pr.ProjectID", (10, 20), ()),
+    ('convert_projects.links', "SELECT pp.ProfessorID, pub.PublicationID FROM Professors_Projects pp "
+                               "JOIN Publications pub ON pub.ProjectID = pp.ProjectID "
+                               "WHERE pp.ProjectID IN (%s, %s)", (10, 20), ()),
+    ('project_exists', "SELECT 1 FROM Projects WHERE ProjectID = %s", (10,), ()),
+    ('professor_exists', "SELECT 1 FROM Professors WHERE ProfessorID = %s", (10,), ()),
+    ('grant_exists', "SELECT 1 FROM Grants WHERE GrantID = %s", (10,), ()),
+    ('bulk_existing_emails', "SELECT Email FROM Professors WHERE Email IN (%s, %s)",
+     ('professor1.42@example.edu', 'professor2.42@example.edu'), ()),
+    ('bulk_existing_pairs', "SELECT ProfessorID, ProjectID FROM Professors_Projects "
+                            "WHERE (ProfessorID, ProjectID) IN ((%s, %s), (%s, %s))", (1, 2, 3, 4), ()),
+    ('PreventDuplicateProfessors', "SELECT 1 FROM Professors WHERE Email = %s", ('professor1.42@example.edu',), ()),
+    ('DeductGrantAmount.replay', "SELECT UsageID, GrantID, RemainingAmount FROM GrantUsage "
+                                 "WHERE IdempotencyKey = %s", ('key',), ()),
+    ('DeductGrantAmount.update', "UPDATE Grants SET Amount = Amount - %s "
+                                 "WHERE GrantID = %s AND Amount >= %s", (1, 10, 1), ()),
+    ('RollupGrantLinked', "UPDATE ProfessorFunding pf "
+                          "JOIN Professors_Projects pp ON pp.ProfessorID = pf.ProfessorID "
+                          "SET pf.TotalFunding = pf.TotalFunding + 1 WHERE pp.ProjectID = %s", (10,), ()),
+    ('RollupGrantBalance.projects', "UPDATE ProjectFunding pf "
+                                    "JOIN Projects_Grants pg ON pg.ProjectID = pf.ProjectID "
+                                    "SET pf.TotalFunding = pf.TotalFunding + 1 WHERE pg.GrantID = %s", (10,), ()),
+    ('RollupGrantBalance.professors', """
+        UPDATE ProfessorFunding pf
+        JOIN (
+            SELECT pp.ProfessorID, COUNT(*) AS Links
+            FROM Professors_Projects pp
+            JOIN Projects_Grants pg ON pg.ProjectID = pp.ProjectID
+            WHERE pg.GrantID = %s
+            GROUP BY pp.ProfessorID
+        ) l ON l.ProfessorID = pf.ProfessorID
+        SET pf.TotalFunding = pf.TotalFunding + l.Links""", (10,), ('temporary',)),
+    ('RollupProjectRemoved', """
+        UPDATE ProfessorFunding pf
+        JOIN Professors_Projects pp ON pp.ProfessorID = pf.ProfessorID
+        JOIN ProjectFunding prf ON prf.ProjectID = pp.ProjectID
+        SET pf.ProjectCount = pf.ProjectCount - 1
+        WHERE pp.ProjectID = %s""", (10,), ()),
+    ('RollupAgencyRemoved', """
+        SELECT pg.ProjectID, COUNT(*) AS Links, SUM(g.Amount) AS Amount
+        FROM Projects_Grants pg
+        JOIN Grants g ON g.GrantID = pg.GrantID
+        WHERE g.FundingAgencyID = %s
+        GROUP BY pg.ProjectID""", (1,), ('temporary', 'filesort')),
+    ('search.fulltext', "SELECT ProfessorID FROM Professors "
+                        "WHERE MATCH(Name, Department, Email) AGAINST (%s IN BOOLEAN MODE)", ('+prof*',), ()),
+    ('search.short_prefix', "SELECT ProjectID, Title FROM Projects WHERE Title LIKE %s ESCAPE '!' "
+                            "ORDER BY Title LIMIT %s", ('pr%', 10), ())
+]
+
+
+def plan_queries():
+    """Return ``(name, query, params, allowed)`` for every checked statement."""
+    queries = []
+    for endpoint, args, allowed in LIST_CHECKS:
+        source, key_columns, columns, filters, default_sort = LIST_ENDPOINTS[endpoint]
+        args = dict(args, limit=backend.DEFAULT_PAGE_SIZE)
+        if 'cursor' in args:
+            args['cursor'] = backend.encode_cursor(*args['cursor'])
+        query, params, _, _ = backend.build_list_query(source, key_columns, columns, filters, args, default_sort)
+        label = '&'.join(f"{k}={v}" for k, v in args.items() if k not in ('limit', 'cursor'))
+        if 'cursor' in args:
+            label += '&cursor' if label else 'cursor'
+        queries.append((f"/{endpoint}?{label}" if label else f"/{endpoint}", query, params, allowed))
+    for name, query, params, allowed in STATEMENT_CHECKS:
+        queries.append((name, ' '.join(query.split()), params, allowed))
+    return queries
+
+
+def explain(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    return [{
+        'table': row['table'],
+        'type': row['type'],
+        'key': row['key'],
+        'rows': row['rows'],
+        'extra': row['Extra'] or ''
+    } for row in cursor.fetchall()]
+
+
+def plan_problems(plan, allowed):
+    """Return the full scans and filesorts in a plan that are not explicitly allowed."""
+    problems = []
+    for step in plan:
+        table = step['table'] or ''
+        derived = table.startswith('<')
+        if step['type'] == 'ALL' and not derived and f"scan:{table}" not in allowed:
+            problems.append(f"full table scan on {table}")
+        if 'Using filesort' in step['extra'] and 'filesort' not in allowed:
+            problems.append(f"filesort on {table}")
+        if 'Using temporary' in step['extra'] and 'temporary' not in allowed:
+            problems.append(f"temporary table on {table}")
+    return problems
+
+
+def plan_shape(plan):
+    return [(step['table'], step['type'], step['key']) for step in plan]
+
+
+def run_checks(connection, baseline=None):
+    """EXPLAIN every checked statement; return the captured plans and any failures."""
+    cursor = connection.cursor(dictionary=True)
+    plans = {}
+    failures = []
+    changes = []
+    try:
+        for name, query, params, allowed in plan_queries():
+            plan = explain(cursor, query, params)
+            plans[name] = plan
+            for problem in plan_problems(plan, allowed):
+                failures.append(f"{name}: {problem}")
+            if baseline and name in baseline and plan_shape(baseline[name]) != plan_shape(plan):
+                changes.append(f"{name}: plan changed from {plan_shape(baseline[name])} to {plan_shape(plan)}")
+    finally:
+        cursor.close()
+    return plans, failures, changes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Check the EXPLAIN plan of every URGAS query for full scans and filesorts.")
+    parser.add_argument('--populate', action='store_true',
+                        help="reset the configured database and seed it before checking")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file (default: explain_baseline.json)")
+    parser.add_argument('--update-baseline', action='store_true', help="write the captured plans to the baseline")
+    parser.add_argument('--strict', action='store_true', help="also fail when a plan differs from the baseline")
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    # The checks read MySQL's EXPLAIN output; SQLite plans have a different shape
+    if backend.repository.engine != 'mysql':
+        print(f"explain_check.py is MySQL only; DB_ENGINE is '{backend.DB_ENGINE}'.")
+        sys.exit(2)
+
+    connection = backend.connect_to_database()
+    try:
+        if args.populate:
+            reset_database(connection)
+            seed_database(connection, volumes_from_args(args), seed=args.seed)
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = None
+        plans, failures, changes = run_checks(connection, baseline)
+    finally:
+        connection.close()
+
+    for change in changes:
+        print(f"CHANGED  {change}")
+    for failure in failures:
+        print(f"FAIL     {failure}")
+    print(f"{len(plans)} plans checked, {len(failures)} failures, {len(changes)} changed plans.")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(plans, f, indent=2, sort_keys=True, default=str)
+        print(f"Baseline written to {args.baseline}.")
+
+    sys.exit(1 if failures or (args.strict and changes) else 0)
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+
+class TooManySubscribers(Exception):
+    """Raised when a broadcaster already has its maximum number of subscribers."""
+
+
+class Subscription:
+    """One subscriber's queue of events; ``closed`` is set once it fell too far behind."""
+
+    def __init__(self, size):
+        self.events = queue.Queue(size)
+        self.closed = False
+
+
+class Broadcaster:
+    """Fans the events of a single poller out to every subscriber.
+
+    A background thread calls ``poll(version)`` every ``interval`` seconds
+    while anyone is subscribed; ``poll`` returns the new version and the
+    events since ``version`` (``None`` asks for the current version only).
+    The version is read before the first subscription is returned and kept
+    while nobody listens, so no change is skipped when viewers come back.
+    Each event is read from the source once and queued for every
+    subscriber, so the cost of a change does not grow with the number of
+    viewers. A subscriber whose queue is full is closed rather than
+    blocking the others; it can reconnect and resume from its last event.
+    At most ``max_subscribers`` are registered at once (0 for no limit).
+    """
+
+    def __init__(self, poll, interval=1.0, queue_size=100, max_subscribers=0):
+        self.poll = poll
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._thread = None
+        self.version = None
+
+        self._polls = 0
+        self._errors = 0
+        self._published = 0
+        self._dropped = 0
+        self._rejected = 0
+
+    def subscribe(self):
+        """Register a subscriber and start the poller if it is not running.
+
+        Events after ``version`` at the time of the call are delivered.
+        Raises TooManySubscribers when ``max_subscribers`` are registered.
+        """
+        subscription = Subscription(self.queue_size)
+        with self._cond:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                self._rejected += 1
+                raise TooManySubscribers(f"At most {self.max_subscribers} live update streams are served at once.")
+            if self.version is None:
+                self.version, _ = self.poll(None)
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        """Queue ``event`` for every subscriber, closing those that are full."""
+        with self._cond:
+            self._published += 1
+            for subscription in list(self._subscribers):
+                try:
+                    subscription.events.put_nowait(event)
+                except queue.Full:
+                    subscription.closed = True
+                    self._subscribers.discard(subscription)
+                    self._dropped += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                'subscribers': len(self._subscribers),
+                'version': self.version,
+                'polls': self._polls,
+                'poll_errors': self._errors,
+                'events_published': self._published,
+                'subscribers_dropped': self._dropped,
+                'subscribers_rejected': self._rejected
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._subscribers:
+                    self._cond.wait()
+            try:
+                version, events = self.poll(self.version)
+            except Exception as e:
+                print(f"Error polling for live updates: {e}")
+                with self._cond:
+                    self._errors += 1
+            else:
+                with self._cond:
+                    self._polls += 1
+                for event in events:
+                    self.publish(event)
+                self.version = version
+            time.sleep(self.interval)
@@ -0,0 +1,244 @@
+import threading
+import time
+from collections import defaultdict
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram bucket boundaries
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[tuple(labels)] += amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, format_labels(self.labelnames, labels), value) for labels, value in values]
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum, per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._sums = defaultdict(float)
+
+    def observe(self, labels=(), value=0):
+        labels = tuple(labels)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * len(self.buckets)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._sums[labels] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = sorted((labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items())
+        samples = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket",
+                                format_labels(self.labelnames, labels, [('le', format_value(bound))]), cumulative))
+            samples.append((f"{self.name}_sum", format_labels(self.labelnames, labels), total))
+            samples.append((f"{self.name}_count", format_labels(self.labelnames, labels), cumulative))
+        return samples
+
+
+class StatsGauges:
+    """Exposes every numeric entry of a ``stats()`` dict as a gauge named ``<prefix>_<key>``."""
+
+    kind = 'gauge'
+
+    def __init__(self, prefix, documentation, stats):
+        self.prefix = prefix
+        self.documentation = documentation
+        self.stats = stats
+
+    def families(self):
+        return [(f"{self.prefix}_{key}", value) for key, value in sorted(self.stats().items())
+                if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+
+class MetricsRegistry:
+    """Holds the metrics of the process and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def stats_gauges(self, prefix, documentation, stats):
+        return self._register(StatsGauges(prefix, documentation, stats))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            if isinstance(metric, StatsGauges):
+                for name, value in metric.families():
+                    lines.append(f"# HELP {name} {metric.documentation} ({name[len(metric.prefix) + 1:]})")
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name} {format_value(value)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+class InstrumentedCursor:
+    """Wraps a DB-API cursor and reports each statement once it is done with.
+
+    A statement is done when the next one is executed or the cursor closes,
+    so the report covers both its execute time and the time spent fetching
+    its rows. ``on_statement`` is called as
+    ``on_statement(context, query, params, execute_seconds, fetch_seconds, rows, many)``,
+    where ``context`` is what ``context()`` returned when the statement started.
+    """
+
+    def __init__(self, cursor, on_statement, context):
+        self._cursor = cursor
+        self._on_statement = on_statement
+        self._context = context
+        self._statement = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            if self._statement is not None:
+                self._statement['rows'] += 1
+            yield row
+
+    def execute(self, query, params=None, *args, **kwargs):
+        return self._run(self._cursor.execute, query, params, False, args, kwargs)
+
+    def executemany(self, query, seq_params, *args, **kwargs):
+        return self._run(self._cursor.executemany, query, seq_params, True, args, kwargs)
+
+    def callproc(self, procname, args=()):
+        self._finish()
+        self._begin(f"CALL {procname}", args, False)
+        start = time.perf_counter()
+        try:
+            return self._cursor.callproc(procname, args)
+        finally:
+            self._statement['execute'] = time.perf_counter() - start
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is not None and self._statement is not None:
+            self._statement['rows'] += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._fetch(lambda: self._cursor.fetchmany(*args, **kwargs))
+        if self._statement is not None:
+            self._statement['rows'] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        if self._statement is not None:
+            self._statement['rows'] += len(rows)
+        return rows
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def _begin(self, query, params, many):
+        self._statement = {'context': self._context(), 'query': query, 'params': params, 'many': many,
+                           'execute': 0.0, 'fetch': 0.0, 'rows': 0}
+
+    def _run(self, method, query, params, many, args, kwargs):
+        self._finish()
+        self._begin(query, params, many)
+        start = time.perf_counter()
+        try:
+            return method(query, params, *args, **kwargs)
+        finally:
+            self._statement['execute'] = time.perf_counter() - start
+
+    def _fetch(self, method):
+        start = time.perf_counter()
+        try:
+            return method()
+        finally:
+            if self._statement is not None:
+                self._statement['fetch'] += time.perf_counter() - start
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            self._on_statement(statement['context'], statement['query'], statement['params'],
+                               statement['execute'], statement['fetch'], statement['rows'], statement['many'])
+
+
+class InstrumentedConnection:
+    """Wraps a DB-API connection so every cursor it opens is an InstrumentedCursor."""
+
+    def __init__(self, connection, on_statement, context=lambda: None):
+        self._connection = connection
+        self._on_statement = on_statement
+        self._context = context
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._on_statement, self._context)
@@ -0,0 +1,355 @@
+from mysql.connector import Error, errorcode
+
+# Message signalled when a conversion targets a missing project
+PROJECT_NOT_FOUND = 'Project not found or already converted to Publication.'
+PROJECT_HAS_PUBLICATION = 'Project already has a publication.'
+
+# Searchable record types: table, ID column, label column, detail expression and
+# FULLTEXT columns. The details match the ones URGAS_sqlite.sql stores in SearchIndex.
+SEARCH_SOURCES = {
+    'professor': ('Professors', 'ProfessorID', 'Name', "CONCAT_WS(', ', Department, Email)",
+                  'Name, Department, Email'),
+    'project': ('Projects', 'ProjectID', 'Title', "CONCAT_WS(' - ', StartDate, EndDate)", 'Title'),
+    'publication': ('Publications', 'PublicationID', 'Title', "NULL", 'Title')
+}
+
+# Shortest word the MySQL FULLTEXT index holds (innodb_ft_min_token_size)
+FULLTEXT_MIN_WORD = 3
+
+# Newest change log entries checked for uncommitted writes when a reader has no starting version
+CHANGE_WATERMARK_WINDOW = 10000
+
+
+def signal(message):
+    """Return the error a MySQL SIGNAL SQLSTATE '45000' with ``message`` raises."""
+    return Error(msg=message, errno=errorcode.ER_SIGNAL_EXCEPTION, sqlstate='45000')
+
+
+class MySQLRepository:
+    """Data access for the MySQL engine.
+
+    Plain queries are shared by both engines and stay in backend.py; this
+    class holds the operations whose logic differs per engine. On MySQL
+    they are the stored procedures in URGAS_setup.sql. Every operation runs
+    on the caller's cursor and leaves committing to the caller.
+    """
+
+    engine = 'mysql'
+
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self):
+        """Open a new connection to the MySQL database."""
+        import mysql.connector
+        return mysql.connector.connect(**self.config)
+
+    def deduct_grant_amount(self, cursor, grant_id, amount, idempotency_key):
+        """Deduct a grant usage and return the remaining amount (DeductGrantAmount)."""
+        result = cursor.callproc('DeductGrantAmount', (grant_id, amount, idempotency_key, 0))
+        return result[3]
+
+    def convert_project_to_publication(self, cursor, project_id, publication_title):
+        """Replace a project with a publication (ConvertProjectToPublication)."""
+        cursor.callproc('ConvertProjectToPublication', (project_id, publication_title))
+
+    def convert_projects(self, cursor, conversions, preserve_links=False):
+        """Replace each ``(project_id, title)`` project with a publication, set-based.
+
+        Returns ``(publications, skipped)``: the new publication ID of each
+        converted project, and the reason each other project was left alone.
+        The projects are locked in ID order first, so concurrent conversions
+        of the same projects wait for each other instead of deadlocking. With
+        ``preserve_links`` the professors of each project are credited on its
+        publication in Professors_Publications.
+        """
+        return self._convert_projects(cursor, conversions, preserve_links, " FOR UPDATE")
+
+    def _convert_projects(self, cursor, conversions, preserve_links, lock):
+        project_ids = sorted(project_id for project_id, _ in conversions)
+        placeholders = ', '.join(['%s'] * len(project_ids))
+        cursor.execute(f"SELECT pr.ProjectID, pub.PublicationID FROM Projects pr "
+                       f"LEFT JOIN Publications pub ON pub.ProjectID = pr.ProjectID "
+                       f"WHERE pr.ProjectID IN ({placeholders}) ORDER BY pr.ProjectID{lock}", project_ids)
+        found = dict(cursor.fetchall())
+        skipped = {}
+        for project_id in project_ids:
+            if project_id not in found:
+                skipped[project_id] = PROJECT_NOT_FOUND
+            elif found[project_id] is not None:
+                skipped[project_id] = PROJECT_HAS_PUBLICATION
+        rows = [(title, project_id) for project_id, title in conversions if project_id not in skipped]
+        if not rows:
+            return {}, skipped
+
+        converted = sorted(project_id for _, project_id in rows)
+        placeholders = ', '.join(['%s'] * len(converted))
+        cursor.executemany("INSERT INTO Publications (Title, ProjectID) VALUES (%s, %s)", rows)
+        cursor.execute(f"SELECT ProjectID, PublicationID FROM Publications WHERE ProjectID IN ({placeholders})",
+                       converted)
+        publications = dict(cursor.fetchall())
+        if preserve_links:
+            cursor.execute(f"INSERT INTO Professors_Publications (ProfessorID, PublicationID) "
+                           f"SELECT pp.ProfessorID, pub.PublicationID FROM Professors_Projects pp "
+                           f"JOIN Publications pub ON pub.ProjectID = pp.ProjectID "
+                           f"WHERE pp.ProjectID IN ({placeholders})", converted)
+        cursor.execute(f"DELETE FROM Projects WHERE ProjectID IN ({placeholders})", converted)
+        return publications, skipped
+
+    def rebuild_funding_rollups(self, cursor):
+        """Recompute every funding rollup from the base tables (RebuildFundingRollups)."""
+        cursor.callproc('RebuildFundingRollups', ())
+
+    def claim_grants(self, cursor, assignments):
+        """Link each ``(grant_id, project_id)`` unless the grant is already linked to a project.
+
+        Returns the IDs of grants that were already linked; when there are
+        any the caller must roll back. The grants are locked first, so
+        concurrent claims of the same grant, and links made through the
+        foreign key check, wait for each other.
+        """
+        grant_ids = sorted({grant_id for grant_id, _ in assignments})
+        placeholders = ', '.join(['%s'] * len(grant_ids))
+        cursor.execute(f"SELECT GrantID FROM Grants WHERE GrantID IN ({placeholders}) ORDER BY GrantID FOR UPDATE",
+                       grant_ids)
+        cursor.fetchall()
+        # A locking read sees the latest committed links, not the transaction's snapshot
+        cursor.execute(f"SELECT DISTINCT GrantID FROM Projects_Grants WHERE GrantID IN ({placeholders}) "
+                       f"LOCK IN SHARE MODE", grant_ids)
+        taken = [row[0] for row in cursor.fetchall()]
+        if not taken:
+            cursor.executemany("INSERT INTO Projects_Grants (ProjectID, GrantID) VALUES (%s, %s)",
+                               [(project_id, grant_id) for grant_id, project_id in assignments])
+        return taken
+
+    def begin_snapshot(self, cursor):
+        """Start a read-only transaction whose reads all see one consistent snapshot."""
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+    def change_watermark(self, connection, since=None, limit=CHANGE_WATERMARK_WINDOW):
+        """Start a snapshot and return the change log version it can safely be read up to.
+
+        Versions are allocated as changes are written, so an entry can commit
+        after entries numbered above it. The ``limit`` entries after ``since``
+        (the newest ``limit`` when ``since`` is None) are read uncommitted just
+        before the snapshot starts, and the watermark stops below the first
+        one the snapshot does not see. A reader that only goes up to the
+        watermark never skips an entry that commits later. Ends any open
+        transaction on ``connection``; the snapshot is left open for the caller.
+        """
+        connection.rollback()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL READ UNCOMMITTED")
+            if since is None:
+                cursor.execute("SELECT Version FROM ChangeLog ORDER BY Version DESC LIMIT %s", (limit,))
+                written = sorted(row[0] for row in cursor.fetchall())
+            else:
+                cursor.execute("SELECT Version FROM ChangeLog WHERE Version > %s ORDER BY Version LIMIT %s",
+                               (since, limit))
+                written = [row[0] for row in cursor.fetchall()]
+            connection.rollback()
+            self.begin_snapshot(cursor)
+            if not written:
+                return since or 0
+            cursor.execute("SELECT Version FROM ChangeLog WHERE Version BETWEEN %s AND %s",
+                           (written[0], written[-1]))
+            committed = {row[0] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+        for version in written:
+            if version not in committed:
+                return version - 1
+        return written[-1]
+
+    def search(self, cursor, words, types, limit, item_id=None):
+        """Return up to ``limit`` ranked matches as ``(type, id, label, detail, score)`` rows.
+
+        Every word is matched as a prefix and all must match. ``score`` orders
+        the results: an exact ID match first, then labels starting with the
+        first word, then by relevance. Uses the FULLTEXT indexes, or the label
+        indexes when a word is too short for the FULLTEXT index.
+        """
+        branches = []
+        params = []
+        for kind in types:
+            table, id_column, label, detail, fulltext = SEARCH_SOURCES[kind]
+            columns = f"'{kind}' AS type, {id_column} AS id, {label} AS label, {detail} AS detail"
+            if item_id is not None:
+                branches.append(f"(SELECT {columns}, 1000 AS score FROM {table} WHERE {id_column} = %s)")
+                params.append(item_id)
+            if min(len(word) for word in words) < FULLTEXT_MIN_WORD:
+                branches.append(f"(SELECT {columns}, 100 AS score FROM {table} "
+                                f"WHERE {label} LIKE %s ESCAPE '!' ORDER BY {label} LIMIT %s)")
+                params.extend([like_prefix(' '.join(words)), limit])
+            else:
+                against = ' '.join(f"+{word}*" for word in words)
+                branches.append(f"(SELECT {columns}, "
+                                f"({label} LIKE %s ESCAPE '!') * 100 + MATCH({fulltext}) AGAINST (%s IN BOOLEAN MODE) AS score "
+                                f"FROM {table} WHERE MATCH({fulltext}) AGAINST (%s IN BOOLEAN MODE) "
+                                f"ORDER BY score DESC LIMIT %s)")
+                params.extend([like_prefix(words[0]), against, against, limit])
+        cursor.execute(f"SELECT * FROM ({' UNION ALL '.join(branches)}) matches "
+                       f"ORDER BY score DESC, label LIMIT %s", params + [limit * 2])
+        return cursor.fetchall()
+
+
+class SQLiteRepository(MySQLRepository):
+    """Data access for the embedded SQLite engine.
+
+    The triggers are part of URGAS_sqlite.sql; the stored procedures are
+    reproduced here statement for statement and signal the same messages.
+    """
+
+    engine = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        """Open a new connection to the SQLite database, creating it if needed."""
+        from sqlite_engine import connect_sqlite
+        return connect_sqlite(self.path)
+
+    def deduct_grant_amount(self, cursor, grant_id, amount, idempotency_key):
+        if amount is None or amount <= 0:
+            raise signal('Invalid used amount.')
+
+        # Replay a usage that was already recorded under this key
+        if idempotency_key is not None:
+            cursor.execute("SELECT GrantID, RemainingAmount FROM GrantUsage WHERE IdempotencyKey = %s",
+                           (idempotency_key,))
+            previous = cursor.fetchone()
+            if previous is not None:
+                if previous[0] != grant_id:
+                    raise signal('Idempotency key already used for a different grant.')
+                return previous[1]
+
+        # Deduct only if enough remains
+        cursor.execute("UPDATE Grants SET Amount = ROUND(Amount - %s, 2) WHERE GrantID = %s AND Amount >= %s",
+                       (amount, grant_id, amount))
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT 1 FROM Grants WHERE GrantID = %s", (grant_id,))
+            if cursor.fetchone():
+                raise signal('Amount exceeds remaining grant budget.')
+            raise signal('Grant not found.')
+
+        cursor.execute("SELECT Amount FROM Grants WHERE GrantID = %s", (grant_id,))
+        remaining_amount = cursor.fetchone()[0]
+        cursor.execute("INSERT INTO GrantUsage (GrantID, Amount, RemainingAmount, IdempotencyKey) "
+                       "VALUES (%s, %s, %s, %s)", (grant_id, amount, remaining_amount, idempotency_key))
+
+        # Delete the grant once it is fully used
+        if remaining_amount == 0:
+            cursor.execute("DELETE FROM Grants WHERE GrantID = %s", (grant_id,))
+        return remaining_amount
+
+    def convert_project_to_publication(self, cursor, project_id, publication_title):
+        cursor.execute("SELECT 1 FROM Projects WHERE ProjectID = %s", (project_id,))
+        if not cursor.fetchone():
+            raise signal(PROJECT_NOT_FOUND)
+        cursor.execute("INSERT INTO Publications (Title, ProjectID) VALUES (%s, %s)",
+                       (publication_title, project_id))
+        cursor.execute("DELETE FROM Projects WHERE ProjectID = %s", (project_id,))
+
+    def rebuild_funding_rollups(self, cursor):
+        cursor.execute("DELETE FROM ProfessorFunding")
+        cursor.execute("DELETE FROM ProjectFunding")
+        cursor.execute("DELETE FROM AgencyFunding")
+        cursor.execute("""
+            INSERT INTO ProjectFunding (ProjectID, GrantCount, TotalFunding)
+            SELECT pr.ProjectID, COUNT(g.GrantID), COALESCE(SUM(g.Amount), 0)
+            FROM Projects pr
+            LEFT JOIN Projects_Grants pg ON pg.ProjectID = pr.ProjectID
+            LEFT JOIN Grants g ON g.GrantID = pg.GrantID
+            GROUP BY pr.ProjectID
+        """)
+        cursor.execute("""
+            INSERT INTO ProfessorFunding (ProfessorID, ProjectCount, TotalFunding)
+            SELECT p.ProfessorID, COUNT(pp.ProjectID), COALESCE(SUM(pf.TotalFunding), 0)
+            FROM Professors p
+            LEFT JOIN Professors_Projects pp ON pp.ProfessorID = p.ProfessorID
+            LEFT JOIN ProjectFunding pf ON pf.ProjectID = pp.ProjectID
+            GROUP BY p.ProfessorID
+        """)
+        cursor.execute("""
+            INSERT INTO AgencyFunding (AgencyID, GrantCount, TotalGranted)
+            SELECT fa.AgencyID, COUNT(g.GrantID), COALESCE(SUM(g.Amount), 0)
+            FROM FundingAgencies fa
+            LEFT JOIN Grants g ON g.FundingAgencyID = fa.AgencyID
+            GROUP BY fa.AgencyID
+        """)
+
+    def convert_projects(self, cursor, conversions, preserve_links=False):
+        # SQLite has no row locks: the INSERT takes the database write lock, and a
+        # project deleted before then fails the foreign key check instead
+        return self._convert_projects(cursor, conversions, preserve_links, "")
+
+    def claim_grants(self, cursor, assignments):
+        # SQLite has no row locks: the first INSERT takes the database write lock,
+        # so links committed by a concurrent claim are visible to the check after it
+        cursor.executemany("INSERT INTO Projects_Grants (ProjectID, GrantID) VALUES (%s, %s)",
+                           [(project_id, grant_id) for grant_id, project_id in assignments])
+        grant_ids = sorted({grant_id for grant_id, _ in assignments})
+        placeholders = ', '.join(['%s'] * len(grant_ids))
+        cursor.execute(f"SELECT GrantID FROM Projects_Grants WHERE GrantID IN ({placeholders}) "
+                       f"GROUP BY GrantID HAVING COUNT(*) > 1", grant_ids)
+        return [row[0] for row in cursor.fetchall()]
+
+    def begin_snapshot(self, cursor):
+        # Reads outside a transaction each see the latest commit; in WAL mode the
+        # first read after BEGIN fixes the snapshot until the transaction ends
+        cursor.execute("BEGIN")
+
+    def change_watermark(self, connection, since=None, limit=CHANGE_WATERMARK_WINDOW):
+        # Writers hold the database lock until they commit, so every version the
+        # snapshot can see is below any version still being written
+        connection.rollback()
+        cursor = connection.cursor()
+        try:
+            self.begin_snapshot(cursor)
+            if since is None:
+                cursor.execute("SELECT MAX(Version) FROM ChangeLog")
+            else:
+                cursor.execute("SELECT MAX(Version) FROM (SELECT Version FROM ChangeLog WHERE Version > %s "
+                               "ORDER BY Version LIMIT %s)", (since, limit))
+            latest = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        return max(latest or 0, since or 0)
+
+    def search(self, cursor, words, types, limit, item_id=None):
+        # Every word is a quoted prefix term, so user input cannot inject FTS5 syntax
+        match = ' '.join(f'"{word}"*' for word in words)
+        placeholders = ', '.join(['%s'] * len(types))
+        rows = []
+        if item_id is not None:
+            for kind in types:
+                # Rowids are ID * 4 plus 1, 2 or 3 for a professor, project or publication
+                cursor.execute("SELECT label, detail FROM SearchIndex WHERE rowid = %s",
+                               (item_id * 4 + list(SEARCH_SOURCES).index(kind) + 1,))
+                row = cursor.fetchone()
+                if row:
+                    rows.append((kind, item_id, row[0], row[1], 1000))
+        cursor.execute(f"""
+            SELECT type, item_id, label, detail, (label LIKE %s ESCAPE '!') * 100 - bm25(SearchIndex) AS score
+            FROM SearchIndex
+            WHERE SearchIndex MATCH %s AND type IN ({placeholders})
+            ORDER BY score DESC, label
+            LIMIT %s
+        """, [like_prefix(words[0]), match] + list(types) + [limit * 2])
+        return rows + cursor.fetchall()
+
+
+def like_prefix(text):
+    """Return a LIKE pattern (escaped with '!') matching values that start with ``text``."""
+    return text.replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%'
+
+
+def create_repository(engine, mysql_config=None, sqlite_path='urgas.db'):
+    """Return the repository for ``engine`` ('mysql' or 'sqlite')."""
+    if engine == 'mysql':
+        return MySQLRepository(mysql_config or {})
+    if engine == 'sqlite':
+        return SQLiteRepository(sqlite_path)
+    raise ValueError(f"Unknown DB_ENGINE '{engine}'. Use 'mysql' or 'sqlite'.")
@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'mimetype', 'etag', 'expires', 'tables', 'encoded'])
+
+
+class ResponseCache:
+    """A bounded LRU cache of response bodies, tagged by the tables they read.
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once ``max_entries`` or ``max_bytes`` is exceeded. Writers call
+    ``invalidate`` with the tables they changed, which drops every entry that
+    depends on one of them. Each table also carries a generation counter so a
+    response computed while a write was in flight is never stored.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_table = defaultdict(set)
+        self._generations = defaultdict(int)
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        """Return the live entry for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def generations(self, tables):
+        """Snapshot the generation counters of ``tables`` before computing a response."""
+        with self._lock:
+            return tuple(self._generations[table] for table in tables)
+
+    def put(self, key, body, mimetype, tables, generations):
+        """Store a response body and return its entry.
+
+        The entry is only kept if none of ``tables`` was invalidated since
+        ``generations`` was taken; it is returned either way so the caller
+        can still send it with an ETag.
+        """
+        entry = CachedResponse(body, mimetype, hashlib.sha1(body).hexdigest(),
+                               time.monotonic() + self.ttl, tuple(tables), {})
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if tuple(self._generations[table] for table in tables) != tuple(generations):
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for table in tables:
+                self._keys_by_table[table].add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+        return entry
+
+    def encoded_body(self, key, entry, encoding, encode):
+        """Return ``entry``'s body compressed with ``encoding``, compressing it once per entry.
+
+        The compressed body is kept with the entry and counts towards ``max_bytes``.
+        """
+        body = entry.encoded.get(encoding)
+        if body is not None:
+            return body
+        body = encode(entry.body)
+        with self._lock:
+            if encoding not in entry.encoded and self._entries.get(key) is entry:
+                entry.encoded[encoding] = body
+                self._bytes += len(body)
+        return body
+
+    def invalidate(self, tables):
+        """Drop every entry that depends on any of ``tables``."""
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+                for key in list(self._keys_by_table.pop(table, ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        self._invalidations += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            for table in list(self._generations):
+                self._generations[table] += 1
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return a snapshot of cache counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body) + sum(len(body) for body in entry.encoded.values())
+        for table in entry.tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
@@ -0,0 +1,171 @@
+import argparse
+import random
+from datetime import date, datetime, timedelta
+
+# Default number of rows generated per table
+DEFAULT_VOLUMES = {
+    'agencies': 50,
+    'professors': 5000,
+    'projects': 10000,
+    'grants': 20000,
+    'professors_per_project': 3,  # Average professors linked to each project
+    'grants_per_project': 2,  # Average grants linked to each project
+    'audit_rows': 50000
+}
+
+# Tables cleared by reset_database, children before parents
+SEED_TABLES = [
+    'ChangeLog', 'GrantUsage', 'ProjectAudit', 'Professors_Publications', 'Publications', 'Professors_Projects',
+    'Projects_Grants', 'ProjectFunding', 'ProfessorFunding', 'AgencyFunding', 'Grants', 'Projects', 'Professors',
+    'FundingAgencies'
+]
+
+DEPARTMENTS = ['Biology', 'Chemistry', 'Computer Science', 'Economics', 'Engineering',
+               'History', 'Mathematics', 'Medicine', 'Physics', 'Psychology']
+TITLE_WORDS = ['Adaptive', 'Analysis', 'Climate', 'Data', 'Dynamics', 'Energy', 'Genomic', 'Learning',
+               'Models', 'Networks', 'Quantum', 'Robust', 'Scalable', 'Systems', 'Urban', 'Vision']
+
+
+def reset_database(connection):
+    """Remove every row from the URGAS tables."""
+    if getattr(connection, 'engine', None) == 'sqlite':
+        # The ledger triggers forbid deletes and SQLite has no TRUNCATE, so start from a fresh schema
+        connection.reset_schema()
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in SEED_TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def insert_rows(cursor, query, rows, batch_size):
+    """Insert rows with batched executemany."""
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(query, rows[start:start + batch_size])
+
+
+def fetch_ids(cursor, table, column):
+    cursor.execute(f"SELECT {column} FROM {table} ORDER BY {column}")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def random_title(rng):
+    return ' '.join(rng.sample(TITLE_WORDS, 3))
+
+
+def seed_database(connection, volumes=None, seed=42, batch_size=1000):
+    """Fill the database with a reproducible synthetic dataset.
+
+    Rows go through the normal tables, so the triggers (budgets, rollups,
+    duplicate checks) run exactly as they do in production. Returns the
+    number of rows generated per table.
+    """
+    volumes = dict(DEFAULT_VOLUMES, **(volumes or {}))
+    rng = random.Random(seed)
+    cursor = connection.cursor()
+    counts = {}
+    try:
+        insert_rows(cursor, "INSERT INTO FundingAgencies (Name, Budget) VALUES (%s, %s)",
+                    [(f"Agency {i}", rng.randrange(10_000_000, 500_000_000)) for i in range(volumes['agencies'])],
+                    batch_size)
+        agency_ids = fetch_ids(cursor, 'FundingAgencies', 'AgencyID')
+
+        insert_rows(cursor, "INSERT INTO Professors (Name, Department, Email) VALUES (%s, %s, %s)",
+                    [(f"Professor {i}", rng.choice(DEPARTMENTS), f"professor{i}.{seed}@example.edu")
+                     for i in range(volumes['professors'])],
+                    batch_size)
+        professor_ids = fetch_ids(cursor, 'Professors', 'ProfessorID')
+
+        today = date.today()
+        projects = []
+        for _ in range(volumes['projects']):
+            start = today - timedelta(days=rng.randrange(0, 3650))
+            end = start + timedelta(days=rng.randrange(180, 1825)) if rng.random() < 0.8 else None
+            projects.append((random_title(rng), start, end))
+        insert_rows(cursor, "INSERT INTO Projects (Title, StartDate, EndDate) VALUES (%s, %s, %s)",
+                    projects, batch_size)
+        project_ids = fetch_ids(cursor, 'Projects', 'ProjectID')
+
+        insert_rows(cursor, "INSERT INTO Grants (Amount, FundingAgencyID) VALUES (%s, %s)",
+                    [(rng.randrange(5_000, 500_000), rng.choice(agency_ids)) for _ in range(volumes['grants'])],
+                    batch_size)
+        grant_ids = fetch_ids(cursor, 'Grants', 'GrantID')
+
+        professor_links = set()
+        grant_links = set()
+        max_professors = max(1, 2 * volumes['professors_per_project'] - 1)
+        max_grants = 2 * volumes['grants_per_project']
+        for project_id in project_ids:
+            count = min(len(professor_ids), rng.randint(1, max_professors))
+            for professor_id in rng.sample(professor_ids, count):
+                professor_links.add((professor_id, project_id))
+            count = min(len(grant_ids), rng.randint(0, max_grants))
+            for grant_id in rng.sample(grant_ids, count):
+                grant_links.add((project_id, grant_id))
+        insert_rows(cursor, "INSERT INTO Professors_Projects (ProfessorID, ProjectID) VALUES (%s, %s)",
+                    sorted(professor_links), batch_size)
+        insert_rows(cursor, "INSERT INTO Projects_Grants (ProjectID, GrantID) VALUES (%s, %s)",
+                    sorted(grant_links), batch_size)
+
+        now = datetime.now().replace(microsecond=0)
+        audit_rows = []
+        for _ in range(volumes['audit_rows']):
+            start = today - timedelta(days=rng.randrange(0, 3650))
+            audit_rows.append((rng.choice(project_ids), random_title(rng), start, None,
+                               rng.choice(['Updated', 'Deleted']),
+                               now - timedelta(seconds=rng.randrange(0, 730 * 86400))))
+        insert_rows(cursor, "INSERT INTO ProjectAudit (ProjectID, Title, StartDate, EndDate, Action, Timestamp) "
+                            "VALUES (%s, %s, %s, %s, %s, %s)",
+                    audit_rows, batch_size)
+
+        connection.commit()
+        for table in SEED_TABLES:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        counts = {
+            'FundingAgencies': len(agency_ids),
+            'Professors': len(professor_ids),
+            'Projects': len(project_ids),
+            'Grants': len(grant_ids),
+            'Professors_Projects': len(professor_links),
+            'Projects_Grants': len(grant_links),
+            'ProjectAudit': len(audit_rows)
+        }
+    finally:
+        cursor.close()
+    return counts
+
+
+def add_volume_arguments(parser):
+    """Add a --<volume> option for every entry of DEFAULT_VOLUMES."""
+    for name, default in DEFAULT_VOLUMES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, dest=name,
+                            help=f"default: {default}")
+    parser.add_argument('--seed', type=int, default=42, help="random seed (default: 42)")
+
+
+def volumes_from_args(args):
+    return {name: getattr(args, name) for name in DEFAULT_VOLUMES}
+
+
+if __name__ == '__main__':
+    from backend import connect_to_database
+
+    parser = argparse.ArgumentParser(description="Seed the configured URGAS database with synthetic data.")
+    add_volume_arguments(parser)
+    parser.add_argument('--reset', action='store_true', help="delete all existing rows first")
+    args = parser.parse_args()
+
+    connection = connect_to_database()
+    try:
+        if args.reset:
+            reset_database(connection)
+        for table, count in seed_database(connection, volumes_from_args(args), seed=args.seed).items():
+            print(f"{table}: {count} rows")
+    finally:
+        connection.close()
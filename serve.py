@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+load_dotenv()
+
+# Production server configuration. Each worker process runs SERVER_THREADS request
+# threads with its own connection pool, response cache and collaboration graph.
+SERVER_CONFIG = {
+    'bind': os.getenv('SERVER_BIND', '0.0.0.0:5000'),
+    'workers': int(os.getenv('SERVER_WORKERS', multiprocessing.cpu_count())),
+    'worker_class': 'gthread',
+    'threads': int(os.getenv('SERVER_THREADS', 8)),
+    'timeout': int(os.getenv('SERVER_TIMEOUT', 60)),
+    'graceful_timeout': int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30)),
+    'keepalive': int(os.getenv('SERVER_KEEPALIVE', 5)),
+    'max_requests': int(os.getenv('SERVER_MAX_REQUESTS', 10000)),
+    'max_requests_jitter': int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 1000)),
+    'accesslog': os.getenv('SERVER_ACCESS_LOG'),
+    'errorlog': '-'
+}
+
+# With several workers, each one checks the change log for the others' writes
+if SERVER_CONFIG['workers'] > 1:
+    os.environ.setdefault('CACHE_SYNC_SECONDS', '1')
+
+# Each live balance stream holds a thread; leave at least half of them for the API
+os.environ.setdefault('LIVE_MAX_SUBSCRIBERS', str(max(1, SERVER_CONFIG['threads'] // 2)))
+
+
+def watch_for_shutdown(worker, backend):
+    """Tell open event streams to end once the worker stops taking requests."""
+    while worker.alive:
+        time.sleep(1)
+    backend.draining.set()
+
+
+def post_worker_init(worker):
+    """Warm the worker up before it accepts its first request."""
+    import backend
+    summary = backend.warm_up()
+    worker.log.info("Worker %s warmed up: %s connections, %s reads primed in %ss",
+                    worker.pid, summary['connections'], summary['primed'], summary['seconds'])
+    threading.Thread(target=watch_for_shutdown, args=(worker, backend), name='shutdown-watch',
+                     daemon=True).start()
+
+
+def worker_exit(server, worker):
+    """Close the worker's idle database connections."""
+    import backend
+    backend.pool.dispose()
+
+
+class URGASServer(BaseApplication):
+    """Runs the Flask app under gunicorn with threaded worker processes.
+
+    Workers stop accepting on SIGTERM and finish their requests within
+    ``graceful_timeout`` seconds; each is replaced after about
+    ``max_requests`` requests. SIGHUP replaces all workers without downtime.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+        self.cfg.set('post_worker_init', post_worker_init)
+        self.cfg.set('worker_exit', worker_exit)
+
+    def load(self):
+        from backend import app
+        return app
+
+
+if __name__ == '__main__':
+    URGASServer(SERVER_CONFIG).run()
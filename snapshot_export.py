@@ -0,0 +1,279 @@
+import argparse
+import itertools
+import json
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Snapshot configuration
+SNAPSHOT_CONFIG = {
+    'snapshot_dir': os.getenv('SNAPSHOT_DIR', 'snapshots'),
+    'compression': os.getenv('SNAPSHOT_COMPRESSION', 'zstd'),
+    'chunk_size': int(os.getenv('SNAPSHOT_CHUNK_SIZE', 50000)),
+    'append_overlap': int(os.getenv('SNAPSHOT_APPEND_OVERLAP', 1000))
+}
+
+# Exported tables and views: their key columns, and what an incremental snapshot
+# exports of them. 'changes' exports the rows the change log lists since the last
+# snapshot plus the keys of deleted rows, 'appended' the rows added since the last
+# snapshot, 'full' every row again, and None (the views) nothing.
+SNAPSHOT_SOURCES = {
+    'Professors': (('ProfessorID',), 'changes'),
+    'FundingAgencies': (('AgencyID',), 'changes'),
+    'Grants': (('GrantID',), 'changes'),
+    'Projects': (('ProjectID',), 'changes'),
+    'Publications': (('PublicationID',), 'changes'),
+    'Professors_Projects': (('ProfessorID', 'ProjectID'), 'changes'),
+    'Projects_Grants': (('ProjectID', 'GrantID'), 'changes'),
+    'Professors_Publications': (('ProfessorID', 'PublicationID'), 'full'),
+    'ProjectAudit': (('AuditID',), 'appended'),
+    'GrantUsage': (('UsageID',), 'appended'),
+    'ProfessorProjects': (('ProfessorID', 'ProjectID'), None),
+    'ProjectGrantsFunding': (('ProjectID', 'GrantID'), None),
+    'ProfessorsWithoutProjects': (('ProfessorID',), None)
+}
+
+# Arrow types of the columns that are neither integer IDs (named *ID) nor text
+MONEY = pa.decimal128(15, 2)
+COLUMN_TYPES = {
+    'Amount': MONEY,
+    'Budget': MONEY,
+    'RemainingAmount': MONEY,
+    'GrantAmount': MONEY,
+    'StartDate': pa.date32(),
+    'EndDate': pa.date32(),
+    'Timestamp': pa.timestamp('s'),
+    'UsedAt': pa.timestamp('s')
+}
+
+# Snapshot directories are named snapshot-v<version>-<UTC time>, plus -<n> when that is taken
+SNAPSHOT_NAME = re.compile(r'^snapshot-v\d+-\d{8}T\d{6}(-\d+)?$')
+MANIFEST_FILE = 'manifest.json'
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot cannot be taken as requested."""
+
+
+class SnapshotTooOldError(SnapshotError):
+    """Raised when the change log no longer covers the changes since a snapshot."""
+
+
+def column_type(name):
+    if name in COLUMN_TYPES:
+        return COLUMN_TYPES[name]
+    return pa.int64() if name.endswith('ID') else pa.string()
+
+
+def to_array(values, kind):
+    if pa.types.is_decimal(kind):
+        values = [None if v is None else Decimal(v).quantize(Decimal('0.01')) for v in values]
+    elif kind == pa.string():
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values, type=kind)
+
+
+def write_parquet(cursor, query, params, path, chunk_size, compression):
+    """Write the rows of ``query`` to a Parquet file, ``chunk_size`` rows at a time.
+
+    Rows are fetched in chunks and each chunk is written as its own row
+    group, so memory use does not grow with the table. Returns the row count.
+    """
+    count = 0
+    cursor.execute(query, params)
+    names = list(cursor.column_names)
+    schema = pa.schema([(name, column_type(name)) for name in names])
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.write_batch(pa.record_batch(
+                [to_array([row[i] for row in rows], schema.field(i).type) for i in range(len(names))],
+                schema=schema))
+            count += len(rows)
+    return count
+
+
+def logged_keys(keys):
+    """Return the ChangeLog columns holding ``keys``: RowKey, then RowKey2 for a second key."""
+    return ('RowKey', 'RowKey2')[:len(keys)]
+
+
+def changed_rows_condition(keys):
+    """Select rows whose key the change log lists for a table within a version range."""
+    columns = logged_keys(keys)
+    target = keys[0] if len(keys) == 1 else f"({', '.join(keys)})"
+    return (f"{target} IN (SELECT {', '.join(columns)} FROM ChangeLog "
+            f"WHERE TableName = %s AND Version > %s AND Version <= %s)")
+
+
+def read_manifest(snapshot_dir, name):
+    """Return the manifest of the snapshot called ``name``."""
+    if not SNAPSHOT_NAME.match(name or ''):
+        raise SnapshotError(f"'{name}' is not a snapshot name.")
+    path = os.path.join(snapshot_dir, name, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise SnapshotError(f"Snapshot '{name}' does not exist.")
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_snapshots(snapshot_dir):
+    """Return the manifests of every snapshot in ``snapshot_dir``, oldest first."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    names = sorted((name for name in os.listdir(snapshot_dir) if SNAPSHOT_NAME.match(name)),
+                   key=lambda name: (int(name.split('-')[1][1:]), name))
+    return [read_manifest(snapshot_dir, name) for name in names
+            if os.path.exists(os.path.join(snapshot_dir, name, MANIFEST_FILE))]
+
+
+def claim_staging_directory(snapshot_dir, base_name):
+    """Create the temporary directory of a new snapshot; return its name and the directory.
+
+    Snapshots taken at the same version within one second get a numbered
+    suffix. Creating the directory claims the name, so concurrent exports
+    never write to the same one.
+    """
+    for number in itertools.count(1):
+        name = base_name if number == 1 else f"{base_name}-{number}"
+        staging = os.path.join(snapshot_dir, name + '.tmp')
+        if os.path.exists(os.path.join(snapshot_dir, name)):
+            continue
+        try:
+            os.mkdir(staging)
+        except FileExistsError:
+            continue
+        return name, staging
+
+
+def export_snapshot(connection, repository, snapshot_dir, since=None, chunk_size=50000, compression='zstd',
+                    append_overlap=1000):
+    """Export every table and view to Parquet files from one consistent snapshot.
+
+    Everything is read in a single read-only transaction, so the files agree
+    with each other and with the change log ``version`` they are stamped
+    with. With ``since`` (the name of an earlier snapshot) only what changed
+    after it is exported, as described by SNAPSHOT_SOURCES; rows in an
+    incremental snapshot replace the rows with the same key. Appended rows
+    are re-read from ``append_overlap`` IDs back, since IDs are allocated
+    before their transactions commit. The files are written to a temporary
+    directory that is renamed into place once complete. Returns the manifest.
+    """
+    previous = read_manifest(snapshot_dir, since) if since else None
+    os.makedirs(snapshot_dir, exist_ok=True)
+    created_at = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+    # Stamped below any change still being written, so the next incremental snapshot picks it up
+    version = repository.change_watermark(connection)
+    staging = None
+    cursor = connection.cursor()
+    try:
+        if previous:
+            since_version = previous['version']
+            cursor.execute("SELECT MIN(Version) FROM ChangeLog")
+            oldest = cursor.fetchone()[0]
+            if since_version > version or (since_version < version and
+                                           (oldest is None or oldest > since_version + 1)):
+                raise SnapshotTooOldError(f"The change log no longer reaches back to snapshot '{since}'; "
+                                          f"take a full snapshot.")
+
+        name, staging = claim_staging_directory(snapshot_dir, f"snapshot-v{version}-{created_at:%Y%m%dT%H%M%S}")
+        sources = {}
+        for source, (keys, incremental) in SNAPSHOT_SOURCES.items():
+            mode = incremental if previous else 'full'
+            if mode is None:
+                continue
+            order = ', '.join(keys)
+            entry = {'mode': mode, 'file': f"{source}.parquet"}
+            if incremental == 'appended':
+                cursor.execute(f"SELECT MAX({keys[0]}) FROM {source}")
+                entry['last_key'] = cursor.fetchone()[0]
+            if mode == 'changes':
+                query = f"SELECT * FROM {source} WHERE {changed_rows_condition(keys)} ORDER BY {order}"
+                params = (source, since_version, version)
+            elif mode == 'appended':
+                start = max((previous['sources'][source].get('last_key') or 0) - append_overlap, 0)
+                query = f"SELECT * FROM {source} WHERE {keys[0]} > %s ORDER BY {order}"
+                params = (start,)
+            else:
+                query = f"SELECT * FROM {source} ORDER BY {order}"
+                params = ()
+            entry['rows'] = write_parquet(cursor, query, params, os.path.join(staging, entry['file']),
+                                          chunk_size, compression)
+
+            if mode == 'changes':
+                # Keys logged since the last snapshot whose rows no longer exist
+                columns = ', '.join(f"c.{column} AS {key}" for key, column in zip(keys, logged_keys(keys)))
+                match = ' AND '.join(f"t.{key} = c.{column}" for key, column in zip(keys, logged_keys(keys)))
+                entry['deleted_file'] = f"{source}.deleted.parquet"
+                entry['deleted'] = write_parquet(cursor, f"""
+                    SELECT DISTINCT {columns} FROM ChangeLog c
+                    WHERE c.TableName = %s AND c.Version > %s AND c.Version <= %s
+                      AND NOT EXISTS (SELECT 1 FROM {source} t WHERE {match})
+                    ORDER BY {order}""", (source, since_version, version),
+                    os.path.join(staging, entry['deleted_file']), chunk_size, compression)
+            sources[source] = entry
+    except BaseException:
+        # Leave no partial snapshot behind
+        if staging:
+            shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        cursor.close()
+        connection.rollback()
+
+    manifest = {
+        'name': name,
+        'kind': 'incremental' if previous else 'full',
+        'version': version,
+        'since': {'name': previous['name'], 'version': previous['version']} if previous else None,
+        'created_at': created_at.isoformat() + 'Z',
+        'compression': compression,
+        'sources': sources
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, os.path.join(snapshot_dir, name))
+    return manifest
+
+
+if __name__ == '__main__':
+    from backend import connect_to_database, repository
+
+    parser = argparse.ArgumentParser(
+        description="Export the URGAS tables and views to compressed Parquet files from one consistent snapshot.")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_CONFIG['snapshot_dir'],
+                        help=f"directory snapshots are written to (default: {SNAPSHOT_CONFIG['snapshot_dir']})")
+    parser.add_argument('--since', metavar='SNAPSHOT',
+                        help="export only what changed after this earlier snapshot")
+    parser.add_argument('--since-latest', action='store_true',
+                        help="export only what changed after the newest snapshot in the directory")
+    args = parser.parse_args()
+
+    since = args.since
+    if args.since_latest:
+        snapshots = list_snapshots(args.snapshot_dir)
+        since = snapshots[-1]['name'] if snapshots else None
+
+    connection = connect_to_database()
+    try:
+        manifest = export_snapshot(connection, repository, args.snapshot_dir, since,
+                                   SNAPSHOT_CONFIG['chunk_size'], SNAPSHOT_CONFIG['compression'],
+                                   SNAPSHOT_CONFIG['append_overlap'])
+    except SnapshotError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    finally:
+        connection.close()
+
+    print(f"{manifest['name']} ({manifest['kind']}, version {manifest['version']})")
+    for source, entry in manifest['sources'].items():
+        deleted = f", {entry['deleted']} deleted" if 'deleted' in entry else ''
+        print(f"  {source}: {entry['rows']} rows{deleted}")
@@ -0,0 +1,213 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector import Error, errorcode
+
+# Schema applied to a new database file
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'URGAS_sqlite.sql')
+
+# Declared column types are converted back to the Python types mysql.connector returns
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()).quantize(Decimal('0.01')))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+
+# MySQL spellings rewritten for SQLite
+DIALECT_REWRITES = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'^\s*ANALYZE\s+TABLE\b', re.IGNORECASE), 'ANALYZE')
+]
+
+# Leading text of SQLite errors and the MySQL error code each corresponds to
+ERROR_CODES = [
+    ('UNIQUE constraint failed', errorcode.ER_DUP_ENTRY),
+    ('FOREIGN KEY constraint failed', errorcode.ER_NO_REFERENCED_ROW_2),
+    ('NOT NULL constraint failed', errorcode.ER_BAD_NULL_ERROR),
+    ('database is locked', errorcode.ER_LOCK_WAIT_TIMEOUT)
+]
+
+# In-memory databases are shared between connections by name and kept alive by one open connection
+_memory_keepers = {}
+_memory_lock = threading.Lock()
+
+
+def translate_query(query):
+    for pattern, replacement in DIALECT_REWRITES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def translate_error(e):
+    """Return the mysql.connector Error matching a sqlite3 error.
+
+    Messages raised with RAISE(ABORT, ...) in the triggers, the counterpart of
+    SIGNAL SQLSTATE '45000', keep their text so callers can match on it.
+    """
+    message = str(e)
+    for prefix, errno in ERROR_CODES:
+        if message.startswith(prefix):
+            return Error(msg=message, errno=errno)
+    if isinstance(e, sqlite3.IntegrityError):
+        return Error(msg=message, errno=errorcode.ER_SIGNAL_EXCEPTION, sqlstate='45000')
+    return Error(msg=message)
+
+
+class SQLiteCursor:
+    """A sqlite3 cursor with the parts of the mysql.connector cursor API backend.py uses."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self.lastrowid = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    def execute(self, query, params=None):
+        try:
+            self._cursor.execute(translate_query(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise translate_error(e) from e
+        self.lastrowid = self._cursor.lastrowid
+
+    def executemany(self, query, seq_params):
+        """Run a statement for each parameter set.
+
+        Like a multi-row INSERT in MySQL, ``lastrowid`` is the ID of the first
+        row inserted; rows written by one connection get consecutive IDs.
+        """
+        query = translate_query(query)
+        first = None
+        try:
+            for params in seq_params:
+                self._cursor.execute(query, tuple(params))
+                if first is None:
+                    first = self._cursor.lastrowid
+        except sqlite3.Error as e:
+            raise translate_error(e) from e
+        self.lastrowid = first
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        return [self._row(row) for row in rows]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """A sqlite3 connection with the parts of the mysql.connector connection API backend.py uses."""
+
+    engine = 'sqlite'
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._closed = False
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._connection.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def is_connected(self):
+        if self._closed:
+            return False
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def ping(self, reconnect=False):
+        if not self.is_connected():
+            raise Error(msg="SQLite connection is closed.")
+
+    def close(self):
+        self._closed = True
+        self._connection.close()
+
+    def reset_schema(self):
+        """Drop every table, view and trigger and recreate the schema."""
+        self._connection.rollback()
+        self._connection.execute("PRAGMA foreign_keys = OFF")
+        objects = self._connection.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite!_%' ESCAPE '!'").fetchall()
+        for kind, name in objects:
+            self._connection.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+        self._connection.commit()
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        apply_schema(self._connection)
+
+
+def apply_schema(connection, schema_path=SCHEMA_PATH):
+    """Create the schema in one transaction, so a failure leaves nothing behind."""
+    with open(schema_path) as f:
+        connection.executescript("BEGIN IMMEDIATE;\n" + f.read() + "\nCOMMIT;")
+
+
+def connect_sqlite(path, timeout=30.0):
+    """Open a connection to an SQLite database, creating the schema on first use.
+
+    ``path`` is a file path or ``:memory:``. File databases use WAL journaling
+    so readers do not block the writer. ``:memory:`` is one in-process database
+    shared by every connection of the process, meant for tests and benchmarks;
+    its writers share one lock, so prefer a file under concurrent writes.
+    """
+    uri = False
+    if path == ':memory:':
+        path, uri = 'file:urgas?mode=memory&cache=shared', True
+        with _memory_lock:
+            if path not in _memory_keepers:
+                _memory_keepers[path] = sqlite3.connect(path, uri=True, check_same_thread=False)
+    connection = sqlite3.connect(path, timeout=timeout, uri=uri, isolation_level='IMMEDIATE',
+                                 detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    connection.execute("PRAGMA foreign_keys = ON")
+    if not uri:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+
+    initialized = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Professors'").fetchone()
+    if not initialized:
+        try:
+            apply_schema(connection)
+        except sqlite3.OperationalError as e:
+            # Another process created the schema first
+            connection.rollback()
+            if 'already exists' not in str(e):
+                raise
+    return SQLiteConnection(connection)
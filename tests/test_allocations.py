@@ -0,0 +1,18 @@
+import backend
+
+
+def test_default_plan_assigns_grants_within_issuing_agency_budget():
+    # Issuing the grants leaves the agency 200 of its 1000 budget; without a cap
+    # the plan must still link both grants rather than count them against it twice
+    client = backend.app.test_client()
+    agency_id = client.post('/fundingagencies', json={'name': 'Agency', 'budget': 1000}).get_json()['funding_agency_id']
+    for amount in (500, 300):
+        client.post('/grants', json={'amount': amount, 'funding_agency_id': agency_id})
+    client.post('/projects', json={'title': 'Project', 'start_date': '2020-01-01', 'end_date': '2999-12-31'})
+
+    plan = client.post('/allocations/plan', json={}).get_json()
+    assert plan['summary']['grants_assigned'] == 2
+    assert plan['unassigned'] == []
+
+    capped = client.post('/allocations/plan', json={'agency_caps': {str(agency_id): '600'}}).get_json()
+    assert [grant['reason'] for grant in capped['unassigned']] == ['agency_cap']
@@ -0,0 +1,27 @@
+import backend
+
+
+def test_batch_returns_every_result_in_order_when_some_fail():
+    client = backend.app.test_client()
+    agency = client.post('/fundingagencies', json={'name': 'Batch Agency', 'budget': 300}).get_json()
+    etag = client.get('/fundingagencies?name=Batch').headers['ETag'].strip('"')
+
+    response = client.post('/batch', json={'requests': [
+        {'id': 'agencies', 'path': '/fundingagencies', 'params': {'name': 'Batch'}},
+        {'id': 'bad_sort', 'path': '/grants?sort=Nope'},
+        {'id': 'unchanged', 'path': '/fundingagencies?name=Batch', 'etag': etag},
+        '/rollups/agencies'
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(result['id'], result['status']) for result in results] == [
+        ('agencies', 200), ('bad_sort', 400), ('unchanged', 304), (3, 200)]
+    assert [row['AgencyID'] for row in results[0]['body']] == [agency['funding_agency_id']]
+    assert 'error' in results[1]['body']
+    assert 'body' not in results[2]
+
+
+def test_batch_rejects_operations_it_cannot_run():
+    client = backend.app.test_client()
+    for operations in ([], ['/missing'], ['/live/balances'], ['/grants?format=csv'], [{'path': 5}]):
+        assert client.post('/batch', json=operations).status_code == 400
@@ -0,0 +1,33 @@
+import backend
+
+
+def test_bulk_professors_report_row_errors_and_the_ids_created():
+    client = backend.app.test_client()
+    rows = [
+        {'name': 'Bulk One', 'department': 'Biology', 'email': 'bulk.one@example.edu'},
+        {'name': '', 'department': 'Biology', 'email': 'bulk.blank@example.edu'},
+        {'name': 'Bulk Two', 'department': 'Biology', 'email': 'bulk.two@example.edu'},
+        {'name': 'Bulk Again', 'department': 'Biology', 'email': 'bulk.one@example.edu'},
+        {'name': 'Bulk Three', 'department': 'Chemistry', 'email': 'bulk.three@example.edu'}
+    ]
+    response = client.post('/professors/bulk', json=rows)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['created'], body['failed']) == (3, 2)
+    assert [result['status'] for result in body['results']] == ['created', 'error', 'created', 'error', 'created']
+    assert all(result['index'] == i for i, result in enumerate(body['results']))
+
+    # Each created row reports the ID its professor was stored under
+    for i in (0, 2, 4):
+        professor_id = body['results'][i]['professor_id']
+        stored = client.get(f"/professors?email={rows[i]['email']}").get_json()
+        assert [professor['ProfessorID'] for professor in stored] == [professor_id]
+
+
+def test_bulk_csv_upload_and_empty_body():
+    client = backend.app.test_client()
+    csv_body = "name,department,email\nCsv Prof,Math,csv.prof@example.edu\n"
+    response = client.post('/professors/bulk', data=csv_body, content_type='text/csv')
+    assert response.get_json()['created'] == 1
+    assert client.post('/professors/bulk', json=[]).status_code == 400
+    assert client.post('/professors/bulk', json={'name': 'Not a list'}).status_code == 400
@@ -0,0 +1,27 @@
+import backend
+
+
+def test_change_feed_follows_autoincrement_versions(monkeypatch):
+    client = backend.app.test_client()
+    start = client.get('/changes').get_json()['version']
+
+    agency = client.post('/fundingagencies', json={'name': 'Feed Agency', 'budget': 1000}).get_json()
+    agency_id = agency['funding_agency_id']
+    grant_id = client.post('/grants', json={'amount': 100, 'funding_agency_id': agency_id}).get_json()['grant_id']
+    feed = client.get(f'/changes?since={start}').get_json()
+    assert not feed['reset'] and not feed['has_more']
+    assert {(change['table'], change['action']) for change in feed['changes']} >= {
+        ('FundingAgencies', 'insert'), ('Grants', 'insert')}
+
+    # A feed longer than one page is read page by page, up to the newest version
+    monkeypatch.setattr(backend, 'CHANGES_MAX_ROWS', 1)
+    page = client.get(f'/changes?since={start}').get_json()
+    assert page['has_more'] and page['version'] == start + 1
+    monkeypatch.undo()
+
+    client.put(f'/use_grant/{grant_id}', json={'amount': 100})
+    later = client.get(f"/changes?since={feed['version']}&tables=Grants").get_json()
+    assert [(change['key'], change['action']) for change in later['changes']] == [({'GrantID': grant_id}, 'delete')]
+    assert later['version'] > feed['version']
+
+    assert client.get(f"/changes?since={later['version'] + 100}").get_json()['reset']
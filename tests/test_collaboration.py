@@ -0,0 +1,44 @@
+import backend
+
+
+def add_professor_and_project(client, name):
+    professor_id = client.post('/professors', json={
+        'name': name, 'department': 'Physics', 'email': f'{name.lower()}@example.edu'}).get_json()['professor_id']
+    project_id = client.post('/projects', json={
+        'title': f'{name} Project', 'start_date': '2020-01-01', 'end_date': '2999-12-31'}).get_json()['project_id']
+    return professor_id, project_id
+
+
+def test_assign_professor_accepts_string_ids_and_updates_the_graph():
+    client = backend.app.test_client()
+    first, project_id = add_professor_and_project(client, 'Ada')
+    second, _ = add_professor_and_project(client, 'Grace')
+    for professor_id in (first, second):
+        response = client.post('/assign_professor_to_project',
+                               json={'professor_id': str(professor_id), 'project_id': str(project_id)})
+        assert response.status_code == 200
+
+    coinvestigators = client.get(f'/collaborations/professors/{first}/coinvestigators').get_json()
+    assert [professor['professor_id'] for professor in coinvestigators['data']] == [second]
+
+
+def test_assign_rejects_ids_that_are_not_integers():
+    client = backend.app.test_client()
+    for body in ({'professor_id': 'one', 'project_id': 1}, {'professor_id': 1}, [1, 1]):
+        response = client.post('/assign_professor_to_project', json=body)
+        assert response.status_code == 400
+    response = client.post('/assign_grant_to_project', json={'project_id': 1, 'grant_id': '1.5'})
+    assert response.status_code == 400
+
+
+def test_graph_failure_after_commit_marks_the_graph_stale(monkeypatch):
+    client = backend.app.test_client()
+    professor_id, project_id = add_professor_and_project(client, 'Barbara')
+
+    def fail(memberships):
+        raise RuntimeError("graph update failed")
+    monkeypatch.setattr(backend.collaboration_graph, 'add_memberships', fail)
+    response = client.post('/assign_professor_to_project',
+                           json={'professor_id': professor_id, 'project_id': project_id})
+    assert response.status_code == 200
+    assert backend.collaboration_graph._stale
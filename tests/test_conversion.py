@@ -0,0 +1,48 @@
+import backend
+
+
+def add_project_with_professor(client, name):
+    project_id = client.post('/projects', json={
+        'title': f'{name} Study', 'start_date': '2020-01-01', 'end_date': '2999-12-31'}).get_json()['project_id']
+    professor_id = client.post('/professors', json={
+        'name': name, 'department': 'History', 'email': f'{name.lower()}.convert@example.edu'
+    }).get_json()['professor_id']
+    client.post('/assign_professor_to_project', json={'professor_id': professor_id, 'project_id': project_id})
+    return project_id, professor_id
+
+
+def test_bulk_conversion_keeps_professors_and_reports_each_row():
+    client = backend.app.test_client()
+    kept_project, kept_professor = add_project_with_professor(client, 'Keeper')
+    other_project, _ = add_project_with_professor(client, 'Other')
+
+    response = client.post('/convert_projects_to_publications?preserve_links=1', json=[
+        {'project_id': other_project, 'publication_title': 'Other Paper'},
+        {'project_id': kept_project, 'publication_title': 'Kept Paper'},
+        {'project_id': 999999, 'publication_title': 'Missing Paper'},
+        {'project_id': kept_project, 'publication_title': 'Twice'},
+        {'project_id': 'x', 'publication_title': 'Bad'}
+    ])
+    body = response.get_json()
+    assert (body['converted'], body['failed']) == (2, 3)
+    assert [result['status'] for result in body['results']] == ['converted', 'converted', 'error', 'error', 'error']
+    assert body['results'][1]['project_id'] == kept_project
+
+    # The project is gone, but its professor still lists the publication
+    assert client.get('/projects?title=Keeper').get_json() == []
+    publications = client.get(f'/professor_publications/{kept_professor}').get_json()
+    assert [(row['PublicationID'], row['PublicationTitle'], row['ProjectID']) for row in publications] == [
+        (body['results'][1]['publication_id'], 'Kept Paper', None)]
+
+    again = client.post('/convert_projects_to_publications',
+                        json=[{'project_id': kept_project, 'publication_title': 'Kept Paper'}]).get_json()
+    assert again['results'][0]['status'] == 'error'
+
+
+def test_bulk_conversion_without_preserve_links_drops_the_professors():
+    client = backend.app.test_client()
+    project_id, professor_id = add_project_with_professor(client, 'Dropped')
+    response = client.post('/convert_projects_to_publications',
+                           json=[{'project_id': project_id, 'publication_title': 'Dropped Paper'}])
+    assert response.get_json()['converted'] == 1
+    assert client.get(f'/professor_publications/{professor_id}').get_json() == []
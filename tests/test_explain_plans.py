@@ -0,0 +1,22 @@
+import json
+import os
+
+import pytest
+
+import backend
+import explain_check
+
+# EXPLAIN output is MySQL's; run against a seeded database with DB_ENGINE=mysql
+pytestmark = pytest.mark.skipif(os.getenv('DB_ENGINE') != 'mysql', reason="query plan checks need DB_ENGINE=mysql")
+
+
+def test_query_plans_use_the_indexes():
+    with open(explain_check.BASELINE_PATH) as f:
+        baseline = json.load(f)
+    connection = backend.connect_to_database()
+    try:
+        _, failures, changes = explain_check.run_checks(connection, baseline)
+    finally:
+        connection.close()
+    assert failures == []
+    assert changes == []
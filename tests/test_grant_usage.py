@@ -0,0 +1,9 @@
+import backend
+
+
+def test_use_grant_rejects_a_body_that_is_not_an_object():
+    client = backend.app.test_client()
+    for body in ([{'amount': 5}], 5, 'five'):
+        response = client.put('/use_grant/1', json=body)
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
@@ -0,0 +1,41 @@
+import base64
+import json
+
+import backend
+
+
+def test_keyset_pages_cover_the_filtered_list_in_order():
+    client = backend.app.test_client()
+    agency = client.post('/fundingagencies', json={'name': 'Paging Agency', 'budget': 10000}).get_json()
+    agency_id = agency['funding_agency_id']
+    for amount in (300, 100, 500, 100, 200):
+        client.post('/grants', json={'amount': amount, 'funding_agency_id': agency_id})
+
+    full = client.get(f'/grants?agency_id={agency_id}&sort=-Amount').get_json()
+    amounts = [float(grant['Amount']) for grant in full]
+    assert len(amounts) == 5 and amounts == sorted(amounts, reverse=True)
+
+    pages, cursor = [], None
+    while True:
+        query = f'/grants?agency_id={agency_id}&sort=-Amount&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(query).get_json()
+        assert len(page['data']) <= 2
+        pages.extend(page['data'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert pages == full
+
+
+def test_invalid_or_mismatched_cursor_is_rejected():
+    client = backend.app.test_client()
+    agency = client.post('/fundingagencies', json={'name': 'Cursor Agency', 'budget': 1000}).get_json()
+    agency_id = agency['funding_agency_id']
+    for amount in (10, 20):
+        client.post('/grants', json={'amount': amount, 'funding_agency_id': agency_id})
+    cursor = client.get('/grants?sort=Amount&limit=1').get_json()['next_cursor']
+
+    assert client.get('/grants?sort=Amount&limit=1&cursor=not-a-cursor').status_code == 400
+    assert client.get(f'/grants?sort=-Amount&limit=1&cursor={cursor}').status_code == 400
+    tampered = base64.urlsafe_b64encode(json.dumps({'s': 'x', 'v': 'x'}).encode()).decode()
+    assert client.get(f'/grants?sort=Amount&limit=1&cursor={tampered}').status_code == 400
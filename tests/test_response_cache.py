@@ -0,0 +1,33 @@
+import backend
+
+
+def test_cached_reads_revalidate_and_follow_writes():
+    client = backend.app.test_client()
+    agency = client.post('/fundingagencies', json={'name': 'Cache Agency', 'budget': 1000}).get_json()
+    agency_id = agency['funding_agency_id']
+    url = '/fundingagencies?name=Cache'
+
+    first = client.get(url)
+    second = client.get(url)
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert first.get_data() == second.get_data()
+    etag = first.headers['ETag']
+    assert etag and second.headers['ETag'] == etag
+
+    not_modified = client.get(url, headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+
+    # Issuing a grant lowers the agency's budget, so the cached agency list is dropped
+    client.post('/grants', json={'amount': 250, 'funding_agency_id': agency_id})
+    after = client.get(url, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['X-Cache'] == 'MISS' and after.headers['ETag'] != etag
+    assert [float(row['Budget']) for row in after.get_json()] == [750]
+
+
+def test_other_tables_stay_cached_after_a_write():
+    client = backend.app.test_client()
+    client.get('/publications')
+    client.post('/professors', json={'name': 'Cache Prof', 'department': 'Art', 'email': 'cache.prof@example.edu'})
+    assert client.get('/publications').headers['X-Cache'] == 'HIT'
@@ -0,0 +1,20 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import backend
+import response_encoding
+
+
+def test_both_encoders_write_dates_in_iso_format(monkeypatch):
+    row = {'Amount': Decimal('12.50'), 'StartDate': date(2024, 5, 1), 'UsedAt': datetime(2024, 5, 1, 10, 30)}
+    expected = '{"Amount":"12.50","StartDate":"2024-05-01","UsedAt":"2024-05-01T10:30:00"}'
+    assert backend.app.json.dumps(row) == expected
+    monkeypatch.setattr(response_encoding, 'orjson', None)
+    assert backend.app.json.dumps(row) == expected
+
+
+def test_project_dates_round_trip_in_the_format_they_were_sent():
+    client = backend.app.test_client()
+    client.post('/projects', json={'title': 'Encoding Project', 'start_date': '2021-03-04', 'end_date': '2022-05-06'})
+    project = client.get('/projects?title=Encoding').get_json()[0]
+    assert (project['StartDate'], project['EndDate']) == ('2021-03-04', '2022-05-06')
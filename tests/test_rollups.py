@@ -0,0 +1,66 @@
+import backend
+
+ROLLUP_QUERIES = (
+    "SELECT ProjectID, GrantCount, TotalFunding FROM ProjectFunding ORDER BY ProjectID",
+    "SELECT ProfessorID, ProjectCount, TotalFunding FROM ProfessorFunding ORDER BY ProfessorID",
+    "SELECT AgencyID, GrantCount, TotalGranted FROM AgencyFunding ORDER BY AgencyID"
+)
+
+
+def read_rollups(cursor):
+    rollups = []
+    for query in ROLLUP_QUERIES:
+        cursor.execute(query)
+        rollups.append([(row[0], row[1], float(row[2])) for row in cursor.fetchall()])
+    return rollups
+
+
+def assert_rollups_match_recomputation():
+    connection = backend.checkout_connection()
+    cursor = connection.cursor()
+    try:
+        maintained = read_rollups(cursor)
+        backend.repository.rebuild_funding_rollups(cursor)
+        assert maintained == read_rollups(cursor)
+    finally:
+        cursor.close()
+        backend.pool.release(connection)
+
+
+def test_rollups_follow_usage_deletes_and_conversion():
+    client = backend.app.test_client()
+    agency = client.post('/fundingagencies', json={'name': 'Rollup Agency', 'budget': 5000}).get_json()
+    agency_id = agency['funding_agency_id']
+    grant_ids = [client.post('/grants', json={'amount': amount, 'funding_agency_id': agency_id}).get_json()['grant_id']
+                 for amount in (1000, 400, 250)]
+    project_ids = [client.post('/projects', json={
+        'title': f'Rollup Project {n}', 'start_date': '2020-01-01', 'end_date': '2999-12-31'}).get_json()['project_id']
+        for n in range(2)]
+    professor_ids = [client.post('/professors', json={
+        'name': f'Rollup Prof {n}', 'department': 'Physics', 'email': f'rollup{n}@example.edu'
+    }).get_json()['professor_id'] for n in range(2)]
+    for grant_id, project_id in zip(grant_ids, (project_ids[0], project_ids[0], project_ids[1])):
+        client.post('/assign_grant_to_project', json={'project_id': project_id, 'grant_id': grant_id})
+    for professor_id in professor_ids:
+        for project_id in project_ids:
+            client.post('/assign_professor_to_project', json={'professor_id': professor_id, 'project_id': project_id})
+    assert_rollups_match_recomputation()
+
+    # A partial use lowers the balance; a full one removes the grant
+    assert client.put(f'/use_grant/{grant_ids[0]}', json={'amount': 300}).status_code == 200
+    assert client.put(f'/use_grant/{grant_ids[1]}', json={'amount': 400}).status_code == 200
+    assert_rollups_match_recomputation()
+
+    assert client.delete(f'/professors/{professor_ids[1]}').status_code == 200
+    assert_rollups_match_recomputation()
+
+    response = client.post('/convert_projects_to_publications',
+                           json=[{'project_id': project_ids[1], 'publication_title': 'Rollup Paper'}])
+    assert response.get_json()['converted'] == 1
+    assert_rollups_match_recomputation()
+
+    assert client.delete(f'/fundingagencies/{agency_id}').status_code == 200
+    assert_rollups_match_recomputation()
+    projects = client.get('/rollups/projects?sort=ProjectID').get_json()
+    assert [(row['GrantCount'], float(row['TotalFunding'])) for row in projects
+            if row['ProjectID'] == project_ids[0]] == [(0, 0)]
@@ -0,0 +1,14 @@
+import backend
+
+
+def test_snapshots_taken_at_the_same_version_get_distinct_names(tmp_path, monkeypatch):
+    monkeypatch.setitem(backend.SNAPSHOT_CONFIG, 'snapshot_dir', str(tmp_path))
+    client = backend.app.test_client()
+
+    first = client.post('/snapshots', json={})
+    second = client.post('/snapshots', json={})
+    assert (first.status_code, second.status_code) == (201, 201)
+    names = [first.get_json()['name'], second.get_json()['name']]
+    assert names[0] != names[1]
+    assert [manifest['name'] for manifest in client.get('/snapshots').get_json()] == names
+    assert client.get(f"/snapshots/{names[1]}/Grants.parquet").status_code == 200
@@ -0,0 +1,54 @@
+import pytest
+from mysql.connector import Error, errorcode
+
+import backend
+
+
+def run_statement(query, params=()):
+    connection = backend.checkout_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+    finally:
+        cursor.close()
+        backend.pool.release(connection)
+
+
+@pytest.mark.parametrize('query, params, errno', [
+    ("INSERT INTO FundingAgencies (Name, Budget) VALUES (%s, %s)", ('Engine Agency', 10), errorcode.ER_DUP_ENTRY),
+    ("INSERT INTO Professors_Projects (ProfessorID, ProjectID) VALUES (%s, %s)", (999999, 999999),
+     errorcode.ER_NO_REFERENCED_ROW_2),
+    ("INSERT INTO FundingAgencies (Name, Budget) VALUES (%s, %s)", ('Engine Null Agency', None),
+     errorcode.ER_BAD_NULL_ERROR)
+])
+def test_constraint_errors_carry_the_mysql_error_codes(query, params, errno):
+    backend.app.test_client().post('/fundingagencies', json={'name': 'Engine Agency', 'budget': 10})
+    with pytest.raises(Error) as raised:
+        run_statement(query, params)
+    assert raised.value.errno == errno
+
+
+def test_trigger_errors_match_signal_sqlstate_45000():
+    client = backend.app.test_client()
+    email = 'engine.prof@example.edu'
+    client.post('/professors', json={'name': 'Engine Prof', 'department': 'Math', 'email': email})
+    with pytest.raises(Error) as raised:
+        run_statement("INSERT INTO Professors (Name, Department, Email) VALUES (%s, %s, %s)",
+                      ('Engine Twin', 'Math', email))
+    assert (raised.value.errno, raised.value.sqlstate) == (errorcode.ER_SIGNAL_EXCEPTION, '45000')
+    assert raised.value.msg == 'Duplicate professor email not allowed.'
+
+
+def test_committing_a_link_that_exists_is_a_conflict_as_on_mysql():
+    # The endpoint tells the cases apart by error code, so both engines must raise the same one
+    client = backend.app.test_client()
+    agency = client.post('/fundingagencies', json={'name': 'Engine Plan Agency', 'budget': 1000}).get_json()
+    grant = client.post('/grants', json={'amount': 100, 'funding_agency_id': agency['funding_agency_id']}).get_json()
+    project = client.post('/projects', json={
+        'title': 'Engine Project', 'start_date': '2020-01-01', 'end_date': '2999-12-31'}).get_json()
+    assignment = {'grant_id': grant['grant_id'], 'project_id': project['project_id']}
+    client.post('/assign_grant_to_project', json=assignment)
+
+    response = client.post('/allocations/commit', json=[assignment])
+    assert response.status_code == 409
+    assert 'already linked' in response.get_json()['error']